@@ -0,0 +1,6 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарки горячих путей мониторинга
+Работают на любом Linux: procfs/sysfs подменяются подготовленной папкой,
+камера — поддельной программой, которая выдает JPEG в stdout
+"""
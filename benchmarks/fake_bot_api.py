@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Локальная замена Bot API для бенчмарков
+Поддерживает ровно то, что нужно python-telegram-bot для приема команды и ответа:
+getMe, getUpdates (long polling), setWebhook/deleteWebhook и sendMessage.
+В режиме webhook обновления доставляются POST-запросом на адрес бота
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import parse_qs, urlparse
+
+BOT_USER = {'id': 123, 'is_bot': True, 'first_name': 'Bench', 'username': 'bench_bot'}
+CHAT = {'id': 1, 'type': 'private', 'first_name': 'Bench'}
+USER = {'id': 1, 'is_bot': False, 'first_name': 'Bench'}
+
+def command_update(update_id, command='/ping'):
+    """Обновление с командой от пользователя"""
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': CHAT,
+            'from': USER,
+            'text': command,
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': len(command)}],
+        },
+    }
+
+async def _read_request(reader):
+    """Читает один HTTP-запрос: (метод, путь, заголовки, тело) или None при закрытии"""
+    try:
+        head = await reader.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, ConnectionError):
+        return None
+    lines = head.decode('latin-1').split('\r\n')
+    method, path, _ = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        key, _, value = line.partition(':')
+        if key:
+            headers[key.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get('content-length', 0)))
+    return method, path, headers, body
+
+def _parse_params(headers, body):
+    if not body:
+        return {}
+    if headers.get('content-type', '').startswith('application/json'):
+        return json.loads(body)
+    # python-telegram-bot шлет поля формой, сложные значения — строками JSON
+    return {key: values[0] for key, values in parse_qs(body.decode()).items()}
+
+class FakeBotApi:
+    """Сервер, изображающий api.telegram.org"""
+
+    def __init__(self):
+        self.port = None
+        self.replies = {}  # update_id -> время получения ответа (perf_counter)
+        self.webhook_url = None
+        self.webhook_secret = None
+        self._pending = []
+        self._pending_event = None
+        self._reply_event = None
+        self._server = None
+        self._webhook_conn = None
+        self._message_id = 1000
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}/bot'
+
+    async def start(self):
+        self._pending_event = asyncio.Event()
+        self._reply_event = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle, '127.0.0.1', 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        if self._webhook_conn is not None:
+            self._webhook_conn[1].close()
+            self._webhook_conn = None
+        self._server.close()
+        # Будим висящие getUpdates, чтобы они завершились
+        self._pending_event.set()
+        await self._server.wait_closed()
+
+    async def push(self, updates):
+        """Доставляет обновления боту: в очередь getUpdates или POST на webhook"""
+        if self.webhook_url is None:
+            self._pending.extend(updates)
+            self._pending_event.set()
+            return
+        await asyncio.gather(*(self._post_webhook(update) for update in updates))
+
+    async def _post_webhook(self, update):
+        # Отдельное соединение на запрос: Telegram тоже доставляет параллельно
+        url = urlparse(self.webhook_url)
+        reader, writer = await asyncio.open_connection(url.hostname, url.port)
+        body = json.dumps(update).encode()
+        headers = (f"POST {url.path} HTTP/1.1\r\nHost: {url.netloc}\r\n"
+                   f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                   f"Connection: close\r\n")
+        if self.webhook_secret:
+            headers += f"X-Telegram-Bot-Api-Secret-Token: {self.webhook_secret}\r\n"
+        writer.write(headers.encode() + b"\r\n" + body)
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+    async def wait_replies(self, update_ids, timeout=30):
+        """Ждет ответов бота на все указанные обновления"""
+        deadline = time.monotonic() + timeout
+        while not all(update_id in self.replies for update_id in update_ids):
+            self._reply_event.clear()
+            await asyncio.wait_for(self._reply_event.wait(), max(0.0, deadline - time.monotonic()))
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                _, path, headers, body = request
+                method = path.rsplit('/', 1)[-1]
+                result = await self._call(method, _parse_params(headers, body))
+                payload = json.dumps({'ok': True, 'result': result}).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(payload)).encode() + b"\r\n\r\n" + payload)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _call(self, method, params):
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'getUpdates':
+            return await self._get_updates(params)
+        if method == 'setWebhook':
+            self.webhook_url = params.get('url')
+            self.webhook_secret = params.get('secret_token')
+            return True
+        if method == 'deleteWebhook':
+            self.webhook_url = None
+            return True
+        if method == 'sendMessage':
+            now = time.perf_counter()
+            self.replies.setdefault(int(params['text']), now)
+            self._reply_event.set()
+            self._message_id += 1
+            return {'message_id': self._message_id, 'date': int(time.time()), 'chat': CHAT,
+                    'from': BOT_USER, 'text': params['text']}
+        return True
+
+    async def _get_updates(self, params):
+        offset = int(params.get('offset') or 0)
+        timeout = float(params.get('timeout') or 0)
+        self._pending = [u for u in self._pending if u['update_id'] >= offset]
+        if not self._pending and timeout and self._server.is_serving():
+            # Long polling: запрос висит, пока не появятся обновления
+            self._pending_event.clear()
+            try:
+                await asyncio.wait_for(self._pending_event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        updates = [u for u in self._pending if u['update_id'] >= offset][:100]
+        return updates
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Поддельный корень файловой системы и поддельная камера
+Содержимое файлов повторяет Raspberry Pi 4, поэтому результаты не зависят
+от машины, на которой запускается бенчмарк
+"""
+
+import os
+import stat
+
+CPU_COUNT = 4
+
+MEMINFO = """MemTotal:        3884700 kB
+MemFree:         2145312 kB
+MemAvailable:    3120540 kB
+Buffers:           84512 kB
+Cached:           912344 kB
+SwapCached:            0 kB
+Active:           603120 kB
+Inactive:         880212 kB
+SwapTotal:        102396 kB
+SwapFree:         102396 kB
+Dirty:                48 kB
+Shmem:             22016 kB
+Slab:              71236 kB
+"""
+
+def _cpu_line(name, index):
+    # Разные счетчики по ядрам, чтобы разбор не упирался в одинаковые строки
+    base = 100000 + index * 7919
+    return (f"{name} {base} 120 {base // 4} {base * 9} {base // 50} 0 {base // 90} 0 0 0\n")
+
+def _stat():
+    lines = [_cpu_line('cpu', 0)]
+    lines += [_cpu_line(f'cpu{n}', n + 1) for n in range(CPU_COUNT)]
+    lines.append("intr 123456789 " + " ".join(str(n) for n in range(300)) + "\n")
+    lines.append("ctxt 987654321\nbtime 1700000000\nprocesses 54321\n"
+                 "procs_running 1\nprocs_blocked 0\n")
+    return "".join(lines)
+
+def _cpuinfo():
+    blocks = []
+    for n in range(CPU_COUNT):
+        blocks.append(f"processor\t: {n}\nBogoMIPS\t: 108.00\n"
+                      f"Features\t: fp asimd evtstrm crc32 cpuid\nCPU part\t: 0xd08\n")
+    blocks.append("Hardware\t: BCM2835\nRevision\t: c03114\n"
+                  "Model\t\t: Raspberry Pi 4 Model B Rev 1.4\n")
+    return "\n".join(blocks)
+
+FILES = {
+    '/sys/class/thermal/thermal_zone0/temp': "48312\n",
+    '/proc/loadavg': "0.52 0.58 0.59 1/234 5678\n",
+    '/proc/meminfo': MEMINFO,
+    '/proc/uptime': "123456.78 456789.12\n",
+    '/proc/stat': _stat(),
+    '/proc/cpuinfo': _cpuinfo(),
+    '/proc/device-tree/model': "Raspberry Pi 4 Model B Rev 1.4\x00",
+    '/proc/self/mounts': ("/dev/root / ext4 rw,noatime 0 0\n"
+                          "devtmpfs /dev devtmpfs rw,relatime 0 0\n"
+                          "proc /proc proc rw,relatime 0 0\n"
+                          "sysfs /sys sysfs rw,relatime 0 0\n"
+                          "/dev/mmcblk0p1 /boot vfat rw,relatime 0 0\n"
+                          "tmpfs /run tmpfs rw,nosuid 0 0\n"),
+    '/proc/net/if_inet6': ("00000000000000000000000000000001 01 80 10 80       lo\n"
+                           "fe80000000000000dea632fffe0a1b2c 02 40 20 80     eth0\n"),
+    '/sys/class/net/lo/operstate': "unknown\n",
+    '/sys/class/net/lo/address': "00:00:00:00:00:00\n",
+    '/sys/class/net/eth0/operstate': "up\n",
+    '/sys/class/net/eth0/address': "dc:a6:32:0a:1b:2c\n",
+    '/sys/class/net/wlan0/operstate': "down\n",
+    '/sys/class/net/wlan0/address': "dc:a6:32:0a:1b:2d\n",
+}
+
+def build_fake_root(root):
+    """Создает в root дерево /proc и /sys с типичным содержимым Pi 4"""
+    for path, content in FILES.items():
+        full = root + path
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'w') as f:
+            f.write(content)
+    # Точки монтирования из mounts должны существовать для statvfs
+    os.makedirs(os.path.join(root, 'boot'), exist_ok=True)
+    return root
+
+def fake_jpeg(size=60000):
+    """Байты с маркерами SOI/EOI размером с типичный снимок 1280x720"""
+    body = bytes(range(256)) * (size // 256)
+    return b'\xff\xd8' + body.replace(b'\xff', b'\x00') + b'\xff\xd9'
+
+def write_fake_camera(directory):
+    """Создает программу, которая, как fswebcam с выводом в '-', пишет JPEG в stdout"""
+    frame = os.path.join(directory, 'frame.jpg')
+    with open(frame, 'wb') as f:
+        f.write(fake_jpeg())
+    command = os.path.join(directory, 'fake-camera')
+    with open(command, 'w') as f:
+        f.write(f"#!/bin/sh\nexec cat '{frame}'\n")
+    os.chmod(command, os.stat(command).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return command
@@ -0,0 +1,193 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк горячих путей на поддельном корне procfs/sysfs
+
+Запуск из корня репозитория:
+    python3 -m benchmarks.run                     # сравнить с baseline.json
+    python3 -m benchmarks.run --update-baseline   # сохранить новые эталоны
+
+Для каждой операции выводятся перцентили задержки, пик выделенной памяти
+(tracemalloc), read()-вызовы и открытия файлов. Если операция стала заметно
+хуже эталона, скрипт завершается с кодом 1
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from pi_monitor import metrics
+from pi_monitor.facts import reset_static_facts
+from pi_monitor.iostats import measure_io
+from benchmarks.fakeroot import build_fake_root, write_fake_camera
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Допуски: счетчики вызовов и память почти детерминированы, задержка зависит от машины
+SYSCALL_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 1.25
+LATENCY_TOLERANCE = 2.0
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def _latencies(func, repeat):
+    """Задержка каждого вызова в микросекундах (по возрастанию)"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        func()
+        timings.append((time.perf_counter_ns() - started) / 1000)
+    timings.sort()
+    return timings
+
+def _allocations(func, repeat):
+    """Пик памяти, выделенной за один вызов, и память, оставшаяся после всех вызовов"""
+    tracemalloc.start()
+    try:
+        start = tracemalloc.get_traced_memory()[0]
+        peak = 0
+        for _ in range(repeat):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            func()
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - before)
+        retained = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+    return peak, retained / repeat
+
+def benchmark(func, repeat):
+    """Меряет одну операцию"""
+    func()  # прогрев: кэши модулей, статические сведения
+    timings = _latencies(func, repeat)
+    peak, retained = _allocations(func, max(1, repeat // 10))
+    io_stats = measure_io(func, max(1, repeat // 10))
+    return {
+        'p50_us': _percentile(timings, 0.50),
+        'p95_us': _percentile(timings, 0.95),
+        'p99_us': _percentile(timings, 0.99),
+        'max_us': timings[-1],
+        'peak_bytes': peak,
+        'retained_bytes': retained,
+        'syscr': io_stats['syscr'],
+        'opens': io_stats['opens'],
+    }
+
+def _quiet(func):
+    """Оборачивает проверку system_test, подавляя ее вывод"""
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+    return run
+
+def build_operations(camera_command, loop):
+    """Операции бенчмарка: имя -> (функция, число повторов)"""
+    from pi_monitor import status
+    from pi_monitor.camera import fswebcam_command, run_capture_command
+    from pi_monitor.fastread import FastReader
+    import system_test
+
+    snapshot = status.get_system_status()
+    reader = FastReader()
+    command = fswebcam_command(command=camera_command)
+
+    operations = {
+        'get_system_status': (status.get_system_status, 2000),
+        'format_status_message': (lambda: status.format_status_message(snapshot), 5000),
+        'fast_read_values': (reader.read_values, 5000),
+        'take_photo': (lambda: loop.run_until_complete(run_capture_command(command)), 100),
+    }
+    for name in ('get_system_info', 'get_cpu_temperature', 'get_memory_info',
+                 'get_disk_usage', 'get_network_info', 'get_uptime'):
+        operations[f'system_test.{name}'] = (_quiet(getattr(system_test, name)), 1000)
+    return operations
+
+def check_regressions(name, result, baseline, latency_tolerance):
+    """Возвращает список описаний регрессий операции относительно эталона"""
+    problems = []
+    for key in ('syscr', 'opens'):
+        if result[key] > baseline[key] * 1.1 + SYSCALL_TOLERANCE:
+            problems.append(f"{name}: {key} {baseline[key]:.1f} → {result[key]:.1f}")
+    if result['peak_bytes'] > baseline['peak_bytes'] * MEMORY_TOLERANCE + 4096:
+        problems.append(f"{name}: пик памяти {baseline['peak_bytes']} → {result['peak_bytes']} байт")
+    if result['p50_us'] > baseline['p50_us'] * latency_tolerance:
+        problems.append(f"{name}: p50 {baseline['p50_us']:.1f} → {result['p50_us']:.1f} мкс")
+    return problems
+
+def print_results(results):
+    print(f"{'операция':<32}{'p50':>9}{'p95':>9}{'p99':>9}{'макс':>10}"
+          f"{'пик КБ':>9}{'read()':>8}{'open()':>8}")
+    for name, r in results.items():
+        print(f"{name:<32}{r['p50_us']:>9.1f}{r['p95_us']:>9.1f}{r['p99_us']:>9.1f}{r['max_us']:>10.1f}"
+              f"{r['peak_bytes'] / 1024:>9.1f}{r['syscr']:>8.1f}{r['opens']:>8.1f}")
+    print("(задержки в микросекундах на вызов)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк горячих путей мониторинга")
+    parser.add_argument('--update-baseline', action='store_true', help="сохранить результаты как эталон")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="файл эталонов")
+    parser.add_argument('--latency-tolerance', type=float, default=LATENCY_TOLERANCE,
+                        help="во сколько раз p50 может превысить эталон")
+    parser.add_argument('--only', help="запустить только операции, содержащие эту подстроку")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix='pi-monitor-bench-') as tmp:
+        metrics.set_root(build_fake_root(os.path.join(tmp, 'root')))
+        reset_static_facts()
+        camera_command = write_fake_camera(tmp)
+        loop = asyncio.new_event_loop()
+        try:
+            results = {}
+            for name, (func, repeat) in build_operations(camera_command, loop).items():
+                if args.only and args.only not in name:
+                    continue
+                results[name] = benchmark(func, repeat)
+        finally:
+            loop.close()
+            metrics.set_root('/')
+            reset_static_facts()
+
+    print_results(results)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            rounded = {name: {key: round(value, 1) for key, value in r.items()}
+                       for name, r in results.items()}
+            json.dump(rounded, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"Эталоны сохранены в {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"Нет эталонов ({args.baseline}); сохраните их с --update-baseline")
+        return 0
+
+    problems = []
+    for name, result in results.items():
+        if name in baseline:
+            problems += check_regressions(name, result, baseline[name], args.latency_tolerance)
+    if problems:
+        print("\n❌ РЕГРЕССИИ:")
+        for problem in problems:
+            print(f"  {problem}")
+        return 1
+    print("\n✅ Регрессий нет")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
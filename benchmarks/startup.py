@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+Бенчмарк запуска бота: время холодного старта и занимаемая память
+
+Запуск из корня git-клона (нужен python-telegram-bot):
+    python3 -m benchmarks.startup
+    python3 -m benchmarks.startup --runs 10
+
+Каждый вариант запускается в отдельном процессе Python, который собирает
+приложение со всеми обработчиками (без подключения к Telegram) и сообщает
+VmRSS и VmHWM из /proc/self/status. Варианты «old-*» — настоящие скрипты ботов
+до перехода на плагины: дерево той ревизии извлекается из git во временный
+каталог, и main() скрипта выполняется с заглушкой вместо run_application
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Скрипты ботов до перехода на плагины (пути в дереве той ревизии)
+OLD_SCRIPTS = {
+    'old-status': 'pi_status_monitoring_bot/telegram_monitor_bot.py',
+    'old-photo': 'pi_status_and_photo_bot/telegram_monitor_photo_bot.py',
+}
+
+VARIANTS = {
+    'python': None,
+    'old-status': None,
+    'status': ('status',),
+    'old-photo': None,
+    'status+camera': ('status', 'camera'),
+}
+
+# Пары для сравнения: старый скрипт -> тот же бот на плагинах
+PAIRS = (('old-status', 'status'), ('old-photo', 'status+camera'))
+
+REPORT = """
+memory = {{}}
+with open('/proc/self/status') as status:
+    for line in status:
+        key, _, value = line.partition(':')
+        if key in ('VmRSS', 'VmHWM'):
+            memory[key] = int(value.split()[0])
+print(json.dumps({{'modules': len(sys.modules), **memory}}))
+"""
+
+CHILD = """
+import json, sys
+sys.path.insert(0, {root!r})
+plugins = {plugins!r}
+if plugins is not None:
+    from pi_monitor.bot.core import build_application
+    from pi_monitor.facts import get_static_facts
+    get_static_facts()
+    build_application('123:startup', plugins)
+""" + REPORT
+
+OLD_CHILD = """
+import importlib.util, json, os, sys
+# Рядом со скриптом лежит config.py с токеном, как на Pi
+sys.path.insert(0, os.path.dirname({script!r}))
+spec = importlib.util.spec_from_file_location('old_bot', {script!r})
+bot = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(bot)
+bot.run_application = lambda *args, **kwargs: None
+bot.main()
+""" + REPORT
+
+def pre_merge_revision():
+    """Последняя ревизия, где скрипт фото-бота сам собирал Application"""
+    merge = subprocess.run(
+        ['git', 'log', '-1', '--format=%H', '-S', 'Application.builder()', '--',
+         OLD_SCRIPTS['old-photo']], cwd=ROOT_DIR, check=True, capture_output=True, text=True).stdout.strip()
+    if not merge:
+        raise RuntimeError("в истории git не найден переход на плагины")
+    return f'{merge}^'
+
+def extract_tree(revision, target):
+    """Извлекает дерево ревизии в target и кладет config.py рядом со скриптами"""
+    archive = subprocess.run(['git', 'archive', '--format=tar', revision], cwd=ROOT_DIR,
+                             check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(target)
+    for script in OLD_SCRIPTS.values():
+        with open(os.path.join(target, os.path.dirname(script), 'config.py'), 'w') as config_file:
+            config_file.write("BOT_TOKEN = '123:startup'\n")
+
+def run_variant(name, old_root=None):
+    """Один запуск варианта в новом процессе: (секунды, результат ребенка)"""
+    if name in OLD_SCRIPTS:
+        code = OLD_CHILD.format(script=os.path.join(old_root, OLD_SCRIPTS[name]))
+    else:
+        plugins = VARIANTS[name]
+        code = CHILD.format(root=ROOT_DIR, plugins=list(plugins) if plugins is not None else None)
+    started = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True,
+                            env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}).stdout
+    elapsed = time.perf_counter() - started
+    return elapsed, json.loads(output.strip().splitlines()[-1])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время запуска и память бота по наборам плагинов")
+    parser.add_argument('--runs', type=int, default=5, help="запусков каждого варианта")
+    parser.add_argument('--only', nargs='*', choices=list(VARIANTS), help="только эти варианты")
+    parser.add_argument('--rev', help="ревизия со старыми скриптами (по умолчанию — перед переходом на плагины)")
+    args = parser.parse_args(argv)
+
+    names = args.only or list(VARIANTS)
+    with tempfile.TemporaryDirectory(prefix='startup-') as old_root:
+        if any(name in OLD_SCRIPTS for name in names):
+            revision = args.rev or pre_merge_revision()
+            extract_tree(revision, old_root)
+            print(f"старые скрипты: {revision}")
+
+        print(f"{'вариант':<15}{'старт мс':>10}{'RSS МБ':>9}{'пик МБ':>9}{'модулей':>9}")
+        results = {}
+        for name in names:
+            # Первый запуск прогревает кэш страниц и байткод, в замер не идет
+            run_variant(name, old_root)
+            runs = [run_variant(name, old_root) for _ in range(args.runs)]
+            elapsed = statistics.median(seconds for seconds, _ in runs) * 1000
+            child = runs[-1][1]
+            results[name] = (elapsed, child['VmRSS'] / 1024, child['modules'])
+            print(f"{name:<15}{elapsed:>10.0f}{child['VmRSS'] / 1024:>9.1f}{child['VmHWM'] / 1024:>9.1f}"
+                  f"{child['modules']:>9}")
+
+    print()
+    for old, new in PAIRS:
+        if old in results and new in results:
+            old_ms, old_mb, old_modules = results[old]
+            new_ms, new_mb, new_modules = results[new]
+            # Знак выводится как есть: плюс — плагины медленнее или тяжелее старого скрипта
+            print(f"{new} против {old}: старт {new_ms - old_ms:+.0f} мс ({(new_ms - old_ms) / old_ms:+.0%}), "
+                  f"RSS {new_mb - old_mb:+.1f} МБ, модулей {new_modules - old_modules:+d}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Сравнение long polling и webhook на локальной замене Bot API
+
+Запуск из корня репозитория (нужен python-telegram-bot[webhooks]):
+    python3 -m benchmarks.webhook
+    python3 -m benchmarks.webhook --work-ms 200 --concurrency 1
+
+Меряется время от появления обновления в «Telegram» до получения ответа бота:
+сначала по одной команде, затем пачкой, когда обработчик занят вводом-выводом
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+from benchmarks.fake_bot_api import FakeBotApi, command_update
+from pi_monitor.serving import webhook_settings
+
+TOKEN = '123:bench'
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _build_application(api, concurrency, work):
+    from telegram.ext import Application, CommandHandler
+
+    async def ping(update, context):
+        if work['ms']:
+            # Имитация обработчика, который ждет ввод-вывод (сбор метрик, камера)
+            await asyncio.sleep(work['ms'] / 1000)
+        await update.message.reply_text(str(update.update_id))
+
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .base_url(api.base_url)
+        .concurrent_updates(concurrency)
+        .build()
+    )
+    application.add_handler(CommandHandler('ping', ping))
+    return application
+
+async def _start(application, mode):
+    await application.initialize()
+    if mode == 'polling':
+        await application.updater.start_polling(poll_interval=0.0, timeout=10)
+    else:
+        port = _free_port()
+        settings = webhook_settings(f'http://127.0.0.1:{port}/bot', listen='127.0.0.1', port=port)
+        await application.updater.start_webhook(**settings)
+    await application.start()
+
+async def _stop(application):
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+
+def _percentiles(values):
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+    return pick(0.5), pick(0.95), values[-1]
+
+async def run_mode(mode, sequential, burst, concurrency, work_ms):
+    api = FakeBotApi()
+    await api.start()
+    work = {'ms': 0}
+    application = _build_application(api, concurrency, work)
+    await _start(application, mode)
+    next_id = 1
+    try:
+        # По одной команде: задержка «обновление → ответ»
+        latencies = []
+        for _ in range(sequential):
+            update = command_update(next_id)
+            started = time.perf_counter()
+            await api.push([update])
+            await api.wait_replies([next_id])
+            latencies.append((api.replies[next_id] - started) * 1000)
+            next_id += 1
+
+        # Пачка одновременных команд: ограниченная параллельность обработки
+        work['ms'] = work_ms
+        updates = [command_update(next_id + n) for n in range(burst)]
+        ids = [u['update_id'] for u in updates]
+        started = time.perf_counter()
+        await api.push(updates)
+        await api.wait_replies(ids)
+        burst_total = (max(api.replies[i] for i in ids) - started) * 1000
+    finally:
+        await _stop(application)
+        await api.stop()
+    return latencies, burst_total
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Long polling против webhook на замене Bot API")
+    parser.add_argument('--sequential', type=int, default=50, help="команд по одной")
+    parser.add_argument('--burst', type=int, default=32, help="команд в пачке")
+    parser.add_argument('--concurrency', type=int, default=8, help="concurrent_updates")
+    parser.add_argument('--work-ms', type=float, default=50, help="время работы обработчика в пачке")
+    args = parser.parse_args(argv)
+
+    print(f"{'режим':<10}{'p50 мс':>9}{'p95 мс':>9}{'макс мс':>9}   пачка {args.burst} × {args.work_ms:g} мс")
+    for mode in ('polling', 'webhook'):
+        latencies, burst_total = asyncio.run(
+            run_mode(mode, args.sequential, args.burst, args.concurrency, args.work_ms))
+        p50, p95, worst = _percentiles(latencies)
+        print(f"{mode:<10}{p50:>9.1f}{p95:>9.1f}{worst:>9.1f}   {burst_total:>7.0f} мс "
+              f"(concurrent_updates={args.concurrency})")
+    print("\nНа реальной сети к задержке polling добавляется путь ответа getUpdates от серверов Telegram,\n"
+          "а webhook получает обновление первым же входящим запросом.")
+
+if __name__ == '__main__':
+    main()
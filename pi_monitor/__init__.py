@@ -0,0 +1,5 @@
+# -*- coding: utf-8 -*-
+"""
+Общие модули мониторинга Raspberry Pi
+Используются обоими Telegram-ботами и system_test.py
+"""
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""
+Оповещения о превышении порогов
+Правила проверяются на каждом замере фонового сборщика; гистерезис,
+подавление дребезга и пауза между оповещениями не дают им «мигать»
+"""
+
+import logging
+import time
+from dataclasses import dataclass
+
+from pi_monitor.status import THRESHOLDS
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class AlertRule:
+    """Правило: метрика >= threshold включает тревогу, < clear_below — снимает"""
+    name: str
+    metric: str
+    title: str
+    threshold: float
+    clear_below: float
+    unit: str = ""
+    for_ticks: int = 3  # сколько замеров подряд нужно для срабатывания/снятия
+    cooldown: float = 900.0  # минимальная пауза между оповещениями по правилу (секунды)
+
+@dataclass
+class AlertEvent:
+    """Смена состояния правила"""
+    rule: AlertRule
+    firing: bool
+    value: float
+    timestamp: float
+
+class _RuleState:
+    __slots__ = ('active', 'streak', 'last_notified', 'notified')
+
+    def __init__(self):
+        self.active = False
+        self.streak = 0  # замеров подряд «против» текущего состояния
+        self.last_notified = float('-inf')
+        self.notified = False  # отправлено ли оповещение о текущей тревоге
+
+def default_rules(thresholds=THRESHOLDS, cpu_count=1):
+    """Правила по порогам из статуса (загрузка масштабируется на число ядер)"""
+    load_limit = thresholds['load_critical_per_core'] * cpu_count
+    return [
+        AlertRule('temperature', 'temperature', "Температура CPU",
+                  thresholds['temperature_critical'], thresholds['temperature_critical'] - 5, "°C"),
+        AlertRule('load', 'load_1', "Загрузка CPU (1 мин)",
+                  load_limit, load_limit - 0.2 * cpu_count),
+        AlertRule('memory', 'memory_percent', "Память",
+                  thresholds['memory_percent'], thresholds['memory_percent'] - 5, "%"),
+        AlertRule('disk', 'disk_percent', "Диск",
+                  thresholds['disk_percent'], thresholds['disk_percent'] - 2, "%", for_ticks=1),
+    ]
+
+class AlertEngine:
+    """Проверяет правила по замерам и возвращает события для отправки"""
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._states = [_RuleState() for _ in self.rules]
+
+    def evaluate(self, values, now=None):
+        """Проверяет один замер; возвращает список AlertEvent, о которых нужно сообщить"""
+        now = time.time() if now is None else now
+        events = []
+        for rule, state in zip(self.rules, self._states):
+            value = values.get(rule.metric)
+            if value is None or value != value:  # нет данных или NaN
+                continue
+            if state.active:
+                crossed = value < rule.clear_below
+            else:
+                crossed = value >= rule.threshold
+            if not crossed:
+                state.streak = 0
+                continue
+            state.streak += 1
+            if state.streak < rule.for_ticks:
+                continue
+
+            state.active = not state.active
+            state.streak = 0
+            if state.active:
+                if now - state.last_notified < rule.cooldown:
+                    # Повтор в пределах паузы: тревога активна, но без сообщения
+                    state.notified = False
+                    logger.info(f"Alert '{rule.name}' suppressed by cooldown")
+                    continue
+                state.notified = True
+                state.last_notified = now
+                events.append(AlertEvent(rule, True, value, now))
+            elif state.notified:
+                state.notified = False
+                events.append(AlertEvent(rule, False, value, now))
+        return events
+
+    def active_rules(self):
+        """Правила, по которым сейчас действует тревога"""
+        return [rule for rule, state in zip(self.rules, self._states) if state.active]
+
+def _format_number(value, unit):
+    return f"{value:.2f}" if not unit else f"{value:.1f}{unit}"
+
+def format_alert_message(event):
+    """Форматирует событие оповещения"""
+    rule = event.rule
+    value = _format_number(event.value, rule.unit)
+    if event.firing:
+        return (f"🚨 <b>Тревога: {rule.title}</b>\n"
+                f"Значение {value}, порог {_format_number(rule.threshold, rule.unit)}")
+    return (f"✅ <b>Норма: {rule.title}</b>\n"
+            f"Значение {value} (ниже {_format_number(rule.clear_below, rule.unit)})")
+
+def format_alerts_overview(engine):
+    """Список правил и текущих тревог для команды /alerts"""
+    active = engine.active_rules()
+    message = "🚨 <b>Оповещения</b>\n\n"
+    for rule in engine.rules:
+        mark = "❌" if rule in active else "✅"
+        message += (f"{mark} {rule.title}: ≥ {_format_number(rule.threshold, rule.unit)}, "
+                    f"снятие < {_format_number(rule.clear_below, rule.unit)}\n")
+    if not active:
+        message += "\n<i>Активных тревог нет</i>"
+    return message
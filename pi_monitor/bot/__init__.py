@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+"""
+Telegram-бот мониторинга Raspberry Pi из плагинов
+Запуск: run(BOT_TOKEN, plugins=['status', 'camera'], ALLOWED_USERS=[...])
+"""
+
+def run(token, plugins=('status',), **overrides):
+    """Запускает бота; python-telegram-bot импортируется только здесь"""
+    from pi_monitor.bot.core import run as run_bot
+    run_bot(token, plugins, **overrides)
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Ядро Telegram-бота мониторинга Raspberry Pi
+Проверяет доступ, меряет время обработчиков, собирает /start и /help
+из включенных плагинов и запускает их фоновые задачи
+"""
+
+import logging
+
+from pi_monitor import perf
+from pi_monitor.bot import settings
+from pi_monitor.bot.plugins import load_plugin
+from pi_monitor.perf import LoopLagMonitor, format_perf_message
+from pi_monitor.serving import run_application
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PLUGINS = ('status',)
+
+class MonitorBot:
+    """Бот из набора плагинов"""
+
+    def __init__(self, plugins=DEFAULT_PLUGINS):
+        # Свои пороги применяются до того, как плагины прочитают их
+        from pi_monitor.status import THRESHOLDS
+        THRESHOLDS.update(settings.THRESHOLDS)
+        self.plugins = [load_plugin(name, self) for name in plugins]
+        # Задержка цикла событий для /perf (время обработчиков копится в perf.registry)
+        self.loop_lag_monitor = LoopLagMonitor()
+
+    def is_allowed(self, user_id, admin=False):
+        """Проверка разрешенных пользователей (если список не пустой)"""
+        users = settings.ALLOWED_USERS
+        if admin:
+            # /perf доступна администраторам (если список пуст — всем разрешенным пользователям)
+            users = settings.ADMIN_USERS or settings.ALLOWED_USERS
+        return not users or user_id in users
+
+    def command(self, name, callback, admin=False):
+        """Обработчик команды с проверкой доступа и замером времени"""
+        from telegram.ext import CommandHandler
+
+        async def handler(update, context):
+            if not self.is_allowed(update.effective_user.id, admin):
+                await update.message.reply_text("❌ Команда доступна только администраторам." if admin
+                                                else "❌ У вас нет доступа к этому боту.")
+                return
+            with perf.measure(f'handler.{name}'):
+                await callback(update, context)
+        return CommandHandler(name, handler)
+
+    def button(self, prefix, callback):
+        """Обработчик нажатия кнопки (callback_data вида 'prefix:...') с теми же проверками"""
+        from telegram.ext import CallbackQueryHandler
+
+        async def handler(update, context):
+            query = update.callback_query
+            if not self.is_allowed(update.effective_user.id):
+                await query.answer("❌ У вас нет доступа к этому боту.", show_alert=True)
+                return
+            with perf.measure(f'button.{prefix}'):
+                await callback(update, context)
+        return CallbackQueryHandler(handler, pattern=f'^{prefix}:')
+
+    def footer_lines(self):
+        """Статистика всех плагинов для /history"""
+        return [line for plugin in self.plugins for line in plugin.footer_lines()]
+
+    def help_lines(self):
+        return [line for plugin in self.plugins for line in plugin.help_lines]
+
+    async def start(self, update, context):
+        """Обработчик команды /start"""
+        hints = [plugin.start_hint for plugin in self.plugins if plugin.start_hint]
+        welcome_message = (
+            "🤖 <b>Raspberry Pi Monitor Bot</b>\n\n"
+            "Доступные команды:\n"
+            "/start - Показать эту справку\n"
+            + ''.join(f"{line}\n" for line in self.help_lines())
+            + "/help - Подробная справка\n\n"
+            + '\n'.join(hints)
+        )
+        await update.message.reply_text(welcome_message.rstrip(), parse_mode='HTML')
+
+    async def help_command(self, update, context):
+        """Обработчик команды /help"""
+        sections = [plugin.help_section() for plugin in self.plugins]
+        help_text = (
+            "🤖 <b>Raspberry Pi Monitor Bot - Справка</b>\n\n"
+            "<b>Команды:</b>\n"
+            "/start - Запустить бота\n"
+            + ''.join(f"{line}\n" for line in self.help_lines())
+            + "/perf - Время обработки команд (для администраторов)\n"
+            "/help - Показать эту справку\n\n"
+            + ''.join(f"{section}\n\n" for section in sections if section)
+            + "<b>Статусы:</b>\n"
+            "✅ - Нормальное состояние\n"
+            "⚠ - Повышенные показатели\n"
+            "❌ - Критические показатели"
+        )
+        await update.message.reply_text(help_text, parse_mode='HTML')
+
+    async def perf_command(self, update, context):
+        """Обработчик команды /perf"""
+        await update.message.reply_text(format_perf_message(), parse_mode='HTML')
+
+    async def error_handler(self, update, context):
+        """Обработчик ошибок"""
+        logger.error(f"Exception while handling an update: {context.error}")
+
+    async def post_init(self, application):
+        """Запускает фоновые задачи после инициализации бота"""
+        self.loop_lag_monitor.start()
+        for plugin in self.plugins:
+            await plugin.start(application)
+
+    async def post_shutdown(self, application):
+        """Останавливает фоновые задачи"""
+        for plugin in reversed(self.plugins):
+            await plugin.stop(application)
+        await self.loop_lag_monitor.stop()
+
+    def build_application(self, token):
+        """Создает приложение со всеми обработчиками (без запуска)"""
+        # telegram.ext (и tornado вместе с ним) нужен только для сборки приложения:
+        # /start, /help и плагины проверяются без него
+        from telegram.ext import Application
+
+        application = (
+            Application.builder()
+            .token(token)
+            .post_init(self.post_init)
+            .post_shutdown(self.post_shutdown)
+            .concurrent_updates(settings.CONCURRENT_UPDATES)
+            .build()
+        )
+
+        application.add_handler(self.command('start', self.start))
+        for plugin in self.plugins:
+            for name, method in plugin.commands.items():
+                application.add_handler(self.command(name, getattr(plugin, method)))
+            for prefix, method in plugin.callbacks.items():
+                application.add_handler(self.button(prefix, getattr(plugin, method)))
+        application.add_handler(self.command('perf', self.perf_command, admin=True))
+        application.add_handler(self.command('help', self.help_command))
+        application.add_error_handler(self.error_handler)
+        return application
+
+def build_application(token, plugins=DEFAULT_PLUGINS, **overrides):
+    """Настраивает бота и создает приложение (для проверок и бенчмарков)"""
+    settings.configure(**overrides)
+    return MonitorBot(plugins).build_application(token)
+
+def run(token, plugins=DEFAULT_PLUGINS, **overrides):
+    """Запускает бота с выбранными плагинами (блокирует до остановки)"""
+    # Настройка логирования
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+
+    # Проверяем токен
+    if token == "YOUR_BOT_TOKEN_HERE":
+        print("❌ Ошибка: Не установлен токен бота!")
+        print("1. Получите токен у @BotFather в Telegram")
+        print("2. Замените 'YOUR_BOT_TOKEN_HERE' на ваш токен в файле config.py")
+        return
+
+    print("🚀 Запуск Telegram-бота для мониторинга Raspberry Pi...")
+
+    # Статические сведения о системе вычисляются один раз при запуске
+    from pi_monitor.facts import get_static_facts
+    facts = get_static_facts()
+    print(f"🖥️ {facts.model or facts.platform}: {facts.cpu_count} ядер, {facts.architecture}")
+
+    application = build_application(token, plugins, **overrides)
+
+    # Запускаем бота
+    print(f"✅ Бот запущен ({settings.UPDATE_MODE}, плагины: {', '.join(plugins)})! "
+          "Нажмите Ctrl+C для остановки.")
+    run_application(application, settings.UPDATE_MODE, url=settings.WEBHOOK_URL,
+                    listen=settings.WEBHOOK_LISTEN, port=settings.WEBHOOK_PORT,
+                    secret=settings.WEBHOOK_SECRET, cert=settings.WEBHOOK_CERT, key=settings.WEBHOOK_KEY)
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Плагины бота
+Каждый плагин добавляет свои команды, фоновые задачи и строки справки.
+Модуль плагина импортируется, только если плагин включен, а тяжелые
+зависимости внутри плагина — при первом использовании
+"""
+
+import importlib
+
+# Имя плагина -> модуль с классом Plugin
+PLUGINS = {
+    'status': 'pi_monitor.bot.plugins.status',
+    'camera': 'pi_monitor.bot.plugins.camera',
+}
+
+class BotPlugin:
+    """Базовый класс плагина"""
+
+    name = 'base'
+    commands = {}  # Команда -> имя метода-обработчика
+    callbacks = {}  # Префикс callback_data кнопки -> имя метода-обработчика
+    help_lines = ()  # Строки списка команд в /start и /help
+    start_hint = ''  # Подсказка в конце /start
+
+    def __init__(self, bot):
+        self.bot = bot
+
+    def help_section(self):
+        """Раздел «Что делает ...» в /help"""
+        return ''
+
+    def footer_lines(self):
+        """Строки статистики плагина под отчетом /history"""
+        return []
+
+    async def start(self, application):
+        """Запускает фоновые задачи плагина (post_init)"""
+
+    async def stop(self, application):
+        """Останавливает фоновые задачи плагина (post_shutdown)"""
+
+def load_plugin(name, bot):
+    """Импортирует модуль плагина и создает плагин"""
+    if name not in PLUGINS:
+        raise ValueError(f"Неизвестный плагин: {name} (доступны: {', '.join(PLUGINS)})")
+    module = importlib.import_module(PLUGINS[name])
+    return module.Plugin(bot)
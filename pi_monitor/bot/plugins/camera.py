@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+"""
+Плагин camera: /photo с одной или нескольких USB-камер
+Постоянный поток захвата запускается вместе с ботом (в этом его смысл),
+а при бэкенде 'fswebcam' ничего не запускается до первого /photo.
+У каждой камеры свои очередь съемок и кэш, поэтому /photo all снимает все камеры
+параллельно и ждет только самую медленную.
+Детектор движения (NumPy, Pillow) и таймлапс загружаются, только когда их включают,
+а процесс пережатия превью — при первом /photo
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import shutil
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from pi_monitor import perf
+from pi_monitor.bot import settings
+from pi_monitor.bot.plugins import BotPlugin
+from pi_monitor.cache import SnapshotCache, format_cache_stats
+from pi_monitor.camera import (CaptureWorker, CameraError, CaptureQueue, create_backend,
+                               run_capture_command, fswebcam_command, format_queue_stats,
+                               discover_devices, device_label)
+from pi_monitor.photos import Photo, send_photo, send_photo_to_chat, send_album, upload_stats
+from pi_monitor.preview import PreviewPool, UploadMeter, format_upload_stats
+
+logger = logging.getLogger(__name__)
+
+# Лимит Bot API на отправку файлов
+MAX_DOCUMENT_BYTES = 50 * 1024 * 1024
+
+def save_photo(data, taken_at, suffix=''):
+    """Сохраняет снимок на диск (только если задан PHOTO_SAVE_DIR)"""
+    # Микросекунды в имени: два снимка в одну секунду не перезаписывают друг друга,
+    # а суффикс устройства разделяет одновременные снимки разных камер
+    name = datetime.fromtimestamp(taken_at).strftime(f'pi_photo_%Y%m%d_%H%M%S_%f{suffix}.jpg')
+    path = os.path.join(settings.PHOTO_SAVE_DIR, name)
+    with open(path, 'wb') as photo_file:
+        photo_file.write(data)
+    return path
+
+def camera_devices():
+    """Устройства из настроек: одно CAMERA_DEVICE, список CAMERA_DEVICES или 'auto'"""
+    if settings.CAMERA_DEVICES == 'auto':
+        return discover_devices() or [settings.CAMERA_DEVICE]
+    return list(settings.CAMERA_DEVICES or [settings.CAMERA_DEVICE])
+
+class Camera:
+    """Одна камера: поток захвата (или fswebcam), своя очередь съемок и кэш снимков"""
+
+    def __init__(self, device, label, suffix=''):
+        self.device = device
+        self.label = label
+        self.suffix = suffix
+        # Постоянный поток захвата (создается в start, если бэкенд не 'fswebcam')
+        self.capture_worker = None
+        # Очередь съемок: ограничивает число одновременных захватов и считает время ожидания
+        self.capture_queue = CaptureQueue(settings.MAX_CONCURRENT_CAPTURES)
+        # Кэш снимков: одновременные /photo получают один и тот же снимок
+        self.photo_cache = SnapshotCache(self.capture_photo, ttl=settings.PHOTO_MAX_AGE)
+
+    def start(self):
+        if settings.CAMERA_BACKEND != 'fswebcam':
+            backend = create_backend(settings.CAMERA_BACKEND, self.device,
+                                     settings.CAMERA_RESOLUTION, settings.CAMERA_FPS,
+                                     settings.CAMERA_INPUT_FORMAT, settings.CAMERA_FAKE_PATH,
+                                     settings.CAMERA_COMMAND)
+            self.capture_worker = CaptureWorker(backend)
+            self.capture_worker.start()
+
+    def stop(self):
+        if self.capture_worker is not None:
+            self.capture_worker.stop()
+
+    @perf.timed('take_photo')
+    async def take_photo(self):
+        """Делает фото и возвращает JPEG-байты: готовый кадр из потока захвата или вывод fswebcam"""
+        if self.capture_worker is not None:
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, self.capture_worker.get_frame), None
+            except CameraError as e:
+                # Ошибка возвращается, а не выбрасывается: отмечаем ее в замере take_photo сами
+                perf.mark_error()
+                return None, f"Ошибка создания фото: {e}"
+
+        command = fswebcam_command(self.device, settings.CAMERA_RESOLUTION, settings.CAMERA_COMMAND)
+
+        try:
+            return await run_capture_command(command, timeout=settings.CAPTURE_TIMEOUT), None
+        except CameraError as e:
+            perf.mark_error()
+            return None, f"Ошибка создания фото: {e}"
+
+    async def capture_photo(self):
+        """Делает снимок в пуле потоков и возвращает его в памяти"""
+        loop = asyncio.get_running_loop()
+        data, error = await self.capture_queue.run(self.take_photo)
+        if error:
+            raise CameraError(error)
+        photo = Photo(data, time.time())
+        if settings.PHOTO_SAVE_DIR:
+            await loop.run_in_executor(None, save_photo, photo.data, photo.timestamp, self.suffix)
+        return photo
+
+    def stats_lines(self, prefix=''):
+        return [
+            f"{prefix}Кэш фото: {format_cache_stats(self.photo_cache.stats())}",
+            f"{prefix}Очередь съемок: {format_queue_stats(self.capture_queue.stats())}",
+        ]
+
+class Plugin(BotPlugin):
+    """Фото с камеры"""
+
+    name = 'camera'
+    commands = {'photo': 'photo', 'motion': 'motion', 'timelapse': 'timelapse_command'}
+    callbacks = {'photo_full': 'photo_full'}
+    help_lines = (
+        "/photo [all|N] - Фото с камеры (all — со всех камер одним альбомом)",
+        "/motion [on|off] - Присылать фото при движении в кадре",
+        "/timelapse [start|stop|get|clear] - Таймлапс: съемка по интервалу и ролик",
+    )
+    start_hint = "Используйте /photo для получения фото с камеры."
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        devices = camera_devices()
+        several = len(devices) > 1
+        self.cameras = [Camera(device, device_label(device) if several else device,
+                               f"_{os.path.basename(device)}" if several else '')
+                        for device in devices]
+        # Камера по умолчанию: /photo без аргументов, детектор движения и таймлапс
+        self.camera = self.cameras[0]
+        # Детектор движения (создается при включении) и чаты, где его включили командой
+        self.motion_watcher = None
+        self.motion_chats = set()
+        self.application = None
+        # Таймлапс (создается при первом /timelapse)
+        self.timelapse = None
+        # Превью: скорость загрузки, процесс пережатия и последние полные кадры для кнопки
+        self.upload_meter = UploadMeter()
+        self.preview_pool = PreviewPool()
+        self.full_photos = OrderedDict()
+        self._preview = None  # (снимок, задача пережатия) — одно превью на снимок
+
+    def help_section(self):
+        return (
+            "<b>Что делает /photo:</b>\n"
+            "• Берет кадр с USB-камеры (постоянный поток ffmpeg или fswebcam)\n"
+            + ("• Сначала отправляет превью под скорость канала, полный кадр — по кнопке\n"
+               if settings.PHOTO_PREVIEW else "• Отправляет фото в чат\n")
+            + (f"• /photo all — все камеры ({len(self.cameras)}) параллельно, одним альбомом\n"
+               if len(self.cameras) > 1 else "")
+            + f"• Разрешение: {settings.CAMERA_RESOLUTION}"
+            + (f"\n• Превью: до {settings.PREVIEW_MAX_SIDE} пикс., "
+               f"{settings.PREVIEW_MIN_BYTES // 1024}-{settings.PREVIEW_MAX_BYTES // 1024} КБ под скорость канала"
+               if settings.PHOTO_PREVIEW else "")
+        )
+
+    def footer_lines(self):
+        lines = []
+        for camera in self.cameras:
+            lines += camera.stats_lines(f"{camera.label}: " if len(self.cameras) > 1 else '')
+        return lines + [
+            f"Загрузок фото {upload_stats['uploads']}, по file_id {upload_stats['file_id_reused']}",
+            f"Превью: {format_upload_stats(self.upload_meter)}",
+        ] + self.motion_lines() + self.timelapse_lines()
+
+    def motion_lines(self):
+        if self.motion_watcher is None:
+            return []
+        from pi_monitor.motion import format_motion_stats
+        return [f"Детектор движения: {format_motion_stats(self.motion_watcher.stats())}"]
+
+    def timelapse_lines(self):
+        if self.timelapse is None:
+            return []
+        from pi_monitor.timelapse import format_timelapse_stats
+        return [f"Таймлапс: {format_timelapse_stats(self.timelapse.stats())}"]
+
+    async def start(self, application):
+        self.application = application
+        # Программа захвата ищется в PATH без запуска внешних команд
+        program = settings.CAMERA_COMMAND or settings.CAMERA_BACKEND
+        if settings.CAMERA_BACKEND in ('ffmpeg', 'fswebcam') and shutil.which(program) is None:
+            logger.warning(f"{program} not found, /photo will fail "
+                           f"(install: sudo apt-get install {settings.CAMERA_BACKEND})")
+        else:
+            for camera in self.cameras:
+                camera.start()
+            if len(self.cameras) > 1:
+                logger.info(f"Cameras: {', '.join(camera.device for camera in self.cameras)}")
+
+        if settings.MOTION_ENABLED:
+            try:
+                self.start_motion()
+            except Exception as e:
+                logger.error(f"Motion detector not started: {e}")
+
+    async def stop(self, application):
+        if self.timelapse is not None:
+            await self.timelapse.close()
+        await self.stop_motion()
+        for camera in self.cameras:
+            camera.stop()
+        await asyncio.get_running_loop().run_in_executor(None, self.preview_pool.shutdown)
+
+    def pick_camera(self, argument):
+        """Камера по номеру (с 1) или имени устройства; None — нет такой"""
+        if not argument:
+            return self.camera
+        if argument.isdigit() and 1 <= int(argument) <= len(self.cameras):
+            return self.cameras[int(argument) - 1]
+        for camera in self.cameras:
+            if argument in (camera.device, os.path.basename(camera.device)):
+                return camera
+        return None
+
+    async def photo(self, update, context):
+        """Обработчик команды /photo [all|N]"""
+        argument = context.args[0].lower() if context.args else ''
+        if argument == 'all':
+            await self.photo_all(update)
+            return
+        camera = self.pick_camera(argument)
+        if camera is None:
+            cameras = '\n'.join(f"{number}. {camera.label}" for number, camera in enumerate(self.cameras, 1))
+            await update.message.reply_text(f"❌ Нет такой камеры. Доступны:\n{cameras}\n/photo all — все сразу")
+            return
+
+        # Отправляем сообщение о начале создания фото
+        photo_message = await update.message.reply_text("📸 Создаю фото...")
+
+        try:
+            # Делаем фото (или берем свежий снимок, сделанный для другого запроса)
+            try:
+                with perf.measure('photo.capture'):
+                    snapshot = await camera.photo_cache.get()
+            except CameraError as error:
+                perf.mark_error()
+                await photo_message.edit_text(f"❌ {error}")
+                logger.error(f"Photo error: {error}")
+                return
+
+            # Отправляем фото (повторно — по file_id, без загрузки JPEG)
+            taken_at = datetime.fromtimestamp(snapshot.timestamp).strftime('%d.%m.%Y %H:%M:%S')
+            caption = f"📸 Фото с Raspberry Pi\n🕐 {taken_at}"
+            if len(self.cameras) > 1:
+                caption += f"\n📷 {camera.label}"
+            if settings.PHOTO_PREVIEW:
+                await self.send_preview(update.message, snapshot, caption)
+            else:
+                with perf.measure('telegram.send_photo'):
+                    await send_photo(update.message, snapshot, caption=caption,
+                                     on_upload=self.upload_meter.observe)
+
+            # Удаляем сообщение о создании фото
+            await photo_message.delete()
+
+        except Exception as e:
+            perf.mark_error()
+            error_message = f"❌ Ошибка при создании фото: {e}"
+            await photo_message.edit_text(error_message)
+            logger.error(f"Error taking photo: {e}")
+
+    async def capture_for_album(self, camera):
+        """Снимок одной камеры для альбома; ошибка или таймаут возвращаются вместо снимка"""
+        try:
+            # Съемка защищена shield в кэше: по таймауту перестаем ждать, но не обрываем ее
+            return await asyncio.wait_for(camera.photo_cache.get(), settings.CAMERA_ALBUM_TIMEOUT)
+        except asyncio.TimeoutError:
+            return CameraError(f"нет кадра за {settings.CAMERA_ALBUM_TIMEOUT} с")
+        except CameraError as e:
+            return e
+
+    async def photo_all(self, update):
+        """Снимает все камеры параллельно и отправляет одним альбомом"""
+        photo_message = await update.message.reply_text(f"📸 Снимаю камеры ({len(self.cameras)})...")
+        try:
+            # Общее время — как у самой медленной камеры, а не сумма
+            with perf.measure('photo.capture_all'):
+                results = await asyncio.gather(*(self.capture_for_album(camera) for camera in self.cameras))
+            taken = [(camera, result) for camera, result in zip(self.cameras, results)
+                     if isinstance(result, Photo)]
+            failed = [f"❌ {camera.label}: {result}" for camera, result in zip(self.cameras, results)
+                      if not isinstance(result, Photo)]
+            for line in failed:
+                logger.error(f"Photo error: {line}")
+            if failed:
+                perf.mark_error()
+            if not taken:
+                await photo_message.edit_text('\n'.join(["❌ Ни одна камера не прислала кадр"] + failed))
+                return
+
+            taken_at = datetime.fromtimestamp(min(photo.timestamp for _, photo in taken)).strftime(
+                '%d.%m.%Y %H:%M:%S')
+            header = '\n'.join([f"📸 Камеры Raspberry Pi: {len(taken)} из {len(self.cameras)}",
+                                 f"🕐 {taken_at}"] + failed)
+            items = [(photo, f"{header}\n📷 {camera.label}" if index == 0 else f"📷 {camera.label}")
+                     for index, (camera, photo) in enumerate(taken)]
+            with perf.measure('telegram.send_album'):
+                if len(items) == 1:
+                    # Альбом из одного фото Telegram не принимает
+                    await send_photo(update.message, items[0][0], caption=items[0][1])
+                else:
+                    await send_album(update.message, items)
+            await photo_message.delete()
+
+        except Exception as e:
+            perf.mark_error()
+            error_message = f"❌ Ошибка при создании фото: {e}"
+            await photo_message.edit_text(error_message)
+            logger.error(f"Error taking photos: {e}")
+
+    async def make_preview(self, snapshot):
+        """Пережимает снимок в процессе пула под текущую скорость загрузки"""
+        target = self.upload_meter.target_bytes(settings.PREVIEW_SECONDS, settings.PREVIEW_DEFAULT_BYTES,
+                                                settings.PREVIEW_MIN_BYTES, settings.PREVIEW_MAX_BYTES)
+        with perf.measure('photo.preview'):
+            data, side, quality = await self.preview_pool.fit(snapshot.data, target, settings.PREVIEW_MAX_SIDE)
+        logger.debug(f"Preview: {len(snapshot.data)} -> {len(data)} bytes (target {target}, "
+                     f"side {side}, quality {quality})")
+        return Photo(data, snapshot.timestamp)
+
+    async def get_preview(self, snapshot):
+        """Превью снимка; одновременные /photo с одним снимком ждут одно пережатие"""
+        if self._preview is None or self._preview[0] is not snapshot:
+            self._preview = (snapshot, asyncio.ensure_future(self.make_preview(snapshot)))
+        return await asyncio.shield(self._preview[1])
+
+    def keep_full(self, snapshot):
+        """Запоминает полный кадр для кнопки и возвращает его ключ"""
+        key = str(int(snapshot.timestamp * 1000))
+        self.full_photos[key] = snapshot
+        self.full_photos.move_to_end(key)
+        while len(self.full_photos) > settings.PHOTO_FULL_KEEP:
+            self.full_photos.popitem(last=False)
+        return key
+
+    async def send_preview(self, message, snapshot, caption):
+        """Отправляет превью с кнопкой полного кадра (без Pillow — сразу полный кадр)"""
+        from telegram import InlineKeyboardButton, InlineKeyboardMarkup
+        try:
+            preview = await self.get_preview(snapshot)
+        except Exception as e:
+            logger.warning(f"Preview failed, sending full photo: {e}")
+            preview = None
+        if preview is None or len(preview.data) >= len(snapshot.data):
+            # Превью не вышло меньше оригинала: отправляем сам снимок
+            with perf.measure('telegram.send_photo'):
+                await send_photo(message, snapshot, caption=caption, on_upload=self.upload_meter.observe)
+            return
+
+        key = self.keep_full(snapshot)
+        markup = InlineKeyboardMarkup([[InlineKeyboardButton(
+            f"🔍 Полное разрешение ({len(snapshot.data) // 1024} КБ)", callback_data=f"photo_full:{key}")]])
+        with perf.measure('telegram.send_preview'):
+            await send_photo(message, preview, caption=caption, reply_markup=markup,
+                             on_upload=self.upload_meter.observe)
+
+    async def photo_full(self, update, context):
+        """Обработчик кнопки «Полное разрешение» под превью"""
+        query = update.callback_query
+        snapshot = self.full_photos.get(query.data.split(':', 1)[1])
+        if snapshot is None:
+            await query.answer("Кадр уже не хранится, сделайте новый /photo", show_alert=True)
+            return
+        await query.answer("📤 Отправляю полный кадр...")
+        taken_at = datetime.fromtimestamp(snapshot.timestamp).strftime('%d.%m.%Y %H:%M:%S')
+        try:
+            with perf.measure('telegram.send_photo'):
+                await send_photo(query.message, snapshot, caption=f"📸 Полный кадр\n🕐 {taken_at}",
+                                 on_upload=self.upload_meter.observe)
+            # Кнопка больше не нужна
+            await query.edit_message_reply_markup(None)
+        except Exception as e:
+            perf.mark_error()
+            logger.error(f"Error sending full photo: {e}")
+
+    def start_motion(self):
+        """Запускает детектор движения в фоновом потоке"""
+        if self.motion_watcher is not None and self.motion_watcher.running:
+            return
+        from pi_monitor.motion import (MotionDetector, MotionWatcher, JpegFrames, RecordedFrames,
+                                       build_mask)
+        if settings.MOTION_RECORDING:
+            source = RecordedFrames(settings.MOTION_RECORDING, loop=True)
+        elif self.camera.capture_worker is not None:
+            # Кадры берутся из уже открытого потока: камера не открывается второй раз
+            source = JpegFrames(self.camera.capture_worker.get_frame, settings.MOTION_SIZE)
+        else:
+            raise CameraError("Для детектора движения нужен бэкенд камеры 'ffmpeg' или 'file'")
+        mask = build_mask(source.shape, settings.MOTION_REGIONS, settings.MOTION_IGNORE)
+        detector = MotionDetector(source.shape, mask, threshold=settings.MOTION_THRESHOLD,
+                                  min_area=settings.MOTION_MIN_AREA)
+        loop = asyncio.get_running_loop()
+
+        def on_motion(event):
+            # Вызывается из потока детектора: отправка идет в цикле событий бота
+            asyncio.run_coroutine_threadsafe(self.notify_motion(event), loop)
+
+        self.motion_watcher = MotionWatcher(source, detector, on_motion, fps=settings.MOTION_FPS,
+                                            cooldown=settings.MOTION_COOLDOWN)
+        self.motion_watcher.start()
+        logger.info(f"Motion detector started: {source.shape[1]}x{source.shape[0]} at {settings.MOTION_FPS} fps")
+
+    async def stop_motion(self):
+        """Останавливает детектор движения"""
+        if self.motion_watcher is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.motion_watcher.stop)
+
+    async def notify_motion(self, event):
+        """Рассылает полноразмерное фото с движением"""
+        if event.jpeg is not None:
+            # Кадр, на котором сработал детектор, уже в полном разрешении
+            snapshot = Photo(event.jpeg, event.timestamp)
+        else:
+            try:
+                snapshot = await self.camera.photo_cache.refresh()
+            except CameraError as e:
+                logger.error(f"Motion photo failed: {e}")
+                return
+        taken_at = datetime.fromtimestamp(event.timestamp).strftime('%d.%m.%Y %H:%M:%S')
+        caption = f"🚶 Движение в кадре ({event.area:.0%} области)\n🕐 {taken_at}"
+        chats = settings.MOTION_CHATS or sorted(self.motion_chats) or settings.ALLOWED_USERS
+        for chat_id in chats:
+            try:
+                await send_photo_to_chat(self.application.bot, chat_id, snapshot, caption=caption)
+            except Exception as e:
+                logger.error(f"Failed to send motion photo to {chat_id}: {e}")
+
+    async def motion(self, update, context):
+        """Обработчик команды /motion [on|off]"""
+        action = context.args[0].lower() if context.args else ''
+        if action == 'on':
+            try:
+                self.start_motion()
+            except ImportError:
+                await update.message.reply_text(
+                    "❌ Для детектора движения нужны NumPy и Pillow: "
+                    "sudo apt-get install python3-numpy python3-pil")
+                return
+            except (CameraError, ValueError, OSError) as e:
+                perf.mark_error()
+                await update.message.reply_text(f"❌ {e}")
+                return
+            self.motion_chats.add(update.effective_chat.id)
+            await update.message.reply_text(
+                f"🚶 Детектор движения включен: фото придет не чаще раза в {settings.MOTION_COOLDOWN} с.")
+        elif action == 'off':
+            await self.stop_motion()
+            self.motion_chats.clear()
+            await update.message.reply_text("⏹ Детектор движения выключен.")
+        else:
+            running = self.motion_watcher is not None and self.motion_watcher.running
+            lines = [f"🚶 Детектор движения {'включен' if running else 'выключен'} (/motion on|off)"]
+            if self.motion_watcher is not None and self.motion_watcher.last_event is not None:
+                last = datetime.fromtimestamp(self.motion_watcher.last_event.timestamp)
+                lines.append(f"Последнее движение: {last.strftime('%d.%m.%Y %H:%M:%S')}")
+            lines += self.motion_lines()
+            await update.message.reply_text('\n'.join(lines))
+
+    async def get_timelapse(self):
+        """Таймлапс поверх обычной съемки /photo (папка сканируется в пуле потоков)"""
+        if self.timelapse is None:
+            from pi_monitor.timelapse import Timelapse
+            loop = asyncio.get_running_loop()
+            self.timelapse = await loop.run_in_executor(None, functools.partial(
+                Timelapse, self.camera.photo_cache.refresh, settings.TIMELAPSE_DIR,
+                settings.TIMELAPSE_MAX_MB * 1024 * 1024, interval=settings.TIMELAPSE_INTERVAL,
+                fps=settings.TIMELAPSE_FPS, width=settings.TIMELAPSE_WIDTH, crf=settings.TIMELAPSE_CRF,
+                ffmpeg=settings.TIMELAPSE_FFMPEG, encode_timeout=settings.TIMELAPSE_ENCODE_TIMEOUT))
+        return self.timelapse
+
+    async def timelapse_command(self, update, context):
+        """Обработчик команды /timelapse [start|stop|get]"""
+        if not settings.TIMELAPSE_DIR:
+            await update.message.reply_text("ℹ️ Таймлапс выключен: задайте TIMELAPSE_DIR.")
+            return
+
+        from pi_monitor.timelapse import TimelapseError, format_timelapse_stats
+        timelapse = await self.get_timelapse()
+        action = context.args[0].lower() if context.args else ''
+        if action == 'start':
+            timelapse.start()
+            await update.message.reply_text(
+                f"🎞 Таймлапс запущен: кадр каждые {settings.TIMELAPSE_INTERVAL} с, "
+                f"на диске не больше {settings.TIMELAPSE_MAX_MB} МБ кадров.")
+        elif action == 'stop':
+            await timelapse.stop()
+            await update.message.reply_text(f"⏹ Таймлапс остановлен, кадров на диске: {len(timelapse.store)}.")
+        elif action == 'get':
+            await self.send_timelapse(update, timelapse, TimelapseError)
+        elif action == 'clear':
+            try:
+                await timelapse.clear()
+            except TimelapseError as e:
+                await update.message.reply_text(f"❌ {e}")
+                return
+            await update.message.reply_text("🗑 Кадры и ролик таймлапса удалены.")
+        else:
+            await update.message.reply_text(
+                f"🎞 Таймлапс: {format_timelapse_stats(timelapse.stats())}\n"
+                "/timelapse start|stop|get|clear")
+
+    async def send_timelapse(self, update, timelapse, error_type):
+        """Кодирует (если есть новые кадры) и отправляет ролик документом"""
+        from telegram import InputFile
+        frames = len(timelapse.store)
+        status_message = await update.message.reply_text(f"🎞 Готовлю ролик (кадров: {frames})...")
+        try:
+            with perf.measure('timelapse.encode'):
+                path = await timelapse.get_clip()
+        except error_type as e:
+            perf.mark_error()
+            await status_message.edit_text(f"❌ {e}")
+            return
+
+        size = os.path.getsize(path)
+        if size > MAX_DOCUMENT_BYTES:
+            perf.mark_error()
+            await status_message.edit_text(
+                f"❌ Ролик {size / 1024 / 1024:.0f} МБ больше лимита Telegram (50 МБ): "
+                "уменьшите TIMELAPSE_MAX_MB или TIMELAPSE_WIDTH.")
+            return
+
+        name = datetime.now().strftime('timelapse_%Y%m%d_%H%M.mp4')
+        caption = f"🎞 Таймлапс: кадров {frames}, {size / 1024 / 1024:.1f} МБ"
+        try:
+            # Файл читается по частям во время загрузки, а не целиком в память
+            with open(path, 'rb') as clip, perf.measure('telegram.send_document'):
+                await update.message.reply_document(InputFile(clip, filename=name, read_file_handle=False),
+                                                    caption=caption)
+            await status_message.delete()
+        except Exception as e:
+            perf.mark_error()
+            await status_message.edit_text(f"❌ Ошибка при отправке ролика: {e}")
+            logger.error(f"Error sending timelapse: {e}")
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+Плагин status: /status, /history, /graph, /alerts и фоновый сбор метрик
+Оповещения, база метрик, графики, экспорт для Prometheus и флот импортируются,
+только когда они включены в настройках или впервые нужны команде
+"""
+
+import asyncio
+import functools
+import logging
+import time
+from datetime import datetime
+
+from pi_monitor import perf
+from pi_monitor.bot import settings
+from pi_monitor.bot.plugins import BotPlugin
+from pi_monitor.cache import SnapshotCache, format_cache_stats
+from pi_monitor.history import StatusSampler, HISTORY_REPORT_FIELDS, format_history_message
+from pi_monitor.status import get_system_status_async, format_status_message, THRESHOLDS
+
+logger = logging.getLogger(__name__)
+
+class Plugin(BotPlugin):
+    """Статус системы и история метрик"""
+
+    name = 'status'
+    commands = {
+        'status': 'status',
+        'history': 'history',
+        'graph': 'graph',
+        'alerts': 'alerts',
+        'watch': 'watch',
+    }
+    help_lines = (
+        "/status - Показать статус системы",
+        "/status all - Сводка по всем Pi флота",
+        "/history [мин] - Статистика метрик за период",
+        "/graph [метрика] [окно] - График (temperature, load, cpu, memory, disk)",
+        "/alerts - Правила и активные оповещения",
+        "/watch [stop] - Живая панель статуса (одно сообщение обновляется на месте)",
+    )
+    start_hint = "Используйте /status для получения информации о температуре, загрузке CPU и памяти."
+
+    def __init__(self, bot):
+        super().__init__(bot)
+        # Кэш снимков статуса: одновременные /status ждут один и тот же сбор
+        self.status_cache = SnapshotCache(get_system_status_async, ttl=settings.STATUS_CACHE_TTL)
+        # Фоновый сборщик метрик с кольцевыми буферами фиксированного размера
+        self.sampler = StatusSampler(interval=settings.SAMPLE_INTERVAL,
+                                     history_seconds=settings.HISTORY_HOURS * 3600,
+                                     collect=self.status_cache.refresh)
+        self.fast_sampler = None
+        self.alert_engine = None
+        self.metric_store = None
+        self.graph_renderer = None
+        self.metrics_server = None
+        self.fleet = None
+        self.agent_server = None
+        self.watch_ticker = None
+
+    def help_section(self):
+        return (
+            "<b>Что показывает /status:</b>\n"
+            "• Температура CPU\n"
+            "• Загрузка процессора (1, 5, 15 минут)\n"
+            "• Использование CPU по ядрам (user/sys/iowait/irq/steal)\n"
+            "• Использование памяти\n"
+            "• Свободное место на диске\n"
+            "• Время работы системы\n"
+            f"<i>Метрики собираются в фоне каждые {settings.SAMPLE_INTERVAL} с.</i>"
+        )
+
+    def footer_lines(self):
+        lines = [f"Кэш статуса: {format_cache_stats(self.status_cache.stats())}"]
+        if self.watch_ticker is not None:
+            from pi_monitor.watch import format_watch_stats
+            lines.append(f"Панели /watch: {format_watch_stats(self.watch_ticker.stats())}")
+        return lines
+
+    async def start(self, application):
+        loop = asyncio.get_running_loop()
+        if settings.ALERTS_ENABLED and not (settings.ALERT_CHATS or settings.ALLOWED_USERS):
+            # Иначе тревоги считались бы и молча никуда не отправлялись
+            logger.warning("Alerts disabled: no recipients (set ALERT_CHATS or ALLOWED_USERS)")
+        elif settings.ALERTS_ENABLED:
+            from pi_monitor.alerts import AlertEngine, default_rules
+            from pi_monitor.facts import get_static_facts
+            self.alert_engine = AlertEngine(default_rules(THRESHOLDS, get_static_facts().cpu_count))
+            self.sampler.add_listener(functools.partial(self.send_alerts, application))
+
+        if settings.METRICS_DB_PATH:
+            from pi_monitor.store import MetricStore
+            self.metric_store = await loop.run_in_executor(None, MetricStore, settings.METRICS_DB_PATH)
+            # Восстанавливаем историю в памяти после перезапуска
+            recent = await loop.run_in_executor(None, self.metric_store.recent_samples,
+                                                settings.HISTORY_HOURS * 3600)
+            for timestamp, values in recent:
+                self.sampler.history.record(timestamp, values)
+            self.sampler.add_listener(self.metric_store.record_status)
+        self.sampler.start()
+
+        if settings.FAST_SAMPLE_INTERVAL:
+            # Высокочастотный сборщик: /history за последние минуты берется из него
+            from pi_monitor.fastread import FastSampler
+            self.fast_sampler = FastSampler(settings.FAST_SAMPLE_INTERVAL,
+                                            settings.FAST_HISTORY_MINUTES * 60)
+            self.fast_sampler.start()
+
+        if settings.METRICS_EXPORTER_PORT:
+            # Экспорт метрик для Prometheus: отвечает из того же кэша, что и /status
+            from pi_monitor.exporter import MetricsServer
+            self.metrics_server = MetricsServer(self.status_cache, settings.METRICS_EXPORTER_HOST,
+                                                settings.METRICS_EXPORTER_PORT)
+            await self.metrics_server.start()
+
+        if settings.FLEET_AGENTS or settings.AGENT_PORT:
+            from pi_monitor.fleet import AgentServer, Fleet
+            if settings.FLEET_AGENTS:
+                # Агенты других Pi (соединения держатся открытыми между опросами)
+                self.fleet = Fleet(settings.FLEET_AGENTS, settings.FLEET_TIMEOUT)
+            if settings.AGENT_PORT:
+                # Агент этой Pi для бота, который собирает флот
+                self.agent_server = AgentServer(self.status_cache, settings.AGENT_HOST, settings.AGENT_PORT)
+                await self.agent_server.start()
+
+    async def stop(self, application):
+        if self.watch_ticker is not None:
+            await self.watch_ticker.stop()
+        await self.sampler.stop()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        if self.agent_server is not None:
+            await self.agent_server.stop()
+        if self.fleet is not None:
+            self.fleet.close()
+        if self.fast_sampler is not None:
+            await self.fast_sampler.stop()
+        if self.metric_store is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.metric_store.close)
+
+    async def send_alerts(self, application, status):
+        """Проверяет правила по замеру и рассылает оповещения"""
+        from pi_monitor.alerts import format_alert_message
+        events = self.alert_engine.evaluate(status['values'], status['timestamp'])
+        chats = settings.ALERT_CHATS or settings.ALLOWED_USERS
+        for event in events:
+            text = format_alert_message(event)
+            logger.warning(f"Alert '{event.rule.name}' {'fired' if event.firing else 'resolved'}: {event.value}")
+            for chat_id in chats:
+                try:
+                    await application.bot.send_message(chat_id, text, parse_mode='HTML')
+                except Exception as e:
+                    logger.error(f"Failed to send alert to {chat_id}: {e}")
+
+    async def status(self, update, context):
+        """Обработчик команды /status"""
+        if context.args and context.args[0].lower() == 'all':
+            await self.fleet_status(update)
+            return
+
+        # Отправляем сообщение о начале получения данных
+        with perf.measure('telegram.reply_text'):
+            status_message = await update.message.reply_text("📊 Получаю данные о системе...")
+
+        try:
+            # Фоновый сборщик обновляет кэш, поэтому обычно снимок уже готов
+            with perf.measure('status.collect'):
+                system_status = await self.status_cache.get()
+
+            # Форматируем сообщение
+            formatted_message = format_status_message(system_status)
+
+            # Обновляем сообщение
+            with perf.measure('telegram.edit_text'):
+                await status_message.edit_text(formatted_message, parse_mode='HTML')
+
+        except Exception as e:
+            # Обработчик сам отвечает об ошибке: без отметки /perf ее бы не увидел
+            perf.mark_error()
+            error_message = f"❌ Ошибка при получении статуса: {e}"
+            await status_message.edit_text(error_message)
+            logger.error(f"Error getting status: {e}")
+
+    async def fleet_status(self, update):
+        """Сводка по всем Pi флота для /status all"""
+        if self.fleet is None:
+            await update.message.reply_text("ℹ️ Флот не настроен: добавьте агентов в FLEET_AGENTS.")
+            return
+
+        from pi_monitor.fleet import local_host, format_fleet_summary
+        started = time.monotonic()
+        # Эта Pi берется из кэша, остальные опрашиваются параллельно, каждая со своим таймаутом
+        with perf.measure('fleet.poll'):
+            local, hosts = await asyncio.gather(self.status_cache.get(), self.fleet.poll())
+        message = format_fleet_summary([local_host(local)] + hosts, THRESHOLDS, time.monotonic() - started)
+        await update.message.reply_text(message, parse_mode='HTML')
+
+    async def history(self, update, context):
+        """Обработчик команды /history [минуты]"""
+        minutes = settings.HISTORY_DEFAULT_MINUTES
+        if context.args:
+            try:
+                minutes = int(context.args[0])
+                if minutes <= 0:
+                    raise ValueError
+            except ValueError:
+                await update.message.reply_text("❌ Укажите число минут, например: /history 30")
+                return
+
+        source = self.sampler.history
+        if self.fast_sampler is not None and minutes <= settings.FAST_HISTORY_MINUTES:
+            source = self.fast_sampler.history
+        summary = source.summary(minutes * 60, HISTORY_REPORT_FIELDS)
+        message = format_history_message(summary, minutes)
+        # Статистика кэшей и очередей всех включенных плагинов
+        for line in self.bot.footer_lines():
+            message += f"\n<i>{line}</i>"
+        await update.message.reply_text(message, parse_mode='HTML')
+
+    def get_graph_renderer(self):
+        """Графики с кэшем готовых PNG; NumPy и matplotlib загружаются при первом /graph"""
+        if self.graph_renderer is None:
+            from pi_monitor.graph import GraphRenderer
+            self.graph_renderer = GraphRenderer(self.sampler.history, store=self.metric_store,
+                                                points=settings.GRAPH_POINTS)
+        return self.graph_renderer
+
+    async def graph(self, update, context):
+        """Обработчик команды /graph [метрика] [окно]"""
+        from pi_monitor.graph import GraphError, GRAPH_METRICS, parse_window, format_window
+        metric = context.args[0].lower() if context.args else 'temperature'
+        try:
+            window = (parse_window(context.args[1]) if len(context.args) > 1
+                      else settings.GRAPH_DEFAULT_WINDOW)
+        except ValueError:
+            window = None
+        if metric not in GRAPH_METRICS or window is None:
+            await update.message.reply_text(
+                "❌ Использование: /graph [метрика] [окно]\n"
+                f"Метрики: {', '.join(GRAPH_METRICS)}\n"
+                "Окно: 30m, 6h, 7d"
+            )
+            return
+
+        graph_message = await update.message.reply_text("📈 Строю график...")
+
+        try:
+            png = await self.get_graph_renderer().get(metric, window)
+            await update.message.reply_photo(png, caption=f"📈 {GRAPH_METRICS[metric][1]} за {format_window(window)}")
+            await graph_message.delete()
+        except GraphError as e:
+            await graph_message.edit_text(f"❌ {e}")
+        except Exception as e:
+            perf.mark_error()
+            await graph_message.edit_text(f"❌ Ошибка при построении графика: {e}")
+            logger.error(f"Error rendering graph: {e}")
+
+    async def alerts(self, update, context):
+        """Обработчик команды /alerts"""
+        if self.alert_engine is None:
+            await update.message.reply_text(
+                "ℹ️ Оповещения отключены." if not settings.ALERTS_ENABLED else
+                "ℹ️ Оповещения отключены: некому отправлять, задайте ALERT_CHATS или ALLOWED_USERS.")
+            return
+
+        from pi_monitor.alerts import format_alerts_overview
+        await update.message.reply_text(format_alerts_overview(self.alert_engine), parse_mode='HTML')
+
+    def watch_footer(self, status):
+        """Подпись панели /watch: меняется каждый такт, поэтому не участвует в сравнении"""
+        updated = datetime.fromtimestamp(status['timestamp']).strftime('%H:%M:%S')
+        return f"👁 <i>Обновлено: {updated} · каждые {settings.WATCH_INTERVAL} с · /watch stop</i>"
+
+    async def collect_for_watch(self):
+        """Снимок для такта /watch: свежий снимок фонового сборщика используется повторно"""
+        return await self.status_cache.get(max_age=settings.WATCH_INTERVAL)
+
+    def get_watch_ticker(self):
+        """Общий тикер панелей (создается при первом /watch)"""
+        if self.watch_ticker is None:
+            from pi_monitor.watch import WatchTicker
+            self.watch_ticker = WatchTicker(
+                self.collect_for_watch,
+                functools.partial(format_status_message, show_updated=False),
+                self.watch_footer,
+                interval=settings.WATCH_INTERVAL,
+                duration=settings.WATCH_MINUTES * 60,
+                chat_rate=settings.WATCH_CHAT_RATE,
+                global_rate=settings.WATCH_GLOBAL_RATE,
+                global_burst=settings.WATCH_GLOBAL_RATE,
+            )
+        return self.watch_ticker
+
+    async def watch(self, update, context):
+        """Обработчик команды /watch [stop]"""
+        ticker = self.get_watch_ticker()
+        chat_id = update.effective_chat.id
+
+        if context.args and context.args[0].lower() == 'stop':
+            if ticker.unsubscribe(chat_id) is None:
+                await update.message.reply_text("ℹ️ Наблюдение не запущено.")
+            else:
+                await update.message.reply_text("⏹ Наблюдение остановлено.")
+            return
+
+        # Первое сообщение отправляется сразу, дальше его правит общий тикер
+        status = await self.collect_for_watch()
+        body = format_status_message(status, show_updated=False)
+        message = await update.message.reply_text(body + self.watch_footer(status), parse_mode='HTML')
+        ticker.subscribe(chat_id, message, body)
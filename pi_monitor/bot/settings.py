@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+Настройки бота и их значения по умолчанию
+Скрипт запуска меняет нужные через configure() до сборки приложения,
+плагины читают их как settings.ИМЯ в момент использования
+"""
+
+# Доступ
+ALLOWED_USERS = []  # Список разрешенных пользователей (ID из Telegram)
+ADMIN_USERS = []  # Кому доступна /perf (если пусто — всем из ALLOWED_USERS)
+
+# Получение обновлений: 'polling' (постоянный запрос к Telegram) или 'webhook' (Telegram присылает сам)
+UPDATE_MODE = 'polling'
+WEBHOOK_URL = None  # Публичный адрес для webhook, например 'https://pi.example.com:8443/bot'
+WEBHOOK_LISTEN = '0.0.0.0'  # Адрес встроенного сервера
+WEBHOOK_PORT = 8443  # Порт встроенного сервера (Telegram принимает 443, 80, 88 и 8443)
+WEBHOOK_CERT = None  # Сертификат и ключ для HTTPS без прокси (None — HTTP за nginx и т.п.)
+WEBHOOK_KEY = None
+WEBHOOK_SECRET = None  # Секрет заголовка от Telegram (None — случайный при каждом запуске)
+CONCURRENT_UPDATES = 8  # Сколько обновлений обрабатывается одновременно
+
+# Плагин status
+SAMPLE_INTERVAL = 10  # Интервал фонового сбора метрик (секунды)
+HISTORY_HOURS = 24  # Сколько часов истории хранить в памяти
+HISTORY_DEFAULT_MINUTES = 60  # Окно /history по умолчанию (минуты)
+# Высокочастотный сбор через постоянно открытые файлы /proc и /sys (None — выключен, 0.1 — 10 Гц)
+FAST_SAMPLE_INTERVAL = None
+FAST_HISTORY_MINUTES = 10  # Сколько минут высокочастотной истории хранить в памяти
+STATUS_CACHE_TTL = 15  # Сколько секунд снимок статуса считается свежим
+# Живая панель /watch: одно сообщение на чат правится на месте
+WATCH_INTERVAL = 5  # Интервал обновления (секунды), один сбор на всех наблюдателей
+WATCH_MINUTES = 60  # Через сколько минут наблюдение завершается само
+WATCH_CHAT_RATE = 20 / 60  # Правок в секунду на чат (Telegram: до 20 сообщений в минуту в группе)
+WATCH_GLOBAL_RATE = 25  # Правок в секунду на всего бота (Telegram: около 30)
+ALERTS_ENABLED = True  # Оповещения о превышении порогов
+ALERT_CHATS = []  # ID чатов для оповещений (если пусто — всем из ALLOWED_USERS; оба пусты — оповещения выключены)
+THRESHOLDS = {}  # Свои пороги, например {'temperature_critical': 75}
+# База метрик на диске (None — не сохранять); запись идет пачками раз в минуту
+METRICS_DB_PATH = None
+GRAPH_DEFAULT_WINDOW = 3600  # Окно /graph по умолчанию (секунды)
+GRAPH_POINTS = 200  # Сколько точек рисовать независимо от длины истории
+# Эндпоинт /metrics для Prometheus (None — выключен, например 9101)
+METRICS_EXPORTER_PORT = None
+METRICS_EXPORTER_HOST = '127.0.0.1'  # '0.0.0.0' — доступен из сети
+# Флот: другие Pi с агентом (python3 -m pi_monitor.fleet agent), /status all опрашивает их все
+FLEET_AGENTS = []  # Например: [('kitchen', '192.168.1.20', 9102)]
+FLEET_TIMEOUT = 3  # Таймаут опроса одного агента (секунды)
+AGENT_PORT = None  # Отдавать статус этой Pi другому боту (например, 9102)
+AGENT_HOST = '127.0.0.1'  # Адрес агента; для флота — адрес Pi в локальной сети (авторизации нет)
+
+# Плагин camera
+# 'ffmpeg' — постоянный поток: устройство открыто и прогрето, фото отдается сразу
+# 'file' — поддельная камера из JPEG-файлов (CAMERA_FAKE_PATH), для проверки без камеры
+# 'fswebcam' — отдельный запуск fswebcam на каждое фото (как раньше)
+CAMERA_BACKEND = 'ffmpeg'
+CAMERA_DEVICE = '/dev/video0'
+# Несколько камер: None — только CAMERA_DEVICE, 'auto' — USB-камеры и CSI-камера старого стека
+# (bcm2835-v4l2) из /dev/video*; CSI-камера под libcamera (unicam) не находится.
+# Или список устройств ['/dev/video0', '/dev/video2']; первая — камера по умолчанию
+CAMERA_DEVICES = None
+CAMERA_ALBUM_TIMEOUT = 10  # /photo all: сколько ждать каждую камеру; опоздавшие пропускаются
+CAMERA_RESOLUTION = '1280x720'
+CAMERA_FPS = 5  # Частота кадров постоянного потока
+CAMERA_INPUT_FORMAT = 'mjpeg'  # Формат кадров с камеры ('mjpeg' копируется без перекодирования)
+CAMERA_FAKE_PATH = None  # Папка или файл с JPEG для бэкенда 'file'
+CAMERA_COMMAND = None  # Своя программа вместо ffmpeg/fswebcam (например, поддельная камера для проверки)
+PHOTO_MAX_AGE = 3  # Сколько секунд снимок отдается повторно без новой съемки
+PHOTO_SAVE_DIR = None  # Папка для сохранения снимков на диск (None — только в памяти)
+CAPTURE_TIMEOUT = 30  # Таймаут одной съемки (секунды), после него процесс убивается
+MAX_CONCURRENT_CAPTURES = 1  # Сколько съемок может идти одновременно
+# Превью /photo: сначала маленький JPEG под скорость канала, полный кадр — по кнопке (нужен Pillow)
+PHOTO_PREVIEW = True  # False — сразу отправлять полный кадр
+PREVIEW_SECONDS = 1.0  # За сколько секунд превью должно загрузиться при измеренной скорости
+PREVIEW_DEFAULT_BYTES = 30 * 1024  # Размер превью, пока скорость еще не измерена
+PREVIEW_MIN_BYTES = 8 * 1024
+PREVIEW_MAX_BYTES = 150 * 1024
+PREVIEW_MAX_SIDE = 640  # Наибольшая сторона превью в пикселях
+PHOTO_FULL_KEEP = 10  # Сколько последних полных кадров хранить для кнопки
+# Детектор движения (нужны NumPy и Pillow; работает поверх потока 'ffmpeg' или 'file')
+MOTION_ENABLED = False  # Включать при запуске (иначе — командой /motion on)
+MOTION_FPS = 4  # Сколько кадров в секунду проверять
+MOTION_SIZE = (160, 90)  # Размер кадра детектора; лучше 1/8 от CAMERA_RESOLUTION — так дешевле всего
+MOTION_THRESHOLD = 25  # На сколько (0-255) пиксель должен отличаться от фона
+MOTION_MIN_AREA = 0.01  # Доля изменившихся пикселей области, после которой это движение
+MOTION_REGIONS = []  # Где искать движение, доли кадра: [(x0, y0, x1, y1)] (пусто — весь кадр)
+MOTION_IGNORE = []  # Что исключить (деревья, дорога, часы), в тех же долях кадра
+MOTION_COOLDOWN = 60  # Не чаще одного оповещения за столько секунд
+MOTION_CHATS = []  # ID чатов для фото с движением (если пусто — всем из ALLOWED_USERS)
+MOTION_RECORDING = None  # Файл .npy с записанными кадрами вместо камеры (для проверки)
+# Таймлапс: кадры на диске, ролик кодирует отдельный процесс ffmpeg
+TIMELAPSE_DIR = None  # Папка для кадров и ролика (None — /timelapse выключен)
+TIMELAPSE_INTERVAL = 10  # Интервал между кадрами (секунды)
+TIMELAPSE_MAX_MB = 500  # Бюджет кадров на диске; при превышении удаляются самые старые
+TIMELAPSE_FPS = 24  # Кадров в секунду в ролике
+TIMELAPSE_WIDTH = 1280  # Ширина ролика (меньше — быстрее кодирование и меньше файл)
+TIMELAPSE_CRF = 28  # Качество H.264: больше — меньше файл
+TIMELAPSE_FFMPEG = 'ffmpeg'  # Программа кодирования
+TIMELAPSE_ENCODE_TIMEOUT = 1800  # Предел времени кодирования (секунды): полный бюджет на Pi кодируется долго
+
+def configure(**overrides):
+    """Заменяет значения по умолчанию; опечатка в имени настройки — ошибка, а не тихое игнорирование"""
+    module = globals()
+    for name, value in overrides.items():
+        if not name.isupper() or name not in module:
+            raise ValueError(f"Неизвестная настройка: {name}")
+        module[name] = value
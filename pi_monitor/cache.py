@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Кэш снимков статуса системы
+Свежий снимок отдается повторно в течение окна ttl, а параллельные
+запросы во время сбора ждут тот же самый сбор, а не запускают свой
+"""
+
+import asyncio
+import time
+
+class SnapshotCache:
+    """TTL-кэш с объединением одновременных запросов"""
+
+    def __init__(self, collect, ttl=5.0):
+        self._collect = collect
+        self.ttl = ttl
+        self._snapshot = None
+        self._snapshot_time = 0.0
+        self._inflight = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    @property
+    def snapshot(self):
+        """Последний снимок (может быть устаревшим) или None"""
+        return self._snapshot
+
+    def age(self):
+        """Возраст последнего снимка в секундах или None"""
+        if self._snapshot is None:
+            return None
+        return time.monotonic() - self._snapshot_time
+
+    async def get(self, max_age=None):
+        """Возвращает свежий снимок, при необходимости собирая новый (max_age — свое окно свежести)"""
+        age = self.age()
+        if age is not None and age < (self.ttl if max_age is None else max_age):
+            self.hits += 1
+            return self._snapshot
+        return await self.refresh()
+
+    async def refresh(self):
+        """Собирает новый снимок, присоединяясь к уже идущему сбору"""
+        if self._inflight is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            self._inflight = asyncio.get_running_loop().create_task(self._do_collect())
+        # shield: отмена одного ожидающего не прерывает общий сбор
+        return await asyncio.shield(self._inflight)
+
+    async def _do_collect(self):
+        try:
+            snapshot = await self._collect()
+            self._snapshot = snapshot
+            self._snapshot_time = time.monotonic()
+            return snapshot
+        finally:
+            self._inflight = None
+
+    def stats(self):
+        """Счетчики попаданий, промахов и объединенных запросов"""
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced}
+
+def format_cache_stats(stats):
+    """Форматирует счетчики кэша одной строкой"""
+    total = stats['hits'] + stats['misses'] + stats['coalesced']
+    saved = stats['hits'] + stats['coalesced']
+    percent = (saved / total) * 100 if total else 0.0
+    return (f"попаданий {stats['hits']}, промахов {stats['misses']}, "
+            f"объединено {stats['coalesced']} (сэкономлено {percent:.0f}% сборов)")
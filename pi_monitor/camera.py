@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+"""
+Постоянный поток захвата с камеры
+Устройство открывается один раз и остается «прогретым»: фоновый поток
+непрерывно читает кадры, а по запросу отдается последний готовый кадр
+"""
+
+import asyncio
+import glob
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+JPEG_SOI = b'\xff\xd8'
+JPEG_EOI = b'\xff\xd9'
+
+class CameraError(Exception):
+    """Ошибка камеры или бэкенда захвата"""
+
+class CameraBackend:
+    """Базовый бэкенд: открывает устройство и отдает JPEG-кадры по одному"""
+
+    name = 'base'
+
+    def open(self):
+        """Открывает устройство"""
+
+    def read_frame(self):
+        """Блокирующе читает следующий кадр и возвращает JPEG-байты"""
+        raise NotImplementedError
+
+    def close(self):
+        """Закрывает устройство"""
+
+class MjpegStreamParser:
+    """Разбирает непрерывный поток склеенных JPEG-кадров по маркерам SOI/EOI"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def feed(self, data):
+        """Добавляет данные и возвращает список полностью полученных кадров"""
+        self._buffer += data
+        frames = []
+        while True:
+            start = self._buffer.find(JPEG_SOI)
+            if start < 0:
+                # Последний байт может оказаться началом маркера
+                del self._buffer[:-1]
+                break
+            end = self._buffer.find(JPEG_EOI, start + 2)
+            if end < 0:
+                if start:
+                    del self._buffer[:start]
+                break
+            # Одно копирование: срез memoryview не создает промежуточный bytearray
+            with memoryview(self._buffer) as view:
+                frames.append(bytes(view[start:end + 2]))
+            del self._buffer[:end + 2]
+        return frames
+
+class FfmpegStreamBackend(CameraBackend):
+    """Долгоживущий ffmpeg, который держит V4L2-устройство открытым и пишет MJPEG в stdout"""
+
+    name = 'ffmpeg'
+
+    def __init__(self, device='/dev/video0', resolution='1280x720', fps=5,
+                 input_format='mjpeg', quality=5, command='ffmpeg'):
+        self.device = device
+        self.resolution = resolution
+        self.fps = fps
+        self.input_format = input_format
+        self.quality = quality
+        self.command = command
+        self._process = None
+        self._parser = None
+        self._frames = []
+        # Последние строки stderr ffmpeg (для сообщения об ошибке)
+        self._stderr_tail = deque(maxlen=20)
+        self._stderr_thread = None
+
+    def build_command(self):
+        """Командная строка ffmpeg"""
+        command = [
+            self.command, '-hide_banner', '-loglevel', 'error',
+            '-f', 'v4l2', '-input_format', self.input_format,
+            '-framerate', str(self.fps), '-video_size', self.resolution,
+            '-i', self.device,
+        ]
+        if self.input_format == 'mjpeg':
+            # Камера уже отдает JPEG: копируем кадры без перекодирования
+            command += ['-c:v', 'copy']
+        else:
+            command += ['-c:v', 'mjpeg', '-q:v', str(self.quality)]
+        return command + ['-f', 'image2pipe', '-']
+
+    def open(self):
+        try:
+            self._process = subprocess.Popen(
+                self.build_command(), stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0,
+            )
+        except OSError as e:
+            raise CameraError(f"Не удалось запустить {self.command}: {e}")
+        self._parser = MjpegStreamParser()
+        self._frames = []
+        # stderr читается постоянно: иначе после ~64 КБ предупреждений ffmpeg
+        # заблокируется на записи и поток кадров молча остановится
+        self._stderr_tail.clear()
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, args=(self._process.stderr,),
+                                               name='camera-ffmpeg-stderr', daemon=True)
+        self._stderr_thread.start()
+
+    def _drain_stderr(self, stream):
+        for line in iter(stream.readline, b''):
+            line = line.decode(errors='replace').strip()
+            if line:
+                self._stderr_tail.append(line)
+                logger.debug(f"ffmpeg: {line}")
+
+    def read_frame(self):
+        # stop() закрывает бэкенд из другого потока и обнуляет self._process посреди чтения
+        process = self._process
+        if process is None:
+            raise CameraError("Поток камеры закрыт")
+        while not self._frames:
+            try:
+                chunk = process.stdout.read(65536)
+            except ValueError:
+                # Канал уже закрыт в close()
+                raise CameraError("Поток камеры закрыт")
+            if not chunk:
+                if self._stderr_thread is not None:
+                    # Дочитываем stderr завершившегося ffmpeg
+                    self._stderr_thread.join(timeout=1)
+                stderr = '\n'.join(list(self._stderr_tail)[-3:])
+                raise CameraError(f"Поток камеры завершился: {stderr or 'нет данных'}")
+            self._frames.extend(self._parser.feed(chunk))
+        return self._frames.pop(0)
+
+    def close(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        process.kill()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            pass
+        if self._stderr_thread is not None:
+            # После kill ffmpeg stderr закрывается, и поток чтения завершается сам
+            self._stderr_thread.join(timeout=1)
+            self._stderr_thread = None
+        for stream in (process.stdout, process.stderr):
+            if stream:
+                stream.close()
+
+class FileBackend(CameraBackend):
+    """Поддельная камера: по кругу отдает JPEG-файлы из папки (или один файл)"""
+
+    name = 'file'
+
+    def __init__(self, path, fps=5):
+        self.path = path
+        self.fps = fps
+        self._files = []
+        self._index = 0
+        self._next_frame_time = 0.0
+
+    def open(self):
+        if os.path.isdir(self.path):
+            self._files = sorted(glob.glob(os.path.join(self.path, '*.jpg')) +
+                                 glob.glob(os.path.join(self.path, '*.jpeg')))
+        elif os.path.isfile(self.path):
+            self._files = [self.path]
+        else:
+            self._files = []
+        if not self._files:
+            raise CameraError(f"Нет JPEG-файлов для поддельной камеры: {self.path}")
+        self._index = 0
+        self._next_frame_time = time.monotonic()
+
+    def read_frame(self):
+        # Имитируем частоту кадров настоящей камеры
+        delay = self._next_frame_time - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame_time = max(self._next_frame_time, time.monotonic()) + 1.0 / self.fps
+        path = self._files[self._index]
+        self._index = (self._index + 1) % len(self._files)
+        with open(path, 'rb') as f:
+            return f.read()
+
+class CaptureWorker:
+    """Фоновый поток, который держит камеру открытой и хранит последний кадр"""
+
+    def __init__(self, backend, warmup_frames=3, max_frame_age=1.0, restart_delay=5.0):
+        self.backend = backend
+        self.warmup_frames = warmup_frames
+        self.max_frame_age = max_frame_age
+        self.restart_delay = restart_delay
+        self.last_error = None
+        self._frame = None
+        self._frame_time = 0.0
+        self._frame_seq = 0
+        self._condition = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Запускает поток захвата"""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=f'camera-{self.backend.name}', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Останавливает поток и закрывает устройство"""
+        self._stop.set()
+        # Закрытие бэкенда прерывает блокирующее чтение кадра
+        self.backend.close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.backend.open()
+                for _ in range(self.warmup_frames):
+                    self.backend.read_frame()
+                logger.info(f"Camera backend '{self.backend.name}' is streaming")
+                while not self._stop.is_set():
+                    frame = self.backend.read_frame()
+                    with self._condition:
+                        self._frame = frame
+                        self._frame_time = time.monotonic()
+                        self._frame_seq += 1
+                        self.last_error = None
+                        self._condition.notify_all()
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.last_error = str(e)
+                logger.error(f"Camera backend '{self.backend.name}' failed: {e}")
+            finally:
+                self.backend.close()
+            self._stop.wait(self.restart_delay)
+
+    def get_frame(self, timeout=5.0):
+        """Возвращает свежий кадр (JPEG-байты); ждет новый, если последний устарел"""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                if self._frame is not None and now - self._frame_time <= self.max_frame_age:
+                    return self._frame
+                remaining = deadline - now
+                if remaining <= 0 or self._stop.is_set():
+                    raise CameraError(self.last_error or "Камера не прислала кадр вовремя")
+                self._condition.wait(remaining)
+
+def create_backend(kind, device='/dev/video0', resolution='1280x720', fps=5,
+                   input_format='mjpeg', fake_path=None, command=None):
+    """Создает бэкенд камеры по имени из конфигурации"""
+    if kind == 'ffmpeg':
+        return FfmpegStreamBackend(device, resolution, fps, input_format, command=command or 'ffmpeg')
+    if kind == 'file':
+        return FileBackend(fake_path, fps)
+    raise ValueError(f"Неизвестный бэкенд камеры: {kind}")
+
+def _device_number(path):
+    digits = ''.join(ch for ch in os.path.basename(path) if ch.isdigit())
+    return int(digits) if digits else -1
+
+# Драйверы, узлы которых отдают готовые кадры: USB-камеры и CSI-камера через
+# bcm2835-v4l2 (старый стек камеры). unicam (стек libcamera) отдает сырые кадры с
+# сенсора, которые ffmpeg и fswebcam не снимают, поэтому такие камеры задаются вручную
+CAPTURE_DRIVERS = ('uvcvideo', 'bcm2835-v4l2')
+
+def discover_devices(pattern='/dev/video*', sysfs='/sys/class/video4linux'):
+    """Камеры из /dev/video*: по одному узлу захвата на камеру
+
+    Узлы метаданных (index > 0), встроенные узлы кодеков Pi и unicam (драйвер не из
+    CAPTURE_DRIVERS) пропускаются; если sysfs недоступен, берутся все устройства
+    """
+    devices = []
+    for path in sorted(glob.glob(pattern), key=_device_number):
+        info = os.path.join(sysfs, os.path.basename(path))
+        if os.path.isdir(info):
+            try:
+                with open(os.path.join(info, 'index')) as index_file:
+                    if index_file.read().strip() != '0':
+                        continue
+            except OSError:
+                pass
+            driver = os.path.realpath(os.path.join(info, 'device', 'driver'))
+            if os.path.basename(driver) not in CAPTURE_DRIVERS:
+                continue
+        devices.append(path)
+    return devices
+
+def device_label(path, sysfs='/sys/class/video4linux'):
+    """Название камеры для подписи: имя из sysfs и устройство"""
+    try:
+        with open(os.path.join(sysfs, os.path.basename(path), 'name')) as name_file:
+            name = name_file.read().strip()
+    except OSError:
+        name = ''
+    return f"{name} ({path})" if name else path
+
+def fswebcam_command(device='/dev/video0', resolution='1280x720', command=None):
+    """Командная строка однократной съемки fswebcam с JPEG в stdout"""
+    # -S 3: пропускаем 3 кадра для стабилизации; -: пишем JPEG в stdout, минуя SD-карту
+    return [command or 'fswebcam', '-q', '-d', device, '-r', resolution,
+            '--no-banner', '-S', '3', '--jpeg', '85', '-']
+
+async def run_capture_command(command, timeout=30):
+    """Запускает программу захвата как asyncio-подпроцесс и возвращает ее stdout
+
+    По таймауту или при отмене ожидающей задачи процесс убивается и дожидается завершения,
+    чтобы не оставлять зомби и не держать устройство камеры
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *command, stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        raise CameraError(f"Не удалось запустить {command[0]}: {e}")
+
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _kill_process(process)
+        raise CameraError("Команда превысила время выполнения")
+    except asyncio.CancelledError:
+        await _kill_process(process)
+        raise
+
+    if process.returncode != 0 or not stdout:
+        raise CameraError(stderr.decode(errors='replace').strip() or f"код выхода {process.returncode}")
+    return stdout
+
+async def _kill_process(process):
+    """Убивает подпроцесс и ждет его завершения"""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+    await process.wait()
+
+class CaptureQueue:
+    """Очередь съемок с ограничением числа одновременных захватов и метриками ожидания"""
+
+    def __init__(self, max_concurrent=1):
+        self.max_concurrent = max_concurrent
+        self._semaphore = None
+        self.waiting = 0
+        self.active = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def run(self, func, *args):
+        """Выполняет корутину func(*args), дождавшись свободного слота"""
+        if self._semaphore is None:
+            # Создаем внутри работающего цикла событий
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        queued_at = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+        wait = time.monotonic() - queued_at
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+        self.active += 1
+        try:
+            result = await func(*args)
+        except BaseException:
+            self.failed += 1
+            raise
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+        self.completed += 1
+        return result
+
+    def stats(self):
+        """Текущая глубина очереди и статистика ожидания"""
+        started = self.completed + self.failed
+        return {
+            'waiting': self.waiting,
+            'active': self.active,
+            'max_waiting': self.max_waiting,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_wait': self.total_wait / started if started else 0.0,
+            'max_wait': self.max_wait,
+        }
+
+def format_queue_stats(stats):
+    """Форматирует статистику очереди съемок одной строкой"""
+    return (f"в очереди {stats['waiting']} (макс {stats['max_waiting']}), снимается {stats['active']}, "
+            f"ожидание сред {stats['avg_wait'] * 1000:.0f} мс / макс {stats['max_wait'] * 1000:.0f} мс, "
+            f"ошибок {stats['failed']}")
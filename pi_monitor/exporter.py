@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Экспорт метрик в формате Prometheus
+Небольшой HTTP-сервер на asyncio работает в том же цикле событий, что и бот,
+и отвечает на /metrics из последнего снимка кэша статуса: частые опросы
+не добавляют чтений procfs
+"""
+
+import asyncio
+import logging
+
+from pi_monitor.facts import get_static_facts
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+MAX_REQUEST_BYTES = 8192
+REQUEST_TIMEOUT = 5
+
+# Метрики из status['values']: имя -> (ключ, описание)
+GAUGES = {
+    'pi_cpu_temperature_celsius': ('temperature', "CPU temperature"),
+    'pi_load1': ('load_1', "1-minute load average"),
+    'pi_load5': ('load_5', "5-minute load average"),
+    'pi_load15': ('load_15', "15-minute load average"),
+    'pi_cpu_busy_percent': ('cpu_percent', "CPU busy time since the previous sample"),
+    'pi_cpu_iowait_percent': ('cpu_iowait', "CPU iowait time since the previous sample"),
+    'pi_cpu_steal_percent': ('cpu_steal', "CPU steal time since the previous sample"),
+    'pi_memory_used_bytes': ('memory_used', "Memory in use (total minus available)"),
+    'pi_memory_used_percent': ('memory_percent', "Memory in use, percent of total"),
+    'pi_disk_used_percent': ('disk_percent', "Root filesystem usage, percent"),
+    'pi_disk_available_bytes': ('disk_available', "Root filesystem space available to users"),
+    'pi_uptime_seconds': ('uptime', "System uptime"),
+}
+
+def _format_value(value):
+    if value != value:
+        return 'NaN'
+    return repr(float(value))
+
+def _escape_label(value):
+    """Экранирует обратную косую черту, кавычку и перевод строки в значении метки"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _gauge(lines, name, help_text, samples):
+    """Добавляет метрику: samples — список (метки, значение)"""
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} gauge")
+    for labels, value in samples:
+        label_text = ','.join(f'{key}="{_escape_label(val)}"' for key, val in labels.items())
+        lines.append(f"{name}{{{label_text}}} {_format_value(value)}" if label_text
+                     else f"{name} {_format_value(value)}")
+
+def render_metrics(status):
+    """Текст в формате Prometheus по снимку статуса"""
+    lines = []
+    values = status.get('values', {})
+    for name, (key, help_text) in GAUGES.items():
+        value = values.get(key)
+        if value is not None:
+            _gauge(lines, name, help_text, [({}, value)])
+
+    cores = status.get('cpu_cores') or []
+    if cores:
+        _gauge(lines, 'pi_cpu_core_busy_percent', "Per-core busy time since the previous sample",
+               [({'cpu': core.name}, core.busy) for core in cores])
+
+    facts = get_static_facts()
+    _gauge(lines, 'pi_memory_total_bytes', "Total memory", [({}, facts.memory_total)])
+    _gauge(lines, 'pi_cpu_count', "Number of CPU cores", [({}, facts.cpu_count)])
+    if 'timestamp' in status:
+        _gauge(lines, 'pi_snapshot_timestamp_seconds', "Unix time the snapshot was collected",
+               [({}, status['timestamp'])])
+    return '\n'.join(lines) + '\n'
+
+class MetricsServer:
+    """HTTP-сервер /metrics поверх SnapshotCache"""
+
+    def __init__(self, cache, host='127.0.0.1', port=9101):
+        self.cache = cache
+        self.host = host
+        self.port = port
+        self.scrapes = 0
+        self.renders = 0
+        self._server = None
+        self._body = b''
+        self._body_snapshot = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # При port=0 система выбирает свободный порт
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Metrics exporter listening on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def metrics_body(self):
+        """Тело ответа; текст перестраивается только при смене снимка"""
+        snapshot = self.cache.snapshot
+        if snapshot is None:
+            # Бот только запустился: один раз собираем снимок
+            snapshot = await self.cache.get()
+        if snapshot is not self._body_snapshot:
+            self._body = render_metrics(snapshot).encode()
+            self._body_snapshot = snapshot
+            self.renders += 1
+        age = self.cache.age() or 0.0
+        scrape_lines = (
+            f"# HELP pi_snapshot_age_seconds Age of the snapshot served to this scrape\n"
+            f"# TYPE pi_snapshot_age_seconds gauge\n"
+            f"pi_snapshot_age_seconds {age:.3f}\n"
+            f"# HELP pi_exporter_scrapes_total Scrapes served since start\n"
+            f"# TYPE pi_exporter_scrapes_total counter\n"
+            f"pi_exporter_scrapes_total {self.scrapes}\n"
+        )
+        return self._body + scrape_lines.encode()
+
+    async def _handle(self, reader, writer):
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                return
+            if len(head) > MAX_REQUEST_BYTES:
+                return
+            method, _, rest = head.split(b'\r\n', 1)[0].decode('latin-1').partition(' ')
+            path = rest.split(' ', 1)[0].split('?', 1)[0]
+            if method not in ('GET', 'HEAD'):
+                await self._respond(writer, 405, b'Method Not Allowed\n', 'text/plain')
+            elif path != '/metrics':
+                await self._respond(writer, 404, b'Not Found\n', 'text/plain')
+            else:
+                self.scrapes += 1
+                body = await self.metrics_body()
+                await self._respond(writer, 200, body, CONTENT_TYPE, head_only=method == 'HEAD')
+        except Exception as e:
+            logger.error(f"Metrics exporter error: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def _respond(self, writer, code, body, content_type, head_only=False):
+        reason = {200: 'OK', 404: 'Not Found', 405: 'Method Not Allowed'}[code]
+        writer.write(f"HTTP/1.1 {code} {reason}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode())
+        if not head_only:
+            writer.write(body)
+        await writer.drain()
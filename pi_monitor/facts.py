@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+Статические сведения о системе
+Количество ядер, объем памяти, модель Pi, архитектура и платформа не меняются
+за время жизни процесса, поэтому вычисляются один раз при запуске
+"""
+
+import os
+import platform
+import sys
+from dataclasses import dataclass
+
+from pi_monitor import metrics
+
+DEVICE_TREE_MODEL_PATH = '/proc/device-tree/model'
+
+@dataclass(frozen=True)
+class StaticFacts:
+    """Неизменяемые сведения о системе"""
+    cpu_count: int
+    memory_total: int
+    model: str
+    architecture: str
+    platform: str
+    processor: str
+    python_version: str
+
+    @property
+    def is_raspberry_pi(self):
+        return 'Raspberry Pi' in self.model
+
+def _read_model(cpuinfo):
+    """Определяет модель платы по device-tree или строке Model в /proc/cpuinfo"""
+    try:
+        with open(metrics.host_path(DEVICE_TREE_MODEL_PATH), 'r') as f:
+            return f.read().rstrip('\x00\n')
+    except OSError:
+        pass
+    for line in cpuinfo.splitlines():
+        if line.startswith('Model'):
+            return line.partition(':')[2].strip()
+    return ''
+
+def load_static_facts():
+    """Собирает статические сведения (читает /proc/cpuinfo и /proc/meminfo)"""
+    try:
+        with open(metrics.host_path(metrics.CPUINFO_PATH), 'r') as f:
+            cpuinfo = f.read()
+    except OSError:
+        cpuinfo = ''
+    cpu_count = sum(1 for line in cpuinfo.splitlines() if line.startswith('processor'))
+    try:
+        memory_total = metrics.read_meminfo().total
+    except (OSError, ValueError, IndexError):
+        memory_total = 0
+    return StaticFacts(
+        cpu_count=cpu_count or os.cpu_count() or 1,
+        memory_total=memory_total,
+        model=_read_model(cpuinfo),
+        architecture=platform.machine(),
+        platform=platform.platform(),
+        processor=platform.processor(),
+        python_version=sys.version,
+    )
+
+_facts = None
+
+def get_static_facts():
+    """Возвращает статические сведения, вычисляя их при первом обращении"""
+    global _facts
+    if _facts is None:
+        _facts = load_static_facts()
+    return _facts
+
+def reset_static_facts():
+    """Сбрасывает кэш статических сведений (например, после metrics.set_root)"""
+    global _facts
+    _facts = None
+
+def _measure_status_io(repeat=200):
+    """Сравнивает ввод-вывод одного /status до и после выноса статических сведений"""
+    from pi_monitor.iostats import measure_io
+    from pi_monitor.status import get_system_status
+
+    def legacy_status():
+        # Прежнее поведение: /proc/cpuinfo читался заново на каждый запрос
+        metrics.read_cpu_count()
+        return get_system_status()
+
+    get_static_facts()
+    before = measure_io(legacy_status, repeat)
+    after = measure_io(get_system_status, repeat)
+    print(f"{'':<22}{'read()':>10}{'байт':>12}{'open()':>10}")
+    for title, result in (("Прежний путь", before), ("Статика из кэша", after)):
+        print(f"{title:<22}{result['syscr']:>10.1f}{result['rchar']:>12.0f}{result['opens']:>10.1f}")
+    print(f"Экономия на запрос: {before['syscr'] - after['syscr']:.1f} read(), "
+          f"{before['rchar'] - after['rchar']:.0f} байт")
+
+if __name__ == '__main__':
+    _measure_status_io()
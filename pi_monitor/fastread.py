@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Высокочастотный сбор метрик
+Файлы procfs/sysfs открываются один раз и перечитываются через pread с нулевого
+смещения в заранее выделенные буферы; разбираются только нужные поля
+"""
+
+import asyncio
+import logging
+import os
+import re
+import time
+
+from pi_monitor import metrics
+from pi_monitor.facts import get_static_facts
+from pi_monitor.history import MetricHistory
+
+logger = logging.getLogger(__name__)
+
+class ProcFile:
+    """Постоянно открытый файл procfs/sysfs с буфером фиксированного размера
+
+    size=None: размер по текущему содержимому файла с запасом вдвое
+    """
+
+    def __init__(self, path, size=256):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+        if size is None:
+            size = 2 * _content_size(self._fd)
+        self._buffer = bytearray(size)
+        self._buffers = [self._buffer]
+
+    def read(self):
+        """Перечитывает файл с начала; возвращает memoryview заполненной части буфера без копирования"""
+        # Для procfs/sysfs чтение с нулевого смещения заново формирует содержимое
+        n = os.preadv(self._fd, self._buffers, 0)
+        return memoryview(self._buffer)[:n]
+
+    def read_until(self, complete):
+        """Как read(), но если буфер заполнен целиком, а complete(данные) ложно,
+        буфер удваивается и файл перечитывается: обрезанная строка не разбирается"""
+        while True:
+            data = self.read()
+            if len(data) < len(self._buffer) or complete(data):
+                return data
+            self._buffer = bytearray(len(self._buffer) * 2)
+            self._buffers = [self._buffer]
+            logger.debug(f"{self.path}: buffer grown to {len(self._buffer)} bytes")
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+def _content_size(fd, chunk=4096):
+    # У файлов procfs st_size равен 0: длину узнаем, прочитав содержимое
+    size = 0
+    while True:
+        n = len(os.pread(fd, chunk, size))
+        if not n:
+            return max(size, 64)
+        size += n
+
+# Разбор прямо в буфере ProcFile: re работает с memoryview, копируются только нужные поля
+_FIRST_FIELD = re.compile(rb'\s*(\S+)')
+_FIRST_FIELDS = re.compile(rb'\s*(\S+)\s+(\S+)\s+(\S+)')
+_MEMINFO = re.compile(rb'MemTotal:\s+(\d+)[^\n]*\n(?:[^\n]*\n)*?MemAvailable:\s+(\d+)')
+_MEMINFO_OLD = re.compile(rb'MemTotal:\s+(\d+)[^\n]*\n(?:[^\n]*\n)*?MemFree:\s+(\d+)')
+# Начало следующей строки (intr, ctxt...) значит, что все строки cpu/cpuN перед ней целые
+_OTHER_LINE = re.compile(rb'\n(?!cpu)[a-z]{3}')
+_MEMAVAILABLE_LINE = re.compile(rb'^MemAvailable:.*\n', re.M)
+
+def _cpu_lines_complete(data):
+    """В данных /proc/stat после строк cpu/cpuN начинается другая строка (значит, все они целые)"""
+    return _OTHER_LINE.search(data) is not None
+
+def _meminfo_complete(data):
+    """Строка MemAvailable прочитана целиком"""
+    return _MEMAVAILABLE_LINE.search(data) is not None
+
+class FastReader:
+    """Снимает числовые метрики одним проходом по постоянно открытым файлам"""
+
+    def __init__(self, disk_path='/'):
+        self.disk_path = disk_path
+        self._files = {}
+        self._failing = set()
+        self._open('temperature', metrics.THERMAL_PATH, 32)
+        self._open('loadavg', metrics.LOADAVG_PATH, 128)
+        # Порядок и число строк meminfo зависят от ядра: буфер по настоящему файлу
+        self._open('meminfo', metrics.MEMINFO_PATH, None)
+        self._open('uptime', metrics.UPTIME_PATH, 64)
+        # Строки cpu/cpuN занимают ~100 байт на ядро (ядра — той машины, чей procfs читаем);
+        # длинная строка intr в буфер не попадает, а если строки cpu не поместились, буфер растет
+        self._open('stat', metrics.STAT_PATH, 128 * (get_static_facts().cpu_count + 1))
+        self._previous_cpu = None
+        # Разборщики только открывшихся файлов, каждый со своей обработкой ошибок
+        self._sources = [(name, getattr(self, f'_read_{name}')) for name in self._files]
+        if disk_path:
+            self._sources.append(('disk', self._read_disk))
+
+    def _open(self, name, path, size):
+        try:
+            self._files[name] = ProcFile(metrics.host_path(path), size)
+        except OSError as e:
+            # Например, нет датчика температуры: метрика просто не собирается
+            logger.warning(f"Fast reader: {path} unavailable: {e}")
+
+    def read_values(self):
+        """Возвращает словарь значений в том же формате, что status['values']
+
+        Ошибка одного источника не теряет замер: его значения просто пропускаются
+        """
+        values = {}
+        for name, parse in self._sources:
+            try:
+                parse(values)
+            except Exception as e:
+                if name not in self._failing:
+                    self._failing.add(name)
+                    logger.warning(f"Fast reader: {name} failed: {e}")
+            else:
+                if self._failing:
+                    self._failing.discard(name)
+        return values
+
+    def _read_temperature(self, values):
+        values['temperature'] = int(_FIRST_FIELD.match(self._files['temperature'].read()).group(1)) / 1000.0
+
+    def _read_loadavg(self, values):
+        load = _FIRST_FIELDS.match(self._files['loadavg'].read())
+        values['load_1'] = float(load.group(1))
+        values['load_5'] = float(load.group(2))
+        values['load_15'] = float(load.group(3))
+
+    def _read_meminfo(self, values):
+        data = self._files['meminfo'].read_until(_meminfo_complete)
+        match = _MEMINFO.search(data)
+        if match is None:
+            # В старых ядрах нет MemAvailable: как read_meminfo, берем MemFree
+            match = _MEMINFO_OLD.search(data)
+        total, available = int(match.group(1)), int(match.group(2))
+        values['memory_used'] = float((total - available) * 1024)
+        values['memory_percent'] = (total - available) * 100.0 / total
+
+    def _read_uptime(self, values):
+        values['uptime'] = float(_FIRST_FIELD.match(self._files['uptime'].read()).group(1))
+
+    def _read_stat(self, values):
+        data = self._files['stat'].read_until(_cpu_lines_complete)
+        other = _OTHER_LINE.search(data)
+        # Копируем только блок строк cpu/cpuN, а не весь буфер
+        current = {}
+        for line in bytes(data[:other.start() if other else len(data)]).splitlines():
+            parts = line.split()
+            if len(parts) >= 9:
+                current[parts[0].decode()] = tuple(map(int, parts[1:9]))
+        if self._previous_cpu is not None:
+            usage = metrics.cpu_usage_between(self._previous_cpu, current)
+            if usage:
+                total_usage = usage[0]
+                values['cpu_percent'] = total_usage.busy
+                values['cpu_iowait'] = total_usage.iowait
+                values['cpu_steal'] = total_usage.steal
+                values['cpu_core_max'] = max((core.busy for core in usage[1:]),
+                                             default=total_usage.busy)
+        self._previous_cpu = current
+
+    def _read_disk(self, values):
+        disk = metrics.read_disk_usage(self.disk_path)
+        values['disk_percent'] = float(disk.percent)
+        values['disk_available'] = float(disk.available)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        self._sources = []
+
+def read_values_legacy(tracker, disk_path='/'):
+    """Те же значения обычным путем: open/read/close каждого файла на каждый замер"""
+    values = {}
+    try:
+        values['temperature'] = metrics.read_temperature()
+    except OSError:
+        pass
+    load = metrics.read_loadavg()
+    values.update(load_1=load.load_1, load_5=load.load_5, load_15=load.load_15)
+    mem = metrics.read_meminfo()
+    values.update(memory_used=float(mem.used), memory_percent=mem.percent)
+    values['uptime'] = metrics.read_uptime()
+    usage = tracker.update()
+    if usage:
+        values['cpu_percent'] = usage[0].busy
+        values['cpu_iowait'] = usage[0].iowait
+        values['cpu_steal'] = usage[0].steal
+        values['cpu_core_max'] = max((core.busy for core in usage[1:]), default=usage[0].busy)
+    disk = metrics.read_disk_usage(disk_path)
+    values['disk_percent'] = float(disk.percent)
+    values['disk_available'] = float(disk.available)
+    return values
+
+class FastSampler:
+    """Высокочастотный сбор (например, 10 Гц) в отдельную кольцевую историю
+
+    Чтения занимают микросекунды и не блокируются, поэтому идут прямо в цикле событий
+    """
+
+    def __init__(self, interval=0.1, history_seconds=600):
+        self.interval = interval
+        self.history = MetricHistory(max(1, round(history_seconds / interval)))
+        self.history_seconds = history_seconds
+        self._reader = None
+        self._task = None
+
+    def start(self):
+        """Открывает файлы и запускает сбор"""
+        if self._task is None or self._task.done():
+            self._reader = FastReader()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Fast sampler started: every {self.interval}s, "
+                        f"{self.history.capacity} samples, {self.history.memory_bytes} bytes")
+
+    async def stop(self):
+        """Останавливает сбор и закрывает файлы"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                self.history.record(time.time(), self._reader.read_values())
+            except Exception as e:
+                logger.error(f"Fast sampler error: {e}")
+            next_tick += self.interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+def _benchmark(repeat=2000):
+    """Сравнивает обычный и высокочастотный путь: вызовы read()/open() и микросекунды на замер"""
+    from pi_monitor.iostats import measure_io
+
+    tracker = metrics.CpuUsageTracker()
+    reader = FastReader()
+    reader.read_values()
+    before = measure_io(lambda: read_values_legacy(tracker), repeat)
+    after = measure_io(reader.read_values, repeat)
+    reader.close()
+    print(f"{'':<24}{'read()':>10}{'open()':>10}{'байт':>10}{'мкс':>10}")
+    for title, result in (("open/read/close", before), ("pread, открытые файлы", after)):
+        print(f"{title:<24}{result['syscr']:>10.1f}{result['opens']:>10.1f}"
+              f"{result['rchar']:>10.0f}{result['usec']:>10.1f}")
+    print(f"При 10 Гц: {before['usec'] * 10 / 1e4:.2f}% → {after['usec'] * 10 / 1e4:.2f}% одного ядра")
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+"""
+Режим «флота»: один бот собирает статус со многих Raspberry Pi
+На каждой Pi работает легкий агент, который отдает числовые метрики по HTTP
+(JSON, keep-alive). Бот опрашивает всех агентов параллельно с таймаутом на хост,
+держит открытые соединения и помнит последние полученные значения
+
+Запуск агента:   python3 -m pi_monitor.fleet agent --port 9102
+Опрос агентов:   python3 -m pi_monitor.fleet poll 127.0.0.1:9102 127.0.0.1:9103
+"""
+
+import argparse
+import asyncio
+import html
+import json
+import logging
+import socket
+import time
+from dataclasses import dataclass
+
+from pi_monitor.facts import get_static_facts
+from pi_monitor.metrics import format_uptime
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AGENT_PORT = 9102
+MAX_HEADER_BYTES = 8192
+MAX_BODY_BYTES = 1024 * 1024
+IDLE_TIMEOUT = 120  # Сколько агент держит простаивающее соединение (секунды)
+
+def status_payload(status, name=None):
+    """Компактное представление снимка статуса для передачи по сети"""
+    facts = get_static_facts()
+    return {
+        'name': name or socket.gethostname(),
+        'model': facts.model,
+        'cpu_count': facts.cpu_count,
+        'timestamp': status.get('timestamp', time.time()),
+        'values': {key: value for key, value in status.get('values', {}).items() if value == value},
+    }
+
+class AgentServer:
+    """HTTP-агент: GET /status возвращает JSON из кэша статуса
+
+    Авторизации нет, поэтому по умолчанию агент слушает только 127.0.0.1
+    """
+
+    def __init__(self, cache, host='127.0.0.1', port=DEFAULT_AGENT_PORT, name=None):
+        self.cache = cache
+        self.host = host
+        self.port = port
+        self.name = name
+        self.requests = 0
+        self.connections = 0
+        self._server = None
+        self._connections = {}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        # При port=0 система выбирает свободный порт
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"Fleet agent listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            # Простаивающие keep-alive соединения закрываем сами, чтобы обработчики завершились
+            for writer in list(self._connections.values()):
+                writer.close()
+            if self._connections:
+                await asyncio.wait(list(self._connections), timeout=5)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._connections[asyncio.current_task()] = writer
+        try:
+            # Keep-alive: бот шлет запросы по одному соединению
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+                    break
+                if len(head) > MAX_HEADER_BYTES:
+                    break
+                request_line = head.split(b'\r\n', 1)[0].decode('latin-1').split()
+                keep_alive = b'connection: close' not in head.lower()
+                if len(request_line) < 2 or request_line[0] != 'GET':
+                    self._respond(writer, 405, b'{"error": "method not allowed"}', False)
+                    await writer.drain()
+                    break
+                if request_line[1].split('?', 1)[0] != '/status':
+                    self._respond(writer, 404, b'{"error": "not found"}', keep_alive)
+                else:
+                    self.requests += 1
+                    status = await self.cache.get()
+                    body = json.dumps(status_payload(status, self.name)).encode()
+                    self._respond(writer, 200, body, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, OSError):
+            pass
+        except Exception as e:
+            logger.error(f"Fleet agent error: {e}")
+        finally:
+            self._connections.pop(asyncio.current_task(), None)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    def _respond(self, writer, code, body, keep_alive):
+        reason = {200: 'OK', 404: 'Not Found', 405: 'Method Not Allowed'}[code]
+        writer.write(f"HTTP/1.1 {code} {reason}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n"
+                     f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+
+class AgentError(Exception):
+    """Агент не ответил или ответил ошибкой"""
+
+class AgentClient:
+    """Клиент одного агента с постоянным соединением"""
+
+    def __init__(self, name, host, port=DEFAULT_AGENT_PORT):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.connects = 0
+        self._reader = None
+        self._writer = None
+        self._lock = None
+
+    async def fetch(self):
+        """Запрашивает /status; при разорванном соединении переподключается один раз"""
+        if self._lock is None:
+            # Создаем внутри работающего цикла событий
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            reused = self._writer is not None
+            try:
+                return await self._request()
+            except (ConnectionError, asyncio.IncompleteReadError) as e:
+                self.close()
+                if not reused:
+                    raise AgentError(f"соединение разорвано: {e}")
+            except BaseException:
+                # Таймаут или отмена посреди ответа: соединение в неизвестном состоянии
+                self.close()
+                raise
+            # Агент закрыл простаивавшее соединение — пробуем заново
+            try:
+                return await self._request()
+            except BaseException:
+                self.close()
+                raise
+
+    async def _request(self):
+        if self._writer is None:
+            try:
+                self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            except OSError as e:
+                raise AgentError(f"нет соединения: {e.strerror or e}")
+            self.connects += 1
+        self._writer.write(f"GET /status HTTP/1.1\r\nHost: {self.host}\r\n\r\n".encode())
+        await self._writer.drain()
+        head = await self._reader.readuntil(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        code = lines[0].split(' ', 2)[1] if len(lines[0].split(' ')) > 1 else ''
+        headers = {}
+        for line in lines[1:]:
+            key, _, value = line.partition(':')
+            headers[key.strip().lower()] = value.strip()
+        length = int(headers.get('content-length', 0))
+        if length > MAX_BODY_BYTES:
+            raise AgentError("слишком большой ответ")
+        body = await self._reader.readexactly(length)
+        if headers.get('connection', '').lower() == 'close':
+            self.close()
+        if code != '200':
+            raise AgentError(f"HTTP {code}")
+        return json.loads(body)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+@dataclass
+class HostStatus:
+    """Последнее известное состояние одной Pi"""
+    name: str
+    payload: dict = None
+    received: float = None  # когда получены данные (time.time())
+    error: str = None  # ошибка последнего опроса (данные, если есть, устарели)
+    latency: float = None  # время ответа последнего успешного опроса (секунды)
+    failures: int = 0
+
+    @property
+    def ok(self):
+        return self.error is None and self.payload is not None
+
+def local_host(status, name=None):
+    """HostStatus для Pi, на которой работает сам бот (без сетевого запроса)"""
+    payload = status_payload(status, name)
+    return HostStatus(payload['name'], payload, time.time())
+
+class Fleet:
+    """Параллельный опрос агентов с таймаутом на хост и кэшем последних значений"""
+
+    def __init__(self, agents, timeout=3.0):
+        # agents: список (имя, хост, порт)
+        self.clients = [AgentClient(name, host, port) for name, host, port in agents]
+        self.timeout = timeout
+        self.hosts = {client.name: HostStatus(client.name) for client in self.clients}
+
+    async def _poll_one(self, client):
+        host = self.hosts[client.name]
+        started = time.monotonic()
+        try:
+            payload = await asyncio.wait_for(client.fetch(), self.timeout)
+        except asyncio.TimeoutError:
+            host.error = f"нет ответа за {self.timeout:g} с"
+        except (AgentError, ValueError) as e:
+            host.error = str(e)
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError) as e:
+            # Обрыв, отказ в соединении или испорченный ответ: хост недоступен, остальные опрашиваются
+            client.close()
+            host.error = f"ошибка соединения: {e}"
+        except Exception as e:
+            client.close()
+            logger.error(f"Fleet agent '{client.name}' failed: {e}")
+            host.error = f"ошибка: {e}"
+        else:
+            host.payload = payload
+            host.received = time.time()
+            host.latency = time.monotonic() - started
+            host.error = None
+            host.failures = 0
+            return host
+        host.failures += 1
+        return host
+
+    async def poll(self):
+        """Опрашивает всех агентов одновременно; укладывается в один таймаут"""
+        return list(await asyncio.gather(*(self._poll_one(client) for client in self.clients)))
+
+    def close(self):
+        for client in self.clients:
+            client.close()
+
+def parse_agents(specs):
+    """Разбирает 'имя=хост:порт', 'хост:порт' или 'хост' в список (имя, хост, порт)"""
+    agents = []
+    for spec in specs:
+        name, _, address = spec.rpartition('=')
+        host, _, port = address.partition(':')
+        agents.append((name or address, host, int(port) if port else DEFAULT_AGENT_PORT))
+    return agents
+
+def _host_line(values, cpu_count):
+    parts = []
+    if 'temperature' in values:
+        parts.append(f"{values['temperature']:.0f}°C")
+    if 'load_1' in values:
+        parts.append(f"load {values['load_1']:.2f}/{cpu_count}")
+    if 'cpu_percent' in values:
+        parts.append(f"CPU {values['cpu_percent']:.0f}%")
+    if 'memory_percent' in values:
+        parts.append(f"mem {values['memory_percent']:.0f}%")
+    if 'disk_percent' in values:
+        parts.append(f"disk {values['disk_percent']:.0f}%")
+    if 'uptime' in values:
+        parts.append(f"up {format_uptime(values['uptime'])}")
+    return " · ".join(parts)
+
+def format_fleet_summary(hosts, thresholds, elapsed=None, now=None):
+    """Компактная сводка по флоту для /status all"""
+    now = time.time() if now is None else now
+    online = sum(1 for host in hosts if host.ok)
+    message = f"🛰 <b>Флот: {online}/{len(hosts)} на связи</b>\n\n"
+    for host in hosts:
+        # Имя и текст ошибки приходят извне: без экранирования Telegram отклонит весь HTML-ответ
+        name = html.escape(host.name)
+        error = html.escape(str(host.error))
+        payload = host.payload or {}
+        values = payload.get('values', {})
+        cpu_count = payload.get('cpu_count', 1)
+        if host.ok:
+            hot = (values.get('temperature', 0) >= thresholds['temperature_critical'] or
+                   values.get('memory_percent', 0) >= thresholds['memory_percent'] or
+                   values.get('disk_percent', 0) >= thresholds['disk_percent'] or
+                   values.get('load_1', 0) >= thresholds['load_critical_per_core'] * cpu_count)
+            mark = "⚠" if hot else "✅"
+            message += f"{mark} <b>{name}</b>: {_host_line(values, cpu_count)}\n"
+        elif values:
+            age = format_uptime(now - host.received)
+            message += (f"❌ <b>{name}</b>: {error}\n"
+                        f"    <i>данные {age} назад: {_host_line(values, cpu_count)}</i>\n")
+        else:
+            message += f"❌ <b>{name}</b>: {error}\n"
+    if elapsed is not None:
+        message += f"\n<i>Опрос занял {elapsed * 1000:.0f} мс</i>"
+    return message
+
+async def _run_agent(args):
+    from pi_monitor.cache import SnapshotCache
+    from pi_monitor.status import get_system_status_async
+
+    cache = SnapshotCache(get_system_status_async, ttl=args.ttl)
+    server = AgentServer(cache, args.host, args.port, args.name)
+    await server.start()
+    print(f"Агент слушает {args.host}:{server.port} (Ctrl+C — выход)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+async def _run_poll(args):
+    from pi_monitor.status import THRESHOLDS
+
+    fleet = Fleet(parse_agents(args.agents), args.timeout)
+    try:
+        for _ in range(args.rounds):
+            started = time.monotonic()
+            hosts = await fleet.poll()
+            print(format_fleet_summary(hosts, THRESHOLDS, time.monotonic() - started))
+        connects = sum(client.connects for client in fleet.clients)
+        print(f"Соединений открыто: {connects} на {len(fleet.clients)} агентов и {args.rounds} опросов")
+    finally:
+        fleet.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Агент и опрос флота Raspberry Pi")
+    commands = parser.add_subparsers(dest='command', required=True)
+    agent = commands.add_parser('agent', help="отдавать статус этой Pi по HTTP")
+    agent.add_argument('--host', default='127.0.0.1',
+                       help="адрес для опроса (без авторизации: лучше адрес в локальной сети, а не 0.0.0.0)")
+    agent.add_argument('--port', type=int, default=DEFAULT_AGENT_PORT)
+    agent.add_argument('--name', help="имя в сводке (по умолчанию hostname)")
+    agent.add_argument('--ttl', type=float, default=5.0, help="сколько секунд отдавать один снимок")
+    poll = commands.add_parser('poll', help="опросить агентов и вывести сводку")
+    poll.add_argument('agents', nargs='+', help="имя=хост:порт, хост:порт или хост")
+    poll.add_argument('--timeout', type=float, default=3.0)
+    poll.add_argument('--rounds', type=int, default=1)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_run_agent(args) if args.command == 'agent' else _run_poll(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
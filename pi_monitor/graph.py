@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Графики метрик для команды /graph
+Данные прореживаются векторно (NumPy) до фиксированного числа точек, поэтому
+стоимость отрисовки не зависит от длины истории; готовые PNG кэшируются
+"""
+
+import asyncio
+import io
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# Метрики /graph: имя в команде -> (ключ в истории, заголовок)
+GRAPH_METRICS = {
+    'temperature': ('temperature', "Температура CPU, °C"),
+    'load': ('load_1', "Загрузка CPU (1 мин)"),
+    'cpu': ('cpu_percent', "Использование CPU, %"),
+    'memory': ('memory_percent', "Память, %"),
+    'disk': ('disk_percent', "Диск, %"),
+}
+
+_WINDOW_UNITS = {'m': 60, 'h': 3600, 'd': 86400}
+_WINDOW_RE = re.compile(r'^(\d+)([mhd]?)$')
+
+class GraphError(Exception):
+    """Ошибка построения графика"""
+
+def parse_window(text):
+    """Разбирает окно вида 30m, 6h, 7d (без суффикса — минуты) в секунды"""
+    match = _WINDOW_RE.match(text.strip().lower())
+    if not match or int(match.group(1)) == 0:
+        raise ValueError(f"Неверное окно: {text}")
+    return int(match.group(1)) * _WINDOW_UNITS[match.group(2) or 'm']
+
+def format_window(seconds):
+    """Обратное преобразование окна в короткую запись"""
+    for suffix in ('d', 'h', 'm'):
+        unit = _WINDOW_UNITS[suffix]
+        if seconds % unit == 0:
+            return f"{seconds // unit}{suffix}"
+    return f"{seconds}s"
+
+def downsample(times, values, start, end, points, lows=None, highs=None):
+    """Сводит ряд к points корзинам по времени: центры, среднее, минимум и максимум
+
+    Все операции векторные (searchsorted + reduceat), без цикла по замерам
+    """
+    import numpy as np
+
+    times = np.asarray(times, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    lows = values if lows is None else np.asarray(lows, dtype=np.float64)
+    highs = values if highs is None else np.asarray(highs, dtype=np.float64)
+
+    edges = np.linspace(start, end, points + 1)
+    bins = np.clip(np.searchsorted(edges, times, side='right') - 1, 0, points - 1)
+    # Начала непустых корзин (times отсортированы, значит bins не убывают)
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    counts = np.diff(np.r_[starts, len(values)])
+    mean = np.add.reduceat(values, starts) / counts
+    low = np.minimum.reduceat(lows, starts)
+    high = np.maximum.reduceat(highs, starts)
+    centers = (edges[bins[starts]] + edges[bins[starts] + 1]) / 2
+    return centers, mean, low, high
+
+# Matplotlib не рассчитан на параллельную отрисовку из нескольких потоков
+_render_lock = threading.Lock()
+
+def render_png(title, centers, mean, low, high, width=8, height=4, dpi=100):
+    """Рисует график среднего с полосой мин/макс и возвращает PNG-байты"""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        from matplotlib.figure import Figure
+        import matplotlib.dates as mdates
+    except ImportError:
+        raise GraphError("Не установлен matplotlib: sudo apt-get install python3-matplotlib")
+
+    with _render_lock:
+        # Figure без pyplot: не создается глобальное состояние и окно
+        fig = Figure(figsize=(width, height), dpi=dpi)
+        ax = fig.add_subplot(1, 1, 1)
+        dates = [datetime.fromtimestamp(t) for t in centers]
+        ax.fill_between(dates, low, high, alpha=0.25, linewidth=0)
+        ax.plot(dates, mean, linewidth=1.5)
+        ax.set_title(title)
+        ax.grid(True, alpha=0.3)
+        locator = mdates.AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+class GraphRenderer:
+    """Строит графики из истории в памяти или из хранилища и кэширует готовые PNG
+
+    Ключ кэша — (метрика, окно, корзина конца окна). Запись считается актуальной,
+    пока в окно не попал новый замер, поэтому повторные /graph не перерисовывают график
+    """
+
+    def __init__(self, history, store=None, points=200, cache_size=16):
+        self.history = history
+        self.store = store
+        self.points = points
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.renders = 0
+
+    def _load(self, key, window, now):
+        """Загружает ряд: из памяти, если окно в нее помещается, иначе из базы"""
+        oldest = self.history.oldest_timestamp()
+        if self.store is None or (oldest is not None and oldest <= now - window):
+            times, values = self.history.series(key, window, now)
+            return times, values, None, None
+        rows = self.store.query(key, now - window, now)
+        if not rows:
+            return [], [], None, None
+        times, means, lows, highs = zip(*rows)
+        return times, means, lows, highs
+
+    def _render(self, metric, window, now):
+        key, title = GRAPH_METRICS[metric]
+        times, values, lows, highs = self._load(key, window, now)
+        if not times:
+            raise GraphError("Нет данных за этот период")
+        centers, mean, low, high = downsample(times, values, now - window, now, self.points, lows, highs)
+        return render_png(f"{title} — {format_window(window)}", centers, mean, low, high)
+
+    async def get(self, metric, window):
+        """Возвращает PNG-байты графика (из кэша, если новых замеров не было)"""
+        if metric not in GRAPH_METRICS:
+            raise GraphError(f"Неизвестная метрика: {metric}")
+        now = time.time()
+        bucket_size = window / self.points
+        cache_key = (metric, window, int(now // bucket_size))
+        version = self.history.latest_timestamp()
+
+        cached = self._cache.get(cache_key)
+        if cached is not None and cached[0] == version:
+            self._cache.move_to_end(cache_key)
+            self.hits += 1
+            return cached[1]
+
+        loop = asyncio.get_running_loop()
+        png = await loop.run_in_executor(None, self._render, metric, window, now)
+        self.renders += 1
+        self._cache[cache_key] = (version, png)
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return png
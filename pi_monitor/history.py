@@ -0,0 +1,231 @@
+# -*- coding: utf-8 -*-
+"""
+История метрик Raspberry Pi
+Фоновый сборщик записывает значения в кольцевые буферы фиксированного
+размера на основе array, память выделяется один раз при создании
+"""
+
+import asyncio
+import logging
+import math
+import time
+from array import array
+
+from pi_monitor.status import get_system_status_async
+
+logger = logging.getLogger(__name__)
+
+# Числовые метрики, которые сохраняются в истории: ключ в status['values'] -> (название, единица)
+HISTORY_FIELDS = {
+    'temperature': ("Температура CPU", "°C"),
+    'load_1': ("Загрузка CPU (1 мин)", ""),
+    'load_5': ("Загрузка CPU (5 мин)", ""),
+    'load_15': ("Загрузка CPU (15 мин)", ""),
+    'cpu_percent': ("Использование CPU", "%"),
+    'cpu_iowait': ("Ожидание ввода-вывода", "%"),
+    'cpu_steal': ("Steal CPU", "%"),
+    'cpu_core_max': ("Самое загруженное ядро", "%"),
+    'memory_percent': ("Память", "%"),
+    'memory_used': ("Память, занято", " MB"),
+    'disk_percent': ("Диск", "%"),
+    'disk_available': ("Диск, свободно", " MB"),
+    'uptime': ("Время работы", " с"),
+}
+
+# Метрики, которые показываются в /history
+HISTORY_REPORT_FIELDS = ['temperature', 'load_1', 'cpu_percent', 'cpu_core_max', 'memory_percent', 'disk_percent']
+
+# Делители для отображения (байты -> мегабайты)
+_DISPLAY_SCALE = {'memory_used': 1024 * 1024, 'disk_available': 1024 * 1024}
+
+class MetricHistory:
+    """Набор кольцевых буферов: один array('d') на метрику плюс массив времени"""
+
+    def __init__(self, capacity, fields=HISTORY_FIELDS):
+        if capacity <= 0:
+            raise ValueError("Емкость истории должна быть положительной")
+        self.capacity = capacity
+        self.fields = list(fields)
+        self._timestamps = array('d', [math.nan]) * capacity
+        self._columns = [array('d', [math.nan]) * capacity for _ in self.fields]
+        self._index = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def memory_bytes(self):
+        """Объем памяти под буферы (известен заранее и не растет)"""
+        itemsize = self._timestamps.itemsize
+        return (len(self._columns) + 1) * self.capacity * itemsize
+
+    def record(self, timestamp, values):
+        """Записывает один замер; отсутствующие метрики сохраняются как NaN"""
+        i = self._index
+        self._timestamps[i] = timestamp
+        for column, name in zip(self._columns, self.fields):
+            value = values.get(name)
+            column[i] = math.nan if value is None else value
+        self._index = (i + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def latest_timestamp(self):
+        """Время последнего замера или None"""
+        if not self._count:
+            return None
+        return self._timestamps[(self._index - 1) % self.capacity]
+
+    def oldest_timestamp(self):
+        """Время самого старого хранимого замера или None"""
+        if not self._count:
+            return None
+        return self._timestamps[(self._index - self._count) % self.capacity]
+
+    def _window_indices(self, since):
+        """Индексы замеров не старше since, от новых к старым"""
+        capacity = self.capacity
+        i = self._index
+        for _ in range(self._count):
+            i = (i - 1) % capacity
+            if self._timestamps[i] < since:
+                break
+            yield i
+
+    def window(self, name, seconds, now=None):
+        """Значения метрики за последние seconds секунд (без NaN)"""
+        now = time.time() if now is None else now
+        column = self._columns[self.fields.index(name)]
+        values = []
+        for i in self._window_indices(now - seconds):
+            value = column[i]
+            if value == value:  # пропускаем NaN
+                values.append(value)
+        return values
+
+    def series(self, name, seconds, now=None):
+        """Время и значения метрики за последние seconds секунд в хронологическом порядке"""
+        now = time.time() if now is None else now
+        column = self._columns[self.fields.index(name)]
+        times = []
+        values = []
+        for i in self._window_indices(now - seconds):
+            value = column[i]
+            if value == value:
+                times.append(self._timestamps[i])
+                values.append(value)
+        times.reverse()
+        values.reverse()
+        return times, values
+
+    def summary(self, seconds, names=None, now=None):
+        """Возвращает min/max/avg/p95 по метрикам за последние seconds секунд"""
+        result = {}
+        for name in names or self.fields:
+            values = self.window(name, seconds, now)
+            if not values:
+                result[name] = None
+                continue
+            values.sort()
+            p95_index = min(len(values) - 1, math.ceil(0.95 * len(values)) - 1)
+            result[name] = {
+                'min': values[0],
+                'max': values[-1],
+                'avg': sum(values) / len(values),
+                'p95': values[p95_index],
+                'count': len(values),
+            }
+        return result
+
+class StatusSampler:
+    """Фоновая задача, которая периодически снимает статус системы"""
+
+    def __init__(self, interval=10, history_seconds=24 * 3600, collect=get_system_status_async):
+        self.interval = interval
+        self.history = MetricHistory(max(1, round(history_seconds / interval)))
+        self.latest_status = None
+        self._collect = collect
+        self._listeners = []
+        self._task = None
+
+    def add_listener(self, callback):
+        """Добавляет корутину callback(status), вызываемую после каждого замера"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Запускает фоновый сбор (вызывать внутри работающего цикла событий)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Sampler started: every {self.interval}s, "
+                        f"{self.history.capacity} samples, {self.history.memory_bytes} bytes")
+
+    async def stop(self):
+        """Останавливает фоновый сбор"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def sample_once(self):
+        """Снимает и записывает один замер"""
+        status = await self._collect()
+        self.history.record(status['timestamp'], status['values'])
+        self.latest_status = status
+        for callback in self._listeners:
+            try:
+                await callback(status)
+            except Exception as e:
+                logger.error(f"Sampler listener error: {e}")
+        return status
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                await self.sample_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Sampler error: {e}")
+            # Планируем от расписания, а не от конца сбора, чтобы интервал не «уплывал»
+            next_tick += self.interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+def _format_value(name, value):
+    """Форматирует значение метрики для /history"""
+    value = value / _DISPLAY_SCALE.get(name, 1)
+    unit = HISTORY_FIELDS[name][1]
+    if name.startswith('load_'):
+        return f"{value:.2f}{unit}"
+    return f"{value:.1f}{unit}"
+
+def format_history_message(summary, minutes):
+    """Форматирует сводку истории в читаемое сообщение"""
+    message = f"📈 <b>История за {minutes} мин</b>\n\n"
+    has_data = False
+    for name, stats in summary.items():
+        title = HISTORY_FIELDS[name][0]
+        if stats is None:
+            message += f"<b>{title}:</b> нет данных\n\n"
+            continue
+        has_data = True
+        message += f"<b>{title}:</b>\n"
+        message += (f"   мин {_format_value(name, stats['min'])} · "
+                    f"макс {_format_value(name, stats['max'])}\n")
+        message += (f"   сред {_format_value(name, stats['avg'])} · "
+                    f"p95 {_format_value(name, stats['p95'])}\n\n")
+    if has_data:
+        count = max(stats['count'] for stats in summary.values() if stats)
+        message += f"<i>Замеров: {count}</i>"
+    else:
+        message += "<i>Замеры еще не собраны</i>"
+    return message
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+Сбор метрик Raspberry Pi без запуска внешних процессов
+Все значения читаются напрямую из procfs/sysfs и возвращаются
+в виде типизированных структур, а не готовых строк
+"""
+
+import os
+import socket
+import struct
+from dataclasses import dataclass, field
+
+try:
+    import fcntl
+except ImportError:  # не Linux
+    fcntl = None
+
+THERMAL_PATH = '/sys/class/thermal/thermal_zone0/temp'
+LOADAVG_PATH = '/proc/loadavg'
+MEMINFO_PATH = '/proc/meminfo'
+UPTIME_PATH = '/proc/uptime'
+CPUINFO_PATH = '/proc/cpuinfo'
+STAT_PATH = '/proc/stat'
+MOUNTS_PATH = '/proc/self/mounts'
+NET_CLASS_PATH = '/sys/class/net'
+IF_INET6_PATH = '/proc/net/if_inet6'
+
+# Корень, относительно которого читаются пути выше. Для бенчмарков и проверки
+# не на Pi можно подставить папку с подготовленными файлами (PI_MONITOR_ROOT)
+ROOT = '/'
+
+# Виртуальные файловые системы, которые не показываем в списке дисков
+PSEUDO_FILESYSTEMS = {
+    'autofs', 'binfmt_misc', 'bpf', 'cgroup', 'cgroup2', 'configfs', 'debugfs',
+    'devpts', 'devtmpfs', 'efivarfs', 'fusectl', 'hugetlbfs', 'mqueue', 'nsfs',
+    'overlay', 'proc', 'pstore', 'ramfs', 'rpc_pipefs', 'securityfs', 'squashfs',
+    'sysfs', 'tmpfs', 'tracefs',
+}
+
+SIOCGIFADDR = 0x8915
+
+@dataclass
+class LoadAverage:
+    """Средняя загрузка за 1, 5 и 15 минут"""
+    load_1: float
+    load_5: float
+    load_15: float
+
+@dataclass
+class CpuUsage:
+    """Использование CPU (или одного ядра) за интервал, в процентах"""
+    name: str
+    user: float
+    system: float
+    iowait: float
+    irq: float
+    steal: float
+    idle: float
+
+    @property
+    def busy(self):
+        return 100.0 - self.idle - self.iowait
+
+@dataclass
+class MemoryInfo:
+    """Информация о памяти (в байтах)"""
+    total: int
+    available: int
+    free: int
+
+    @property
+    def used(self):
+        return self.total - self.available
+
+    @property
+    def percent(self):
+        return (self.used / self.total) * 100 if self.total else 0.0
+
+@dataclass
+class DiskUsage:
+    """Использование файловой системы (в байтах)"""
+    device: str
+    mountpoint: str
+    fstype: str
+    total: int
+    used: int
+    available: int
+
+    @property
+    def percent(self):
+        # Как в df: доля занятого места от доступного непривилегированному пользователю
+        usable = self.used + self.available
+        if not usable:
+            return 0
+        return -(-self.used * 100 // usable)
+
+@dataclass
+class NetworkInterface:
+    """Сетевой интерфейс"""
+    name: str
+    operstate: str
+    mac: str
+    ipv4: list = field(default_factory=list)
+    ipv6: list = field(default_factory=list)
+
+def set_root(root='/'):
+    """Перенаправляет чтение procfs/sysfs и statvfs в другой корень файловой системы"""
+    global ROOT
+    ROOT = os.path.abspath(root)
+
+def host_path(path):
+    """Путь к файлу системы с учетом ROOT"""
+    if ROOT == '/':
+        return path
+    return ROOT + path
+
+def _read_first_line(path):
+    """Читает первую строку файла"""
+    with open(host_path(path), 'r') as f:
+        return f.readline().strip()
+
+def read_temperature():
+    """Возвращает температуру CPU в °C"""
+    return int(_read_first_line(THERMAL_PATH)) / 1000.0
+
+def read_loadavg():
+    """Возвращает среднюю загрузку из /proc/loadavg"""
+    load = _read_first_line(LOADAVG_PATH).split()
+    return LoadAverage(float(load[0]), float(load[1]), float(load[2]))
+
+def read_meminfo():
+    """Возвращает информацию о памяти из /proc/meminfo"""
+    values = {}
+    with open(host_path(MEMINFO_PATH), 'r') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('MemTotal', 'MemAvailable', 'MemFree'):
+                values[key] = int(rest.split()[0]) * 1024
+                if len(values) == 3:
+                    break
+    return MemoryInfo(
+        total=values.get('MemTotal', 0),
+        available=values.get('MemAvailable', values.get('MemFree', 0)),
+        free=values.get('MemFree', 0),
+    )
+
+def read_uptime():
+    """Возвращает время работы системы в секундах"""
+    return float(_read_first_line(UPTIME_PATH).split()[0])
+
+def read_cpu_count():
+    """Возвращает количество ядер по /proc/cpuinfo"""
+    with open(host_path(CPUINFO_PATH), 'r') as f:
+        return sum(1 for line in f if line.startswith('processor')) or 1
+
+def read_cpu_times():
+    """Возвращает {имя: счетчики} из строк cpu/cpuN файла /proc/stat
+
+    Счетчики: user, nice, system, idle, iowait, irq, softirq, steal (в тиках).
+    Чтение останавливается на первой строке не про CPU (длинную строку intr не разбираем)
+    """
+    times = {}
+    with open(host_path(STAT_PATH), 'r') as f:
+        for line in f:
+            if not line.startswith('cpu'):
+                break
+            parts = line.split()
+            times[parts[0]] = tuple(map(int, parts[1:9]))
+    return times
+
+def cpu_usage_between(previous, current):
+    """Считает использование CPU по двум снимкам read_cpu_times()"""
+    usage = []
+    for name, now in current.items():
+        before = previous.get(name)
+        if before is None:
+            continue
+        # Счетчик может уменьшиться (iowait в некоторых ядрах, сброс при отключении ядра):
+        # отрицательную разность считаем нулем, а не отрицательными процентами
+        user, nice, system, idle, iowait, irq, softirq, steal = (max(a - b, 0) for a, b in zip(now, before))
+        total = user + nice + system + idle + iowait + irq + softirq + steal
+        if total <= 0:
+            continue
+        scale = 100.0 / total
+        usage.append(CpuUsage(
+            name=name,
+            user=(user + nice) * scale,
+            system=system * scale,
+            iowait=iowait * scale,
+            irq=(irq + softirq) * scale,
+            steal=steal * scale,
+            idle=idle * scale,
+        ))
+    return usage
+
+class CpuUsageTracker:
+    """Помнит предыдущий снимок /proc/stat и возвращает использование за прошедший интервал
+
+    Первый вызов считает среднее с момента загрузки системы
+    """
+
+    def __init__(self):
+        self._previous = {}
+        self._last = []
+
+    def update(self):
+        """Возвращает [общее, cpu0, cpu1, ...] с момента прошлого вызова"""
+        current = read_cpu_times()
+        previous = self._previous or {name: (0,) * 8 for name in current}
+        usage = cpu_usage_between(previous, current)
+        if not usage:
+            # Счетчики не сдвинулись (вызовы чаще одного тика): отдаем прошлый интервал
+            return self._last
+        self._previous = current
+        self._last = usage
+        return usage
+
+def _unescape_mount_field(value):
+    """Раскодирует восьмеричные escape-последовательности (\\040 и т.п.)"""
+    if '\\' not in value:
+        return value
+    return value.encode('latin-1').decode('unicode_escape')
+
+def read_mounts(include_pseudo=False):
+    """Возвращает список (устройство, точка монтирования, тип ФС)"""
+    mounts = []
+    with open(host_path(MOUNTS_PATH), 'r') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 3:
+                continue
+            device, mountpoint, fstype = parts[0], _unescape_mount_field(parts[1]), parts[2]
+            if not include_pseudo and fstype in PSEUDO_FILESYSTEMS:
+                continue
+            mounts.append((device, mountpoint, fstype))
+    return mounts
+
+def read_disk_usage(mountpoint='/', device='', fstype=''):
+    """Возвращает использование файловой системы через os.statvfs"""
+    st = os.statvfs(host_path(mountpoint))
+    total = st.f_blocks * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    available = st.f_bavail * st.f_frsize
+    return DiskUsage(device, mountpoint, fstype, total, used, available)
+
+def read_disks():
+    """Возвращает использование всех смонтированных файловых систем"""
+    disks = []
+    seen = set()
+    for device, mountpoint, fstype in read_mounts():
+        if device in seen:
+            continue
+        try:
+            usage = read_disk_usage(mountpoint, device, fstype)
+        except OSError:
+            continue
+        if usage.total == 0:
+            continue
+        seen.add(device)
+        disks.append(usage)
+    return disks
+
+def _read_ipv4(name):
+    """Возвращает IPv4-адрес интерфейса через ioctl SIOCGIFADDR"""
+    if fcntl is None:
+        return []
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        try:
+            packed = fcntl.ioctl(sock.fileno(), SIOCGIFADDR,
+                                 struct.pack('256s', name[:15].encode()))
+        except OSError:
+            return []
+    return [socket.inet_ntoa(packed[20:24])]
+
+def _read_ipv6_addresses():
+    """Возвращает IPv6-адреса по интерфейсам из /proc/net/if_inet6"""
+    addresses = {}
+    try:
+        with open(host_path(IF_INET6_PATH), 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) < 6:
+                    continue
+                raw = bytes.fromhex(parts[0])
+                addresses.setdefault(parts[5], []).append(socket.inet_ntop(socket.AF_INET6, raw))
+    except OSError:
+        pass
+    return addresses
+
+def read_interfaces():
+    """Возвращает сетевые интерфейсы из /sys/class/net"""
+    ipv6 = _read_ipv6_addresses()
+    interfaces = []
+    for name in sorted(os.listdir(host_path(NET_CLASS_PATH))):
+        base = os.path.join(NET_CLASS_PATH, name)
+        try:
+            operstate = _read_first_line(os.path.join(base, 'operstate'))
+        except OSError:
+            operstate = 'unknown'
+        try:
+            mac = _read_first_line(os.path.join(base, 'address'))
+        except OSError:
+            mac = ''
+        interfaces.append(NetworkInterface(name, operstate, mac, _read_ipv4(name), ipv6.get(name, [])))
+    return interfaces
+
+def format_size(num_bytes):
+    """Форматирует размер в байтах как df -h (например, 80G)"""
+    value = float(num_bytes)
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if value < 1024 or unit == 'T':
+            break
+        value /= 1024
+    if unit == 'B':
+        return f"{int(value)}B"
+    return f"{value:.1f}{unit}" if value < 10 else f"{value:.0f}{unit}"
+
+def format_uptime(seconds):
+    """Форматирует время работы как '1д 2ч 3м'"""
+    days = int(seconds // 86400)
+    hours = int((seconds % 86400) // 3600)
+    minutes = int((seconds % 3600) // 60)
+    return f"{days}д {hours}ч {minutes}м"
+
+if os.environ.get('PI_MONITOR_ROOT'):
+    set_root(os.environ['PI_MONITOR_ROOT'])
@@ -0,0 +1,408 @@
+# -*- coding: utf-8 -*-
+"""
+Детектор движения на камере
+Кадры потока захвата декодируются сразу в уменьшенном виде и в оттенках серого
+(JPEG умеет масштаб 1/8 при декодировании), а затем сравниваются с фоновой
+моделью векторно в NumPy и только внутри заданных областей. Все буферы
+выделяются один раз, поэтому кадр обходится в доли миллисекунды
+
+Запуск из корня репозитория:
+    python3 -m pi_monitor.motion synth frames.npy        # записанная последовательность с движением
+    python3 -m pi_monitor.motion replay frames.npy       # прогнать детектор по записи
+    python3 -m pi_monitor.motion record frames.npy --seconds 30
+    python3 -m pi_monitor.motion bench                   # стоимость кадра и доля ядра
+"""
+
+import argparse
+import io
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+def build_mask(shape, regions=None, ignore=None):
+    """Маска областей: regions — где искать, ignore — что исключить
+
+    Области задаются долями кадра (x0, y0, x1, y1), чтобы не зависеть от разрешения.
+    Возвращает None, если весь кадр учитывается
+    """
+    if not regions and not ignore:
+        return None
+    height, width = shape
+
+    def box(region):
+        x0, y0, x1, y1 = region
+        return (slice(int(round(y0 * height)), int(round(y1 * height))),
+                slice(int(round(x0 * width)), int(round(x1 * width))))
+
+    mask = np.zeros(shape, dtype=bool) if regions else np.ones(shape, dtype=bool)
+    for region in regions or ():
+        mask[box(region)] = True
+    for region in ignore or ():
+        mask[box(region)] = False
+    if not mask.any():
+        raise ValueError("Маска движения пуста: проверьте MOTION_REGIONS и MOTION_IGNORE")
+    return mask
+
+@dataclass
+class MotionResult:
+    """Результат одного кадра"""
+    motion: bool
+    area: float  # Доля изменившихся пикселей внутри маски
+    bbox: tuple = None  # (x0, y0, x1, y1) долями кадра
+    relit: bool = False  # Изменился почти весь кадр: свет или автоэкспозиция, а не движение
+
+@dataclass
+class MotionEvent:
+    """Обнаруженное движение"""
+    timestamp: float
+    area: float
+    bbox: tuple
+    jpeg: bytes = None  # Полноразмерный кадр, на котором сработал детектор
+
+class MotionDetector:
+    """Разность кадра с фоном (скользящее среднее) с порогом, маской и подтверждением"""
+
+    def __init__(self, shape, mask=None, alpha=0.05, threshold=25, min_area=0.01, max_area=0.6,
+                 min_frames=2):
+        self.shape = tuple(shape)
+        self.mask = mask
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_area = min_area
+        self.max_area = max_area
+        self.min_frames = min_frames
+        self.frames = 0
+        self.background = None
+        self._pixels = int(mask.sum()) if mask is not None else self.shape[0] * self.shape[1]
+        self._diff = np.empty(self.shape, dtype=np.float32)
+        self._abs = np.empty(self.shape, dtype=np.float32)
+        self._changed = np.empty(self.shape, dtype=bool)
+        self._streak = 0
+
+    def reset(self):
+        """Забывает фон (например, после смены настроек камеры)"""
+        self.background = None
+        self._streak = 0
+
+    def update(self, frame):
+        """Обрабатывает кадр (uint8, shape) и обновляет фон"""
+        if frame.shape != self.shape:
+            raise ValueError(f"Кадр {frame.shape} не совпадает с размером детектора {self.shape}")
+        self.frames += 1
+        if self.background is None:
+            self.background = frame.astype(np.float32)
+            return MotionResult(False, 0.0)
+
+        np.subtract(frame, self.background, out=self._diff)
+        np.abs(self._diff, out=self._abs)
+        np.greater(self._abs, self.threshold, out=self._changed)
+        if self.mask is not None:
+            np.logical_and(self._changed, self.mask, out=self._changed)
+        area = np.count_nonzero(self._changed) / self._pixels
+
+        if area > self.max_area:
+            # Резкая смена освещения: принимаем кадр как новый фон
+            self.background[...] = frame
+            self._streak = 0
+            return MotionResult(False, area, relit=True)
+
+        # Фон медленно догоняет сцену: остановившийся предмет со временем становится фоном
+        np.multiply(self._diff, self.alpha, out=self._diff)
+        self.background += self._diff
+
+        if area < self.min_area:
+            self._streak = 0
+            return MotionResult(False, area)
+        self._streak += 1
+        if self._streak < self.min_frames:
+            return MotionResult(False, area)
+        return MotionResult(True, area, self._bbox())
+
+    def _bbox(self):
+        rows = np.flatnonzero(self._changed.any(axis=1))
+        cols = np.flatnonzero(self._changed.any(axis=0))
+        height, width = self.shape
+        return (cols[0] / width, rows[0] / height, (cols[-1] + 1) / width, (rows[-1] + 1) / height)
+
+def decode_gray(jpeg, size):
+    """JPEG -> массив uint8 (высота, ширина) размера size=(ширина, высота)
+
+    draft() включает масштабирование в самом декодере JPEG (1/2, 1/4, 1/8),
+    поэтому полный кадр 1280x720 не распаковывается
+    """
+    from PIL import Image
+    image = Image.open(io.BytesIO(jpeg))
+    image.draft('L', size)
+    image = image.convert('L')
+    if image.size != tuple(size):
+        image = image.resize(size, Image.BILINEAR)
+    return np.asarray(image)
+
+class JpegFrames:
+    """Кадры из потока захвата (CaptureWorker): уменьшенный серый кадр и исходный JPEG"""
+
+    def __init__(self, get_jpeg, size=(160, 90)):
+        self._get_jpeg = get_jpeg
+        self.size = tuple(size)
+        self.shape = (self.size[1], self.size[0])
+        self._last_jpeg = None
+        self.repeated = 0
+
+    def read(self):
+        """(кадр, JPEG) или (None, None), если камера еще не прислала новый кадр"""
+        jpeg = self._get_jpeg()
+        if jpeg is self._last_jpeg:
+            # Поток камеры медленнее детектора: тот же кадр не декодируем повторно
+            self.repeated += 1
+            return None, None
+        self._last_jpeg = jpeg
+        return decode_gray(jpeg, self.size), jpeg
+
+    def close(self):
+        pass
+
+class RecordedFrames:
+    """Записанная последовательность кадров (.npy, массив N×высота×ширина uint8) вместо камеры"""
+
+    def __init__(self, path, loop=False):
+        self.frames = np.load(path, mmap_mode='r')
+        if self.frames.ndim != 3 or self.frames.dtype != np.uint8:
+            raise ValueError(f"{path}: нужен массив uint8 формы (кадры, высота, ширина)")
+        self.shape = self.frames.shape[1:]
+        self.loop = loop
+        self.position = 0
+
+    def read(self):
+        """(кадр, None); EOFError в конце записи"""
+        if self.position >= len(self.frames):
+            if not self.loop:
+                raise EOFError("Запись кадров закончилась")
+            self.position = 0
+        frame = np.asarray(self.frames[self.position])
+        self.position += 1
+        return frame, None
+
+    def close(self):
+        pass
+
+class MotionWatcher:
+    """Фоновый поток: берет кадры с заданной частотой, прогоняет детектор, сообщает о движении
+
+    on_motion(event) вызывается из потока детектора; не чаще раза в cooldown секунд
+    """
+
+    def __init__(self, source, detector, on_motion, fps=4, cooldown=60):
+        self.source = source
+        self.detector = detector
+        self.on_motion = on_motion
+        self.fps = fps
+        self.cooldown = cooldown
+        self.events = 0
+        self.last_event = None
+        self.last_error = None
+        self.busy = 0.0  # Процессорное время потока детектора (секунды)
+        self.started = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+        self._stop.clear()
+        self.started = time.monotonic()
+        self.busy = 0.0
+        self._thread = threading.Thread(target=self._run, name='motion', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.source.close()
+
+    def process(self, frame, jpeg=None, now=None):
+        """Один кадр; возвращает MotionEvent, если пора сообщить о движении"""
+        result = self.detector.update(frame)
+        if not result.motion:
+            return None
+        now = time.time() if now is None else now
+        if self.last_event is not None and now - self.last_event.timestamp < self.cooldown:
+            return None
+        self.last_event = MotionEvent(now, result.area, result.bbox, jpeg)
+        self.events += 1
+        return self.last_event
+
+    def _run(self):
+        interval = 1.0 / self.fps
+        next_frame = time.monotonic()
+        while not self._stop.is_set():
+            started = time.thread_time()
+            try:
+                frame, jpeg = self.source.read()
+                event = self.process(frame, jpeg) if frame is not None else None
+                self.last_error = None
+                if event is not None:
+                    self.on_motion(event)
+            except EOFError:
+                logger.info("Motion source finished")
+                break
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Motion detector error: {e}")
+            finally:
+                self.busy += time.thread_time() - started
+            # Планируем от расписания, а не от конца кадра, чтобы частота не «уплывала»
+            next_frame += interval
+            delay = next_frame - time.monotonic()
+            if delay < 0:
+                next_frame = time.monotonic()
+                delay = 0
+            self._stop.wait(delay)
+
+    def stats(self):
+        """Кадры, срабатывания и доля одного ядра, занятая детектором"""
+        elapsed = time.monotonic() - self.started if self.started else 0.0
+        frames = self.detector.frames
+        return {
+            'frames': frames,
+            'events': self.events,
+            'cpu_percent': self.busy / elapsed * 100 if elapsed else 0.0,
+            'ms_per_frame': self.busy / frames * 1000 if frames else 0.0,
+        }
+
+def format_motion_stats(stats):
+    """Форматирует счетчики детектора одной строкой"""
+    return (f"кадров {stats['frames']}, срабатываний {stats['events']}, "
+            f"{stats['ms_per_frame']:.1f} мс на кадр, {stats['cpu_percent']:.1f}% ядра")
+
+def synthesize_frames(count=120, shape=(90, 160), seed=1, moving=range(60, 80)):
+    """Тестовая запись: шумный статичный фон и квадрат, который движется в кадрах moving"""
+    rng = np.random.default_rng(seed)
+    height, width = shape
+    scene = np.tile(np.linspace(40, 200, width, dtype=np.float32), (height, 1))
+    frames = np.empty((count,) + tuple(shape), dtype=np.uint8)
+    side = height // 4
+    for index in range(count):
+        frame = scene + rng.normal(0, 4, shape).astype(np.float32)
+        if index in moving:
+            x = int((index - moving.start) / max(1, len(moving)) * (width - side))
+            frame[height // 3:height // 3 + side, x:x + side] = 250
+        frames[index] = np.clip(frame, 0, 255)
+    return frames
+
+def _replay(args):
+    source = RecordedFrames(args.path)
+    detector = MotionDetector(source.shape, threshold=args.threshold, min_area=args.min_area)
+    motion_frames = []
+    started = time.perf_counter()
+    while True:
+        try:
+            frame, _ = source.read()
+        except EOFError:
+            break
+        if detector.update(frame).motion:
+            motion_frames.append(source.position - 1)
+    elapsed = time.perf_counter() - started
+    print(f"Кадров: {detector.frames}, {source.shape[1]}x{source.shape[0]}")
+    print(f"Движение в кадрах: {motion_frames or 'нет'}")
+    print(f"Детектор: {elapsed / detector.frames * 1e6:.0f} мкс на кадр")
+
+def _record(args):
+    from pi_monitor.camera import CaptureWorker, create_backend
+    worker = CaptureWorker(create_backend(args.backend, args.device, args.resolution, args.fps,
+                                          fake_path=args.fake_path))
+    worker.start()
+    source = JpegFrames(worker.get_frame, (args.width, args.height))
+    frames = []
+    deadline = time.monotonic() + args.seconds
+    try:
+        while time.monotonic() < deadline:
+            frame, _ = source.read()
+            if frame is not None:
+                frames.append(frame)
+            time.sleep(1.0 / args.fps)
+    finally:
+        worker.stop()
+    np.save(args.path, np.stack(frames))
+    print(f"Записано кадров: {len(frames)} -> {args.path}")
+
+def _bench(args):
+    from PIL import Image
+    width, height = (int(v) for v in args.resolution.split('x'))
+    # Шумный кадр сжимается примерно как настоящий снимок
+    noise = np.random.default_rng(0).integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(noise).resize((width, height)).save(buffer, 'JPEG', quality=85)
+    jpeg = buffer.getvalue()
+    size = (args.width, args.height)
+    detector = MotionDetector((args.height, args.width))
+    frames = synthesize_frames(args.frames, (args.height, args.width))
+
+    started = time.thread_time()
+    for _ in range(args.frames):
+        decode_gray(jpeg, size)
+    decode = (time.thread_time() - started) / args.frames
+    started = time.thread_time()
+    for frame in frames:
+        detector.update(frame)
+    detect = (time.thread_time() - started) / args.frames
+
+    total = decode + detect
+    print(f"Декодирование JPEG {args.resolution} -> {args.width}x{args.height}: {decode * 1000:.2f} мс")
+    print(f"Детектор: {detect * 1000:.3f} мс")
+    print(f"При {args.fps} кадрах/с: {total * args.fps * 100:.1f}% одного ядра")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Детектор движения: запись, воспроизведение, замер")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    synth = sub.add_parser('synth', help="создать тестовую запись с движением")
+    synth.add_argument('path')
+    synth.add_argument('--frames', type=int, default=120)
+
+    replay = sub.add_parser('replay', help="прогнать детектор по записи .npy")
+    replay.add_argument('path')
+    replay.add_argument('--threshold', type=float, default=25)
+    replay.add_argument('--min-area', type=float, default=0.01)
+
+    record = sub.add_parser('record', help="записать кадры с камеры в .npy")
+    record.add_argument('path')
+    record.add_argument('--seconds', type=float, default=30)
+    record.add_argument('--backend', default='ffmpeg')
+    record.add_argument('--device', default='/dev/video0')
+    record.add_argument('--resolution', default='1280x720')
+    record.add_argument('--fake-path')
+    record.add_argument('--fps', type=float, default=4)
+    record.add_argument('--width', type=int, default=160)
+    record.add_argument('--height', type=int, default=90)
+
+    bench = sub.add_parser('bench', help="стоимость кадра и доля ядра")
+    bench.add_argument('--resolution', default='1280x720')
+    bench.add_argument('--width', type=int, default=160)
+    bench.add_argument('--height', type=int, default=90)
+    bench.add_argument('--fps', type=float, default=4)
+    bench.add_argument('--frames', type=int, default=200)
+
+    args = parser.parse_args(argv)
+    if args.command == 'synth':
+        np.save(args.path, synthesize_frames(args.frames))
+        print(f"Записано кадров: {args.frames} -> {args.path}")
+    elif args.command == 'replay':
+        _replay(args)
+    elif args.command == 'record':
+        _record(args)
+    else:
+        _bench(args)
+
+if __name__ == '__main__':
+    main()
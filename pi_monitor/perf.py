@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Самоизмерение бота
+Время обработчиков, этапов сбора метрик и задержка цикла событий копятся
+в гистограммах с фиксированными корзинами: память не растет со временем работы,
+а запись одного замера — пара сравнений и инкремент
+"""
+
+import asyncio
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+from pi_monitor.metrics import format_uptime
+
+# Текущий замер задачи: обработчик, который сам ловит исключение, отмечает в нем ошибку
+_current = contextvars.ContextVar('perf_measurement', default=None)
+
+# Верхние границы корзин в миллисекундах; последняя корзина — все, что дольше
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+class LatencyHistogram:
+    """Гистограмма длительностей с фиксированными корзинами и счетчиком ошибок"""
+
+    def __init__(self, buckets=BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, ms, error=False):
+        """Добавляет одну длительность (в миллисекундах)"""
+        index = bisect.bisect_left(self.buckets, ms)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+            if error:
+                self.errors += 1
+
+    def percentile(self, fraction):
+        """Оценка перцентиля: линейная интерполяция внутри корзины"""
+        if not self.count:
+            return None
+        target = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= target and bucket_count:
+                low = self.buckets[index - 1] if index else 0.0
+                high = self.buckets[index] if index < len(self.buckets) else self.max_ms
+                value = low + (high - low) * (target - seen) / bucket_count
+                return min(value, self.max_ms)
+            seen += bucket_count
+        return self.max_ms
+
+class PerfRegistry:
+    """Набор гистограмм по именам"""
+
+    def __init__(self):
+        self.histograms = {}
+        self.started = time.monotonic()
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms.setdefault(name, LatencyHistogram())
+        return histogram
+
+    def observe(self, name, ms, error=False):
+        self.histogram(name).observe(ms, error)
+
+    @contextmanager
+    def measure(self, name):
+        """Меряет блок кода (в том числе с await внутри); исключение или mark_error() — ошибка"""
+        started = time.perf_counter()
+        marked = [False]
+        token = _current.set(marked)
+        error = True
+        try:
+            yield
+            error = marked[0]
+        finally:
+            _current.reset(token)
+            self.observe(name, (time.perf_counter() - started) * 1000, error)
+
+    def timed(self, name):
+        """Декоратор для корутин: длительность и ошибки каждого вызова"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with self.measure(name):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def call(self, name, func, *args):
+        """Вызывает обычную функцию (например, в пуле потоков) и меряет ее"""
+        with self.measure(name):
+            return func(*args)
+
+    def uptime(self):
+        return time.monotonic() - self.started
+
+# Общий реестр процесса
+registry = PerfRegistry()
+
+timed = registry.timed
+measure = registry.measure
+
+def mark_error():
+    """Отмечает ошибкой текущий замер, если ошибка обработана без исключения (ответ пользователю)"""
+    marked = _current.get()
+    if marked is not None:
+        marked[0] = True
+
+class LoopLagMonitor:
+    """Меряет, насколько позже запланированного просыпается цикл событий"""
+
+    def __init__(self, interval=0.5, name='event_loop_lag', perf=registry):
+        self.interval = interval
+        self.name = name
+        self.perf = perf
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            # Задержка = время, которое цикл был занят чужим кодом сверх интервала
+            self.perf.observe(self.name, max(0.0, loop.time() - expected) * 1000)
+
+def _format_ms(value):
+    if value is None:
+        return "—"
+    return f"{value:.0f}" if value >= 10 else f"{value:.1f}"
+
+def format_perf_message(perf=registry):
+    """Таблица p50/p95/p99 по всем гистограммам для команды /perf"""
+    message = (f"⏱ <b>Производительность</b>\n"
+               f"Время работы бота: {format_uptime(perf.uptime())}\n\n")
+    if not perf.histograms:
+        return message + "<i>Замеров пока нет</i>"
+    width = max(len(name) for name in perf.histograms)
+    lines = [f"{'':<{width}} {'n':>6} {'ош':>4} {'p50':>6} {'p95':>6} {'p99':>6} {'макс':>6}"]
+    for name in sorted(perf.histograms):
+        h = perf.histograms[name]
+        lines.append(f"{name:<{width}} {h.count:>6} {h.errors:>4} {_format_ms(h.percentile(0.5)):>6} "
+                     f"{_format_ms(h.percentile(0.95)):>6} {_format_ms(h.percentile(0.99)):>6} "
+                     f"{_format_ms(h.max_ms):>6}")
+    return message + "<pre>" + "\n".join(lines) + "</pre>\n<i>Время в миллисекундах</i>"
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Общие снимки с камеры для /photo
+Снимок хранится в памяти и переиспользуется в пределах окна свежести,
+а после первой загрузки повторно отправляется по file_id Telegram
+"""
+
+import asyncio
+import contextlib
+import functools
+import logging
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Лимит Telegram на число фото в одном альбоме
+ALBUM_LIMIT = 10
+
+# Счетчики отправок: сколько раз JPEG загружался и сколько раз хватило file_id
+upload_stats = {'uploads': 0, 'file_id_reused': 0}
+
+@dataclass
+class Photo:
+    """Снимок с камеры"""
+    data: bytes
+    timestamp: float
+    file_id: str = None
+    # Одновременные отправки одного снимка ждут первую загрузку, чтобы взять ее file_id
+    _upload_lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False, compare=False)
+
+async def send_photo(message, photo, caption=None, reply_markup=None, on_upload=None):
+    """Отправляет снимок ответом на сообщение, по возможности без повторной загрузки
+
+    on_upload(байты, секунды) вызывается только при настоящей загрузке JPEG, не по file_id
+    """
+    send = functools.partial(message.reply_photo, reply_markup=reply_markup)
+    return await _send(send, photo, caption, on_upload)
+
+async def send_photo_to_chat(bot, chat_id, photo, caption=None):
+    """Отправляет снимок в чат (оповещения): первый чат загружает JPEG, остальные получают file_id"""
+    return await _send(functools.partial(bot.send_photo, chat_id), photo, caption)
+
+async def _send(send, photo, caption, on_upload=None):
+    async with photo._upload_lock:
+        if photo.file_id is not None:
+            try:
+                sent = await send(photo.file_id, caption=caption)
+                upload_stats['file_id_reused'] += 1
+                return sent
+            except Exception as e:
+                # file_id мог устареть: загружаем байты заново
+                logger.warning(f"Resend by file_id failed, uploading again: {e}")
+                photo.file_id = None
+
+        started = time.monotonic()
+        sent = await send(photo.data, caption=caption)
+        upload_stats['uploads'] += 1
+        if on_upload is not None:
+            on_upload(len(photo.data), time.monotonic() - started)
+        if sent is not None and sent.photo:
+            # Последний элемент — самый крупный размер, его и переиспользуем
+            photo.file_id = sent.photo[-1].file_id
+        return sent
+
+async def send_album(message, items):
+    """Отправляет снимки [(снимок, подпись)] альбомами по 10; уже загруженные — по file_id"""
+    sent = []
+    for start in range(0, len(items), ALBUM_LIMIT):
+        sent += await _send_album(message, items[start:start + ALBUM_LIMIT])
+    return sent
+
+async def _send_album(message, items):
+    from telegram import InputMediaPhoto
+
+    def media(by_file_id):
+        return [InputMediaPhoto(photo.file_id if by_file_id and photo.file_id else photo.data, caption=caption)
+                for photo, caption in items]
+
+    async with contextlib.AsyncExitStack() as stack:
+        # Замки берутся в одном порядке, поэтому альбомы и одиночные отправки не блокируют друг друга
+        for photo, _ in items:
+            await stack.enter_async_context(photo._upload_lock)
+        reused = sum(photo.file_id is not None for photo, _ in items)
+        try:
+            sent = await message.reply_media_group(media(True))
+        except Exception as e:
+            if not reused:
+                raise
+            logger.warning(f"Album resend by file_id failed, uploading again: {e}")
+            reused = 0
+            sent = await message.reply_media_group(media(False))
+        upload_stats['uploads'] += len(items) - reused
+        upload_stats['file_id_reused'] += reused
+        for (photo, _), sent_message in zip(items, sent or ()):
+            if sent_message.photo:
+                photo.file_id = sent_message.photo[-1].file_id
+        return list(sent or ())
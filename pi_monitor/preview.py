@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+Превью снимков для медленного канала
+/photo сначала отправляет маленькое сильно сжатое превью, а полный кадр — по кнопке.
+Размер превью подбирается под измеренную скорость загрузки в Telegram: чем медленнее
+канал, тем меньше байт. Пережатие идет в отдельном процессе (Pillow), чтобы не
+занимать цикл событий и GIL бота
+
+Запуск из корня репозитория:
+    python3 -m pi_monitor.preview photo.jpg 30000
+"""
+
+import asyncio
+import io
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+MIN_QUALITY = 20
+MAX_QUALITY = 85
+MIN_SIDE = 160
+
+def _resize(image, side):
+    copy = image.copy()
+    copy.thumbnail((side, side))
+    return copy
+
+def _encode(image, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality)
+    return buffer.getvalue()
+
+def fit_preview(jpeg, target_bytes, max_side=640):
+    """Пережимает JPEG не больше target_bytes: (данные, сторона, качество)
+
+    Качество подбирается двоичным поиском, а если даже минимальное не помещается,
+    уменьшается сторона. Кадр масштабируется один раз на каждую сторону, шаги поиска
+    только перекодируют его. Выполняется в процессе пула
+    """
+    from PIL import Image
+    image = Image.open(io.BytesIO(jpeg))
+    # Декодер JPEG сразу уменьшает кадр в 2/4/8 раз, полный кадр не распаковывается
+    image.draft('RGB', (max_side, max_side))
+    image = image.convert('RGB')
+
+    side = max_side
+    while True:
+        resized = _resize(image, side)
+        low, high = MIN_QUALITY, MAX_QUALITY
+        best = None
+        while low <= high:
+            quality = (low + high) // 2
+            data = _encode(resized, quality)
+            if len(data) <= target_bytes:
+                best = (data, side, quality)
+                low = quality + 1
+            else:
+                high = quality - 1
+        if best is not None:
+            return best
+        if side <= MIN_SIDE:
+            # Меньше уже некуда: отдаем самое маленькое, что получилось
+            return data, side, MIN_QUALITY
+        side = max(MIN_SIDE, int(side * 0.7))
+
+class UploadMeter:
+    """Скользящая оценка скорости загрузки фото в Telegram (байт в секунду)"""
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.throughput = None
+        self.samples = 0
+
+    def observe(self, size, seconds):
+        """Учитывает одну загрузку: size байт за seconds секунд (вместе с задержкой сети)"""
+        if seconds <= 0:
+            return
+        rate = size / seconds
+        self.throughput = rate if self.throughput is None else \
+            self.throughput + self.alpha * (rate - self.throughput)
+        self.samples += 1
+
+    def target_bytes(self, seconds, default, minimum, maximum):
+        """Сколько байт успеет загрузиться за seconds секунд (в пределах minimum..maximum)"""
+        if self.throughput is None:
+            return default
+        # Скорость измерена вместе с задержкой, поэтому размер сходится к тому,
+        # что реально доходит за seconds, а при большой задержке — к minimum
+        return int(min(maximum, max(minimum, self.throughput * seconds)))
+
+class PreviewPool:
+    """Один рабочий процесс для пережатия; запускается при первом превью"""
+
+    def __init__(self, workers=1):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                import multiprocessing
+                from concurrent.futures import ProcessPoolExecutor
+                # forkserver: рабочий процесс не наследует потоки бота (камера, детектор)
+                method = 'forkserver' if sys.platform.startswith('linux') else None
+                context = multiprocessing.get_context(method)
+                if method == 'forkserver':
+                    context.set_forkserver_preload(['pi_monitor.preview'])
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=context)
+            return self._executor
+
+    async def fit(self, jpeg, target_bytes, max_side=640):
+        from concurrent.futures.process import BrokenProcessPool
+        loop = asyncio.get_running_loop()
+        executor = self.executor()
+        try:
+            return await loop.run_in_executor(executor, fit_preview, jpeg, target_bytes, max_side)
+        except BrokenProcessPool:
+            # Рабочий процесс упал (например, OOM): следующее превью запустит новый
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False)
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True, cancel_futures=True)
+                self._executor = None
+
+def format_upload_stats(meter):
+    """Оценка скорости канала одной строкой"""
+    if meter.throughput is None:
+        return "скорость загрузки еще не измерена"
+    return f"загрузка ≈ {meter.throughput / 1024:.0f} КБ/с по {meter.samples} отправкам"
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Использование: python3 -m pi_monitor.preview photo.jpg целевой_размер_в_байтах")
+        return
+    with open(argv[0], 'rb') as photo_file:
+        jpeg = photo_file.read()
+    started = time.perf_counter()
+    data, side, quality = fit_preview(jpeg, int(argv[1]))
+    elapsed = time.perf_counter() - started
+    print(f"{len(jpeg)} -> {len(data)} байт: сторона {side}, качество {quality}, {elapsed * 1000:.0f} мс")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""
+Запуск бота: long polling или webhook
+В режиме webhook Telegram сам присылает обновления на встроенный HTTP(S)-сервер,
+поэтому не нужно держать постоянный запрос getUpdates
+"""
+
+import secrets
+from urllib.parse import urlparse
+
+UPDATE_MODES = ('polling', 'webhook')
+
+def webhook_settings(url, listen='0.0.0.0', port=8443, secret=None, cert=None, key=None,
+                     max_connections=40):
+    """Параметры run_webhook по публичному адресу бота"""
+    if not url:
+        raise ValueError("Для режима webhook нужен WEBHOOK_URL (публичный адрес бота)")
+    return {
+        'listen': listen,
+        'port': port,
+        # Путь локального сервера совпадает с путем в публичном адресе
+        'url_path': urlparse(url).path.lstrip('/'),
+        'webhook_url': url,
+        # Без секрета любой, кто знает адрес, мог бы присылать поддельные обновления
+        'secret_token': secret or secrets.token_urlsafe(32),
+        'cert': cert,
+        'key': key,
+        'max_connections': max_connections,
+    }
+
+def run_application(application, mode='polling', **webhook):
+    """Запускает приложение в выбранном режиме (блокирует до остановки)"""
+    if mode == 'polling':
+        application.run_polling()
+    elif mode == 'webhook':
+        application.run_webhook(**webhook_settings(**webhook))
+    else:
+        raise ValueError(f"Неизвестный режим: {mode} (допустимо: {', '.join(UPDATE_MODES)})")
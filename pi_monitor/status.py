@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Статус системы для Telegram-ботов
+Коллекторы метрик, асинхронный сбор и форматирование сообщения /status
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from pi_monitor import metrics, perf
+from pi_monitor.facts import get_static_facts
+
+logger = logging.getLogger(__name__)
+
+COLLECTOR_TIMEOUT = 5  # Таймаут одного коллектора метрик (секунды)
+
+# Пороги статусов (используются и в /status, и в правилах оповещений)
+THRESHOLDS = {
+    'temperature_warning': 50,  # °C, повышенная
+    'temperature_critical': 70,  # °C, критическая
+    'load_warning_per_core': 0.7,  # загрузка за 1 мин на ядро, повышенная
+    'load_critical_per_core': 1.5,  # загрузка за 1 мин на ядро, высокая
+    'memory_percent': 80,  # % занятой памяти
+    'disk_percent': 90,  # % занятого места на корневом разделе
+    'core_busy_percent': 90,  # % занятости одного ядра, при котором ядро выделяется в /status
+}
+
+# Незавершенные вызовы коллекторов (зависший коллектор не запускается повторно)
+_pending_collectors = {}
+
+def _unavailable(keys, status_key, reason):
+    """Возвращает заполненный словарь для недоступной метрики"""
+    result = {key: "Недоступно" for key in keys}
+    result[status_key] = reason
+    return result
+
+def _gb(num_bytes):
+    """Форматирует размер в гигабайтах"""
+    return f"{num_bytes / 1024 / 1024 / 1024:.1f} GB"
+
+def collect_temperature():
+    """Коллектор температуры CPU"""
+    try:
+        temp = metrics.read_temperature()
+    except Exception as e:
+        return _unavailable(['temperature'], 'temp_status', f"❌ Ошибка: {e}")
+    
+    status = {'temperature': f"{temp:.1f}°C", 'values': {'temperature': temp}}
+    if temp < THRESHOLDS['temperature_warning']:
+        status['temp_status'] = "✅ Нормальная"
+    elif temp < THRESHOLDS['temperature_critical']:
+        status['temp_status'] = "⚠ Повышенная"
+    else:
+        status['temp_status'] = "❌ Критическая!"
+    return status
+
+def collect_cpu_load():
+    """Коллектор загрузки CPU"""
+    try:
+        load = metrics.read_loadavg()
+        cores = get_static_facts().cpu_count
+    except Exception as e:
+        return _unavailable(['cpu_load_1', 'cpu_load_5', 'cpu_load_15'], 'cpu_status', f"❌ Ошибка: {e}")
+    
+    status = {
+        'cpu_load_1': f"{load.load_1:.2f}",
+        'cpu_load_5': f"{load.load_5:.2f}",
+        'cpu_load_15': f"{load.load_15:.2f}",
+        'values': {'load_1': load.load_1, 'load_5': load.load_5, 'load_15': load.load_15},
+    }
+    if load.load_1 < cores * THRESHOLDS['load_warning_per_core']:
+        status['cpu_status'] = "✅ Нормальная"
+    elif load.load_1 < cores * THRESHOLDS['load_critical_per_core']:
+        status['cpu_status'] = "⚠ Повышенная"
+    else:
+        status['cpu_status'] = "❌ Высокая"
+    return status
+
+# Предыдущий снимок /proc/stat для расчета использования CPU между вызовами
+_cpu_tracker = metrics.CpuUsageTracker()
+
+def collect_cpu_usage():
+    """Коллектор использования CPU по /proc/stat (общее и по ядрам)"""
+    try:
+        usage = _cpu_tracker.update()
+        total = usage[0]
+    except Exception as e:
+        return {'cpu_usage': None, 'cpu_usage_status': f"❌ Ошибка: {e}"}
+    
+    cores = usage[1:]
+    pinned = [core for core in cores if core.busy >= THRESHOLDS['core_busy_percent']]
+    if pinned:
+        names = ', '.join(core.name for core in pinned)
+        cpu_usage_status = f"⚠ Полностью загружены: {names}"
+    else:
+        cpu_usage_status = "✅ Нормальное"
+    return {
+        'cpu_usage': total,
+        'cpu_cores': cores,
+        'cpu_usage_status': cpu_usage_status,
+        'values': {'cpu_percent': total.busy, 'cpu_iowait': total.iowait, 'cpu_steal': total.steal,
+                   'cpu_core_max': max((core.busy for core in cores), default=total.busy)},
+    }
+
+def collect_memory():
+    """Коллектор использования памяти"""
+    try:
+        mem = metrics.read_meminfo()
+        if not mem.total:
+            # MemTotal не меняется, берем его из статических сведений
+            mem.total = get_static_facts().memory_total
+        usage_percent = (mem.used / mem.total) * 100
+    except Exception as e:
+        return _unavailable(['memory_total', 'memory_used', 'memory_available', 'memory_usage'],
+                            'memory_status', f"❌ Ошибка: {e}")
+    
+    status = {
+        'memory_total': _gb(mem.total),
+        'memory_used': _gb(mem.used),
+        'memory_available': _gb(mem.available),
+        'memory_usage': f"{usage_percent:.1f}%",
+        'values': {'memory_used': float(mem.used), 'memory_percent': usage_percent},
+    }
+    if usage_percent < THRESHOLDS['memory_percent']:
+        status['memory_status'] = "✅ Нормальное"
+    else:
+        status['memory_status'] = "⚠ Высокое"
+    return status
+
+def collect_uptime():
+    """Коллектор времени работы системы"""
+    try:
+        uptime_seconds = metrics.read_uptime()
+        return {'uptime': metrics.format_uptime(uptime_seconds), 'values': {'uptime': uptime_seconds}}
+    except Exception:
+        return {'uptime': "Недоступно"}
+
+def collect_disk():
+    """Коллектор свободного места на корневом разделе"""
+    try:
+        disk = metrics.read_disk_usage('/')
+    except Exception as e:
+        return _unavailable(['disk_usage', 'disk_available'], 'disk_status', f"❌ Ошибка: {e}")
+    
+    status = {
+        'disk_usage': str(disk.percent),
+        'disk_available': metrics.format_size(disk.available),
+        'values': {'disk_percent': float(disk.percent), 'disk_available': float(disk.available)},
+    }
+    if disk.percent < THRESHOLDS['disk_percent']:
+        status['disk_status'] = "✅ Достаточно"
+    else:
+        status['disk_status'] = "⚠ Мало места"
+    return status
+
+# Коллекторы метрик: имя -> (функция, поля, поле статуса)
+COLLECTORS = {
+    'temperature': (collect_temperature, ['temperature'], 'temp_status'),
+    'cpu_load': (collect_cpu_load, ['cpu_load_1', 'cpu_load_5', 'cpu_load_15'], 'cpu_status'),
+    'cpu_usage': (collect_cpu_usage, [], 'cpu_usage_status'),
+    'memory': (collect_memory, ['memory_total', 'memory_used', 'memory_available', 'memory_usage'],
+               'memory_status'),
+    'uptime': (collect_uptime, [], 'uptime'),
+    'disk': (collect_disk, ['disk_usage', 'disk_available'], 'disk_status'),
+}
+
+# Пул потоков для блокирующих коллекторов (по одному потоку на метрику: ожидание
+# в очереди пула не съедает таймаут коллектора)
+_collector_executor = ThreadPoolExecutor(max_workers=len(COLLECTORS), thread_name_prefix='collector')
+
+def _merge_results(results):
+    """Объединяет результаты коллекторов в один словарь статуса"""
+    status = {'values': {}, 'timestamp': time.time()}
+    for result in results:
+        for key, value in result.items():
+            if key == 'values':
+                status['values'].update(value)
+            else:
+                status[key] = value
+    return status
+
+def get_system_status():
+    """Получает статус системы
+    
+    Помимо строк для сообщения, в status['values'] лежат числовые значения метрик
+    """
+    return _merge_results([collector() for collector, _, _ in COLLECTORS.values()])
+
+async def _run_collector(name):
+    """Запускает один коллектор в пуле потоков с собственным таймаутом"""
+    collector, keys, status_key = COLLECTORS[name]
+    
+    future = _pending_collectors.get(name)
+    if future is None or future.done():
+        loop = asyncio.get_running_loop()
+        # Время коллектора меряется в самом потоке, без ожидания в очереди пула
+        future = loop.run_in_executor(_collector_executor, perf.registry.call,
+                                      f'collector.{name}', collector)
+        _pending_collectors[name] = future
+    
+    try:
+        # shield: по таймауту отменяется только ожидание, а не сам вызов
+        return await asyncio.wait_for(asyncio.shield(future), COLLECTOR_TIMEOUT)
+    except asyncio.TimeoutError:
+        logger.warning(f"Collector '{name}' timed out after {COLLECTOR_TIMEOUT}s")
+        return _unavailable(keys, status_key, "❌ Превышено время ожидания")
+    except Exception as e:
+        logger.error(f"Collector '{name}' failed: {e}")
+        return _unavailable(keys, status_key, f"❌ Ошибка: {e}")
+
+async def get_system_status_async():
+    """Получает статус системы, не блокируя цикл событий"""
+    with perf.measure('collector.all'):
+        results = await asyncio.gather(*(_run_collector(name) for name in COLLECTORS))
+    return _merge_results(results)
+
+def _format_cpu_usage(status):
+    """Строки использования CPU по типизированным значениям из collect_cpu_usage()"""
+    total = status.get('cpu_usage')
+    if not isinstance(total, metrics.CpuUsage):
+        reason = status.get('cpu_usage_status')
+        return f"   Использование: Недоступно\n   {reason}\n" if reason else ""
+    
+    message = f"   Использование: {total.busy:.1f}%\n"
+    message += (f"   user {total.user:.1f}% · sys {total.system:.1f}% · iowait {total.iowait:.1f}%"
+                f" · irq {total.irq:.1f}% · steal {total.steal:.1f}%\n")
+    cores = status.get('cpu_cores') or []
+    if len(cores) > 1:
+        message += "   Ядра: " + " · ".join(f"{core.busy:.0f}%" for core in cores) + "\n"
+    message += f"   {status['cpu_usage_status']}\n"
+    return message
+
+def format_status_message(status, show_updated=True):
+    """Форматирует статус в читаемое сообщение (show_updated=False — без строки времени)"""
+    message = "🖥️ <b>Статус Raspberry Pi</b>\n\n"
+    
+    # Температура
+    message += f"🌡️ <b>Температура CPU:</b> {status['temperature']}\n"
+    message += f"   {status['temp_status']}\n\n"
+    
+    # Загрузка CPU
+    message += f"⚡ <b>Загрузка CPU:</b>\n"
+    message += f"   1 мин: {status['cpu_load_1']}\n"
+    message += f"   5 мин: {status['cpu_load_5']}\n"
+    message += f"   15 мин: {status['cpu_load_15']}\n"
+    message += f"   {status['cpu_status']}\n"
+    message += _format_cpu_usage(status)
+    message += "\n"
+    
+    # Память
+    message += f"🧠 <b>Память:</b>\n"
+    message += f"   Всего: {status['memory_total']}\n"
+    message += f"   Используется: {status['memory_used']} ({status['memory_usage']})\n"
+    message += f"   Доступно: {status['memory_available']}\n"
+    message += f"   {status['memory_status']}\n\n"
+    
+    # Диск
+    message += f"💾 <b>Диск:</b>\n"
+    message += f"   Использование: {status['disk_usage']}%\n"
+    message += f"   Свободно: {status['disk_available']}\n"
+    message += f"   {status['disk_status']}\n\n"
+    
+    # Время работы
+    message += f"⏰ <b>Время работы:</b> {status['uptime']}\n\n"
+    
+    if not show_updated:
+        return message
+    
+    # Время обновления
+    updated = datetime.fromtimestamp(status['timestamp']) if 'timestamp' in status else datetime.now()
+    message += f"🕐 <i>Обновлено: {updated.strftime('%d.%m.%Y %H:%M:%S')}</i>"
+    
+    return message
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Постоянное хранилище метрик на SQLite (режим WAL)
+Замеры пишутся пачками, чтобы реже трогать SD-карту, и сразу сворачиваются
+в 1-минутные и 1-часовые агрегаты; старые данные удаляются по срокам хранения
+"""
+
+import asyncio
+import logging
+import sqlite3
+import threading
+import time
+
+from pi_monitor.history import HISTORY_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Уровни агрегации: таблица -> размер корзины в секундах
+ROLLUPS = {'rollup_1m': 60, 'rollup_1h': 3600}
+
+# Сроки хранения по умолчанию (секунды)
+DEFAULT_RETENTION = {
+    'samples': 2 * 86400,
+    'rollup_1m': 30 * 86400,
+    'rollup_1h': 730 * 86400,
+}
+
+# До какой длины диапазона запрос читает каждую таблицу
+_QUERY_LIMITS = [('samples', 6 * 3600), ('rollup_1m', 14 * 86400), ('rollup_1h', float('inf'))]
+
+class MetricStore:
+    """Хранилище замеров с пакетной записью и автоматическими агрегатами"""
+
+    def __init__(self, path, fields=HISTORY_FIELDS, batch_size=30, flush_interval=60.0,
+                 retention=None, prune_interval=3600.0):
+        self.path = path
+        self.fields = list(fields)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self.prune_interval = prune_interval
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._last_prune = 0.0
+        self._lock = threading.Lock()
+        # Отдельный короткий замок только для буфера: append из цикла событий не ждет записи на диск
+        self._pending_lock = threading.Lock()
+        # Запись идет из пула потоков, поэтому соединение не привязано к потоку
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._init_schema()
+
+    def _init_schema(self):
+        db = self._db
+        db.execute('PRAGMA journal_mode=WAL')
+        # В WAL режим NORMAL не делает fsync на каждую транзакцию, только на контрольных точках
+        db.execute('PRAGMA synchronous=NORMAL')
+        db.execute('CREATE TABLE IF NOT EXISTS samples (ts REAL PRIMARY KEY) WITHOUT ROWID')
+        existing = {row[1] for row in db.execute('PRAGMA table_info(samples)')}
+        for name in self.fields:
+            if name not in existing:
+                db.execute(f'ALTER TABLE samples ADD COLUMN {name} REAL')
+        for table in ROLLUPS:
+            db.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+                metric TEXT NOT NULL,
+                bucket INTEGER NOT NULL,
+                min REAL NOT NULL,
+                max REAL NOT NULL,
+                sum REAL NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (metric, bucket)
+            ) WITHOUT ROWID''')
+        db.commit()
+
+    def append(self, timestamp, values):
+        """Добавляет замер в буфер; возвращает True, если пора записать пачку"""
+        row = (timestamp, tuple(values.get(name) for name in self.fields))
+        with self._pending_lock:
+            self._pending.append(row)
+        return self.flush_due()
+
+    async def record_status(self, status):
+        """Слушатель сборщика: добавляет замер и при необходимости пишет пачку в пуле потоков"""
+        if self.append(status['timestamp'], status['values']):
+            await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def flush_due(self):
+        """Пора ли сбрасывать буфер на диск"""
+        if not self._pending:
+            return False
+        return (len(self._pending) >= self.batch_size or
+                time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def flush(self):
+        """Записывает накопленные замеры и агрегаты одной транзакцией"""
+        with self._lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            self._last_flush = time.monotonic()
+            if not batch:
+                return 0
+            columns = ', '.join(['ts'] + self.fields)
+            placeholders = ', '.join('?' * (len(self.fields) + 1))
+            sql = f'INSERT OR IGNORE INTO samples ({columns}) VALUES ({placeholders})'
+            with self._db:
+                # Повторно записанная отметка времени игнорируется и не попадает в агрегаты дважды
+                inserted = [(ts, row) for ts, row in batch if self._db.execute(sql, (ts,) + row).rowcount]
+                for table, size in ROLLUPS.items():
+                    self._db.executemany(f'''
+                        INSERT INTO {table} (metric, bucket, min, max, sum, count)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (metric, bucket) DO UPDATE SET
+                            min = MIN(min, excluded.min),
+                            max = MAX(max, excluded.max),
+                            sum = sum + excluded.sum,
+                            count = count + excluded.count
+                    ''', self._aggregate(inserted, size))
+            if time.monotonic() - self._last_prune >= self.prune_interval:
+                self._prune()
+            return len(batch)
+
+    def _aggregate(self, batch, size):
+        """Сворачивает пачку замеров в корзины заданного размера до записи в базу"""
+        buckets = {}
+        for ts, row in batch:
+            bucket = int(ts // size) * size
+            for name, value in zip(self.fields, row):
+                if value is None or value != value:
+                    continue
+                key = (name, bucket)
+                agg = buckets.get(key)
+                if agg is None:
+                    buckets[key] = [value, value, value, 1]
+                else:
+                    if value < agg[0]:
+                        agg[0] = value
+                    if value > agg[1]:
+                        agg[1] = value
+                    agg[2] += value
+                    agg[3] += 1
+        return [(name, bucket, *agg) for (name, bucket), agg in buckets.items()]
+
+    def _prune(self):
+        """Удаляет данные старше сроков хранения"""
+        now = time.time()
+        with self._db:
+            self._db.execute('DELETE FROM samples WHERE ts < ?', (now - self.retention['samples'],))
+            for table in ROLLUPS:
+                self._db.execute(f'DELETE FROM {table} WHERE bucket < ?', (now - self.retention[table],))
+        self._last_prune = time.monotonic()
+
+    def query(self, metric, start, end=None):
+        """Возвращает [(время, среднее, мин, макс)] за период, выбирая подходящую детализацию"""
+        if metric not in self.fields:
+            raise ValueError(f"Неизвестная метрика: {metric}")
+        end = time.time() if end is None else end
+        span = end - start
+        table = next(name for name, limit in _QUERY_LIMITS if span <= limit)
+        with self._lock:
+            if table == 'samples':
+                rows = self._db.execute(
+                    f'SELECT ts, {metric}, {metric}, {metric} FROM samples '
+                    f'WHERE ts >= ? AND ts <= ? AND {metric} IS NOT NULL ORDER BY ts',
+                    (start, end)).fetchall()
+            else:
+                rows = self._db.execute(
+                    f'SELECT bucket, sum / count, min, max FROM {table} '
+                    f'WHERE metric = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket',
+                    (metric, int(start // ROLLUPS[table]) * ROLLUPS[table], end)).fetchall()
+        return rows
+
+    def recent_samples(self, seconds):
+        """Возвращает [(время, {метрика: значение})] за последние seconds секунд"""
+        columns = ', '.join(['ts'] + self.fields)
+        with self._lock:
+            rows = self._db.execute(f'SELECT {columns} FROM samples WHERE ts >= ? ORDER BY ts',
+                                    (time.time() - seconds,)).fetchall()
+        return [(row[0], dict(zip(self.fields, row[1:]))) for row in rows]
+
+    def close(self):
+        """Сбрасывает буфер и закрывает базу"""
+        self.flush()
+        with self._lock:
+            self._db.close()
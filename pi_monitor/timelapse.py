@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Таймлапс с камеры
+Кадры снимаются через обычный путь /photo с фиксированным интервалом и пишутся
+на диск в пределах бюджета (самые старые удаляются первыми). Видео кодирует
+отдельный процесс ffmpeg с пониженным приоритетом: цикл событий бота только
+ждет его завершения, а готовый ролик отправляется потоком с диска
+"""
+
+import asyncio
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+FRAME_PREFIX = 'frame_'
+CLIP_NAME = 'timelapse.mp4'
+
+class TimelapseError(Exception):
+    """Ошибка таймлапса"""
+
+class FrameStore:
+    """Кадры на диске с бюджетом: при превышении удаляются самые старые
+
+    Пока идет кодирование (hold), кадры не удаляются, чтобы ffmpeg не потерял
+    файлы из своего списка: на это время бюджет превышается на кадры, снятые
+    во время кодирования, и догоняется сразу после
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.evicted = 0
+        self._frames = deque()  # (путь, размер) от старых к новым
+        self._holds = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        # Кадры, оставшиеся с прошлого запуска, тоже считаются в бюджет
+        for name in sorted(os.listdir(directory)):
+            if name.startswith(FRAME_PREFIX) and name.endswith('.jpg'):
+                path = os.path.join(directory, name)
+                size = os.path.getsize(path)
+                self._frames.append((path, size))
+                self.total_bytes += size
+        self.evict()
+
+    def __len__(self):
+        return len(self._frames)
+
+    def add(self, data, timestamp):
+        """Записывает кадр (вызывать в пуле потоков) и соблюдает бюджет"""
+        # Имя по времени: сортировка по имени совпадает с порядком съемки
+        name = datetime.fromtimestamp(timestamp).strftime(f'{FRAME_PREFIX}%Y%m%d_%H%M%S_%f.jpg')
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as frame_file:
+            frame_file.write(data)
+        with self._lock:
+            self._frames.append((path, len(data)))
+            self.total_bytes += len(data)
+        self.evict()
+        return path
+
+    def evict(self):
+        """Удаляет самые старые кадры, пока не уложимся в бюджет"""
+        with self._lock:
+            if self._holds:
+                return
+            while self._frames and self.total_bytes > self.max_bytes:
+                path, size = self._frames.popleft()
+                self.total_bytes -= size
+                self.evicted += 1
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+    def hold(self):
+        """Запрещает удаление кадров; возвращает текущий список путей"""
+        with self._lock:
+            self._holds += 1
+            return [path for path, _ in self._frames]
+
+    def release(self):
+        with self._lock:
+            self._holds -= 1
+        self.evict()
+
+    def latest_path(self):
+        with self._lock:
+            return self._frames[-1][0] if self._frames else None
+
+    def clear(self):
+        """Удаляет все кадры; False, если идет кодирование (кадры нужны ffmpeg)"""
+        with self._lock:
+            if self._holds:
+                return False
+            for path, _ in self._frames:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._frames.clear()
+            self.total_bytes = 0
+            return True
+
+def encode_command(list_path, output, fps=24, width=1280, crf=28, ffmpeg='ffmpeg', nice=10):
+    """Команда кодирования: H.264 с быстрым пресетом, ширина кратна двум"""
+    command = [
+        ffmpeg, '-hide_banner', '-loglevel', 'error', '-y',
+        '-f', 'concat', '-safe', '0', '-i', list_path,
+        '-vf', f"scale='min({width},iw)':-2,format=yuv420p",
+        '-r', str(fps), '-c:v', 'libx264', '-preset', 'veryfast', '-crf', str(crf),
+        '-movflags', '+faststart', output,
+    ]
+    if nice and shutil.which('nice'):
+        command = ['nice', '-n', str(nice)] + command
+    return command
+
+def _quote(path):
+    return "'" + path.replace("'", "'\\''") + "'"
+
+def write_concat_list(frames, list_path, fps):
+    """Список кадров для ffmpeg: каждый кадр показывается 1/fps секунды"""
+    duration = 1.0 / fps
+    with open(list_path, 'w') as list_file:
+        list_file.write('ffconcat version 1.0\n')
+        for path in frames:
+            list_file.write(f"file {_quote(path)}\nduration {duration:.6f}\n")
+        if frames:
+            # Без повтора последнего кадра concat не учитывает его длительность
+            list_file.write(f"file {_quote(frames[-1])}\n")
+
+class Timelapse:
+    """Съемка по интервалу, кадры на диске и кодирование ролика по запросу
+
+    capture() — корутина, возвращающая снимок с полями data и timestamp
+    """
+
+    def __init__(self, capture, directory, max_bytes, interval=10, fps=24, width=1280, crf=28,
+                 ffmpeg='ffmpeg', encode_timeout=1800):
+        self._capture = capture
+        self.directory = directory
+        self.interval = interval
+        self.fps = fps
+        self.width = width
+        self.crf = crf
+        self.ffmpeg = ffmpeg
+        self.encode_timeout = encode_timeout
+        self.store = FrameStore(os.path.join(directory, 'frames'), max_bytes)
+        self.clip_path = os.path.join(directory, CLIP_NAME)
+        self.captured = 0
+        self.errors = 0
+        self.encodes = 0
+        self.last_encode_seconds = None
+        self._clip_source = None  # Последний кадр, вошедший в готовый ролик
+        self._task = None
+        self._encoding = None
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Запускает съемку по интервалу"""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Timelapse started: every {self.interval}s into {self.store.directory}")
+
+    async def stop(self):
+        """Останавливает съемку (кадры остаются на диске)"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def close(self):
+        """Останавливает съемку и прерывает идущее кодирование"""
+        await self.stop()
+        if self._encoding is not None:
+            self._encoding.cancel()
+            try:
+                await self._encoding
+            except (asyncio.CancelledError, TimelapseError):
+                pass
+
+    async def clear(self):
+        """Удаляет кадры и ролик (съемка, если идет, продолжается с нуля)"""
+        if self._encoding is not None:
+            raise TimelapseError("Идет кодирование ролика, попробуйте позже")
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(None, self.store.clear):
+            raise TimelapseError("Идет кодирование ролика, попробуйте позже")
+        self._clip_source = None
+        try:
+            os.remove(self.clip_path)
+        except FileNotFoundError:
+            pass
+
+    async def capture_once(self):
+        snapshot = await self._capture()
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.store.add, snapshot.data, snapshot.timestamp)
+        self.captured += 1
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            try:
+                await self.capture_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"Timelapse capture failed: {e}")
+            # Планируем от расписания, а не от конца съемки, чтобы интервал не «уплывал»
+            next_tick += self.interval
+            delay = next_tick - loop.time()
+            if delay < 0:
+                next_tick = loop.time()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    async def get_clip(self):
+        """Путь к ролику по всем кадрам на диске; кодирует, только если появились новые кадры"""
+        if self._encoding is not None:
+            # Уже кодируем: ждем тот же ролик
+            return await asyncio.shield(self._encoding)
+        latest = self.store.latest_path()
+        if latest is None:
+            raise TimelapseError("Кадров еще нет: запустите /timelapse start")
+        if latest == self._clip_source and os.path.exists(self.clip_path):
+            return self.clip_path
+        self._encoding = asyncio.get_running_loop().create_task(self._encode())
+        return await asyncio.shield(self._encoding)
+
+    async def _encode(self):
+        frames = self.store.hold()
+        loop = asyncio.get_running_loop()
+        list_path = os.path.join(self.directory, 'frames.ffconcat')
+        temp_path = self.clip_path + '.part.mp4'
+        started = time.monotonic()
+        try:
+            await loop.run_in_executor(None, write_concat_list, frames, list_path, self.fps)
+            command = encode_command(list_path, temp_path, self.fps, self.width, self.crf, self.ffmpeg)
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *command, stdin=asyncio.subprocess.DEVNULL,
+                    stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+                )
+            except OSError as e:
+                raise TimelapseError(f"Не удалось запустить {self.ffmpeg}: {e}")
+            try:
+                _, stderr = await asyncio.wait_for(process.communicate(), self.encode_timeout)
+            except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+                if process.returncode is None:
+                    process.kill()
+                await process.wait()
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                raise TimelapseError("Кодирование превысило время выполнения")
+            if process.returncode != 0:
+                raise TimelapseError(stderr.decode(errors='replace').strip()
+                                     or f"ffmpeg: код выхода {process.returncode}")
+            # Атомарная замена: уже отправляемый ролик не обрезается новым
+            os.replace(temp_path, self.clip_path)
+        finally:
+            self.store.release()
+            self._encoding = None
+        self._clip_source = frames[-1]
+        self.encodes += 1
+        self.last_encode_seconds = time.monotonic() - started
+        logger.info(f"Timelapse encoded: {len(frames)} frames in {self.last_encode_seconds:.1f}s")
+        return self.clip_path
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'frames': len(self.store),
+            'bytes': self.store.total_bytes,
+            'max_bytes': self.store.max_bytes,
+            'evicted': self.store.evicted,
+            'captured': self.captured,
+            'errors': self.errors,
+            'encodes': self.encodes,
+        }
+
+def format_timelapse_stats(stats):
+    """Форматирует состояние таймлапса одной строкой"""
+    return (f"{'идет' if stats['running'] else 'остановлен'}, кадров {stats['frames']} "
+            f"({stats['bytes'] / 1024 / 1024:.1f} из {stats['max_bytes'] / 1024 / 1024:g} МБ), "
+            f"удалено старых {stats['evicted']}, ошибок съемки {stats['errors']}")
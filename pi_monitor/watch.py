@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Живая панель /watch
+Один общий тикер раз в интервал собирает статус и правит по одному
+сообщению в каждом подписанном чате. Неизменившийся текст не отправляется,
+а токен-бакеты держат правки в пределах лимитов Telegram на чат и на бота
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from pi_monitor import perf
+
+logger = logging.getLogger(__name__)
+
+# Сколько ошибок правки подряд терпим, прежде чем отписать чат
+MAX_EDIT_FAILURES = 3
+
+class TokenBucket:
+    """Токен-бакет: rate токенов в секунду, не больше capacity в запасе"""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Забирает токены, если они есть; иначе False без ожидания"""
+        now = self._clock()
+        if now < self._blocked_until:
+            return False
+        self._refill(now)
+        if self._tokens < tokens:
+            return False
+        self._tokens -= tokens
+        return True
+
+    def refund(self, tokens=1):
+        """Возвращает токены, если действие не понадобилось"""
+        self._tokens = min(self.capacity, self._tokens + tokens)
+
+    def pause(self, seconds):
+        """Блокирует бакет (Telegram ответил «повторите через N секунд»)"""
+        now = self._clock()
+        self._blocked_until = max(self._blocked_until, now + seconds)
+        self._tokens = 0.0
+        self._updated = now
+
+@dataclass
+class Watcher:
+    """Подписка одного чата: сообщение, которое правится на месте"""
+    chat_id: int
+    message: object
+    expires: float
+    body: str = None  # Текст панели без строки времени, последний отправленный
+    bucket: TokenBucket = None
+    last_edit: float = 0.0
+    failures: int = 0
+    edits: int = 0
+
+def _retry_after_seconds(error):
+    """Сколько ждать после RetryAfter (число или timedelta), иначе None"""
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is None:
+        return None
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+class WatchTicker:
+    """Общий тикер для всех /watch
+
+    collect() — корутина со статусом, render(status) — текст панели без времени,
+    footer(status) — изменчивая подпись (время обновления), которая не участвует
+    в сравнении. Тикер работает, только пока есть подписчики
+    """
+
+    def __init__(self, collect, render, footer=None, interval=5, duration=3600,
+                 chat_rate=1 / 3, chat_burst=1, global_rate=25, global_burst=25,
+                 clock=time.monotonic):
+        self._collect = collect
+        self._render = render
+        self._footer = footer or (lambda status: '')
+        self.interval = interval
+        self.duration = duration
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self._clock = clock
+        self.global_bucket = TokenBucket(global_rate, global_burst, clock)
+        self.watchers = {}
+        self._task = None
+        self.ticks = 0
+        self.edits = 0
+        self.unchanged = 0
+        self.limited = 0
+        self.errors = 0
+
+    def subscribe(self, chat_id, message, body=None):
+        """Подписывает чат (старая подписка чата заменяется) и запускает тикер"""
+        watcher = Watcher(chat_id, message, self._clock() + self.duration, body,
+                          TokenBucket(self.chat_rate, self.chat_burst, self._clock))
+        # Первое сообщение уже отправлено: следующая правка не раньше, чем позволит лимит чата
+        if body is not None:
+            watcher.bucket.try_acquire()
+        self.watchers[chat_id] = watcher
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            logger.info(f"Watch ticker started: every {self.interval}s")
+        return watcher
+
+    def unsubscribe(self, chat_id):
+        """Отписывает чат; возвращает его подписку или None"""
+        return self.watchers.pop(chat_id, None)
+
+    async def stop(self):
+        """Останавливает тикер и снимает все подписки"""
+        self.watchers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def tick(self):
+        """Один такт: один сбор на всех, правки только там, где текст изменился"""
+        self.ticks += 1
+        now = self._clock()
+        for chat_id in [c for c, w in self.watchers.items() if w.expires <= now]:
+            await self._finish(self.watchers.pop(chat_id))
+        if not self.watchers:
+            return
+
+        with perf.measure('watch.collect'):
+            status = await self._collect()
+        body = self._render(status)
+        text = body + self._footer(status)
+
+        # Сначала те, кого дольше не правили: при нехватке общего лимита никто не голодает
+        due = []
+        for watcher in sorted(self.watchers.values(), key=lambda w: w.last_edit):
+            if watcher.body == body:
+                self.unchanged += 1
+                continue
+            if not watcher.bucket.try_acquire():
+                self.limited += 1
+                continue
+            if not self.global_bucket.try_acquire():
+                watcher.bucket.refund()
+                self.limited += 1
+                continue
+            due.append(watcher)
+
+        if due:
+            with perf.measure('watch.edit'):
+                await asyncio.gather(*(self._edit(watcher, body, text) for watcher in due))
+
+    async def _edit(self, watcher, body, text):
+        try:
+            await watcher.message.edit_text(text, parse_mode='HTML')
+        except Exception as e:
+            retry_after = _retry_after_seconds(e)
+            if retry_after is not None:
+                watcher.bucket.pause(retry_after)
+                self.limited += 1
+                return
+            if 'not modified' in str(e).lower():
+                watcher.body = body
+                return
+            self.errors += 1
+            watcher.failures += 1
+            logger.error(f"Watch edit failed for chat {watcher.chat_id}: {e}")
+            if watcher.failures >= MAX_EDIT_FAILURES and self.watchers.get(watcher.chat_id) is watcher:
+                # Сообщение удалено или чат недоступен — больше не тратим на него лимит
+                del self.watchers[watcher.chat_id]
+            return
+        watcher.body = body
+        watcher.failures = 0
+        watcher.last_edit = self._clock()
+        watcher.edits += 1
+        self.edits += 1
+
+    async def _finish(self, watcher):
+        """Последняя правка истекшей подписки"""
+        try:
+            await watcher.message.edit_text(
+                (watcher.body or '') + "👁 <i>Наблюдение завершено. Снова: /watch</i>", parse_mode='HTML')
+        except Exception as e:
+            logger.error(f"Watch final edit failed for chat {watcher.chat_id}: {e}")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time() + self.interval
+        while self.watchers:
+            delay = next_tick - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Watch tick error: {e}")
+            # Планируем от расписания, а не от конца такта, чтобы интервал не «уплывал»
+            next_tick += self.interval
+            if next_tick < loop.time():
+                next_tick = loop.time()
+        logger.info("Watch ticker stopped: no watchers")
+
+    def stats(self):
+        """Счетчики тикера"""
+        return {'watchers': len(self.watchers), 'ticks': self.ticks, 'edits': self.edits,
+                'unchanged': self.unchanged, 'limited': self.limited, 'errors': self.errors}
+
+def format_watch_stats(stats):
+    """Форматирует счетчики тикера одной строкой"""
+    return (f"наблюдателей {stats['watchers']}, тактов {stats['ticks']}, правок {stats['edits']}, "
+            f"без изменений {stats['unchanged']}, отложено лимитом {stats['limited']}, "
+            f"ошибок {stats['errors']}")
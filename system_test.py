@@ -5,22 +5,10 @@
 Проверяет базовую функциональность системы
 """
 
-import os
-import sys
-import time
-import subprocess
-import platform
 from datetime import datetime
 
-def run_command(command):
-    """Выполняет команду и возвращает результат"""
-    try:
-        result = subprocess.run(command, shell=True, capture_output=True, text=True, timeout=10)
-        return result.stdout.strip(), result.stderr.strip(), result.returncode
-    except subprocess.TimeoutExpired:
-        return "", "Команда превысила время выполнения", 1
-    except Exception as e:
-        return "", f"Ошибка выполнения команды: {e}", 1
+from pi_monitor import metrics
+from pi_monitor.facts import get_static_facts
 
 def get_system_info():
     """Получает информацию о системе"""
@@ -28,21 +16,21 @@ def get_system_info():
     print("ИНФОРМАЦИЯ О СИСТЕМЕ")
     print("=" * 50)
     
+    facts = get_static_facts()
+    
     # Информация о платформе
-    print(f"Платформа: {platform.platform()}")
-    print(f"Архитектура: {platform.machine()}")
-    print(f"Процессор: {platform.processor()}")
-    print(f"Python версия: {sys.version}")
+    print(f"Платформа: {facts.platform}")
+    print(f"Архитектура: {facts.architecture}")
+    print(f"Процессор: {facts.processor}")
+    print(f"Ядер CPU: {facts.cpu_count}")
+    print(f"Python версия: {facts.python_version}")
     
     # Информация о Raspberry Pi
-    try:
-        with open('/proc/cpuinfo', 'r') as f:
-            cpuinfo = f.read()
-            if 'Raspberry Pi' in cpuinfo:
-                print("✓ Обнаружена Raspberry Pi")
-            else:
-                print("⚠ Система не похожа на Raspberry Pi")
-    except FileNotFoundError:
+    if facts.is_raspberry_pi:
+        print(f"✓ Обнаружена Raspberry Pi ({facts.model})")
+    elif facts.model or facts.cpu_count:
+        print("⚠ Система не похожа на Raspberry Pi")
+    else:
         print("⚠ Не удалось прочитать информацию о CPU")
 
 def get_cpu_temperature():
@@ -52,16 +40,15 @@ def get_cpu_temperature():
     print("=" * 50)
     
     try:
-        with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-            temp = int(f.read().strip()) / 1000.0
-            print(f"Температура CPU: {temp:.1f}°C")
-            
-            if temp < 50:
-                print("✓ Температура в норме")
-            elif temp < 70:
-                print("⚠ Температура повышена")
-            else:
-                print("❌ Температура критическая!")
+        temp = metrics.read_temperature()
+        print(f"Температура CPU: {temp:.1f}°C")
+        
+        if temp < 50:
+            print("✓ Температура в норме")
+        elif temp < 70:
+            print("⚠ Температура повышена")
+        else:
+            print("❌ Температура критическая!")
     except FileNotFoundError:
         print("⚠ Не удалось получить температуру CPU")
     except Exception as e:
@@ -74,38 +61,20 @@ def get_memory_info():
     print("=" * 50)
     
     try:
-        with open('/proc/meminfo', 'r') as f:
-            meminfo = f.read()
-            lines = meminfo.split('\n')
-            
-            total_mem = 0
-            free_mem = 0
-            available_mem = 0
-            
-            for line in lines:
-                if line.startswith('MemTotal:'):
-                    total_mem = int(line.split()[1])
-                elif line.startswith('MemFree:'):
-                    free_mem = int(line.split()[1])
-                elif line.startswith('MemAvailable:'):
-                    available_mem = int(line.split()[1])
-            
-            total_gb = total_mem / 1024 / 1024
-            free_gb = free_mem / 1024 / 1024
-            available_gb = available_mem / 1024 / 1024
-            used_gb = total_gb - available_gb
-            usage_percent = (used_gb / total_gb) * 100
-            
-            print(f"Общая память: {total_gb:.1f} GB")
-            print(f"Свободная память: {free_gb:.1f} GB")
-            print(f"Доступная память: {available_gb:.1f} GB")
-            print(f"Используется: {used_gb:.1f} GB ({usage_percent:.1f}%)")
+        mem = metrics.read_meminfo()
+        gb = 1024 * 1024 * 1024
+        usage_percent = mem.percent
+        
+        print(f"Общая память: {mem.total / gb:.1f} GB")
+        print(f"Свободная память: {mem.free / gb:.1f} GB")
+        print(f"Доступная память: {mem.available / gb:.1f} GB")
+        print(f"Используется: {mem.used / gb:.1f} GB ({usage_percent:.1f}%)")
+        
+        if usage_percent < 80:
+            print("✓ Использование памяти в норме")
+        else:
+            print("⚠ Высокое использование памяти")
             
-            if usage_percent < 80:
-                print("✓ Использование памяти в норме")
-            else:
-                print("⚠ Высокое использование памяти")
-                
     except Exception as e:
         print(f"❌ Ошибка при получении информации о памяти: {e}")
 
@@ -115,33 +84,28 @@ def get_disk_usage():
     print("ИНФОРМАЦИЯ О ДИСКЕ")
     print("=" * 50)
     
-    stdout, stderr, returncode = run_command("df -h /")
+    try:
+        disks = metrics.read_disks()
+    except Exception as e:
+        print(f"❌ Ошибка при получении информации о диске: {e}")
+        return
+    
+    if not disks:
+        print("⚠ Не удалось разобрать информацию о диске")
+        return
     
-    if returncode == 0:
-        lines = stdout.split('\n')
-        if len(lines) > 1:
-            parts = lines[1].split()
-            if len(parts) >= 5:
-                filesystem = parts[0]
-                total = parts[1]
-                used = parts[2]
-                available = parts[3]
-                usage_percent = parts[4].rstrip('%')
-                
-                print(f"Файловая система: {filesystem}")
-                print(f"Общий размер: {total}")
-                print(f"Использовано: {used}")
-                print(f"Доступно: {available}")
-                print(f"Использование: {usage_percent}%")
-                
-                if int(usage_percent) < 90:
-                    print("✓ Свободного места достаточно")
-                else:
-                    print("⚠ Мало свободного места!")
+    for disk in disks:
+        print(f"Файловая система: {disk.device} ({disk.fstype}) на {disk.mountpoint}")
+        print(f"Общий размер: {metrics.format_size(disk.total)}")
+        print(f"Использовано: {metrics.format_size(disk.used)}")
+        print(f"Доступно: {metrics.format_size(disk.available)}")
+        print(f"Использование: {disk.percent}%")
+        
+        if disk.percent < 90:
+            print("✓ Свободного места достаточно")
         else:
-            print("⚠ Не удалось разобрать информацию о диске")
-    else:
-        print(f"❌ Ошибка при получении информации о диске: {stderr}")
+            print("⚠ Мало свободного места!")
+        print()
 
 def get_network_info():
     """Получает информацию о сети"""
@@ -149,31 +113,30 @@ def get_network_info():
     print("СЕТЕВЫЕ ИНТЕРФЕЙСЫ")
     print("=" * 50)
     
-    stdout, stderr, returncode = run_command("ip addr show")
+    try:
+        interfaces = metrics.read_interfaces()
+    except Exception as e:
+        print(f"❌ Ошибка при получении сетевой информации: {e}")
+        return
+    
+    if not interfaces:
+        print("⚠ Сетевые интерфейсы не найдены")
+        return
     
-    if returncode == 0:
-        interfaces = []
-        current_interface = None
-        
-        for line in stdout.split('\n'):
-            if line.strip().startswith(('1:', '2:', '3:', '4:')):
-                if 'lo' in line:
-                    current_interface = 'lo (localhost)'
-                elif 'eth' in line:
-                    current_interface = 'eth0 (Ethernet)'
-                elif 'wlan' in line:
-                    current_interface = 'wlan0 (Wi-Fi)'
-                else:
-                    current_interface = line.split(':')[1].strip()
-                interfaces.append(current_interface)
-            elif 'inet ' in line and current_interface:
-                ip = line.split()[1].split('/')[0]
-                print(f"{current_interface}: {ip}")
+    for interface in interfaces:
+        if interface.name == 'lo':
+            label = 'lo (localhost)'
+        elif interface.name.startswith('eth'):
+            label = f'{interface.name} (Ethernet)'
+        elif interface.name.startswith('wlan'):
+            label = f'{interface.name} (Wi-Fi)'
+        else:
+            label = interface.name
         
-        if not interfaces:
-            print("⚠ Сетевые интерфейсы не найдены")
-    else:
-        print(f"❌ Ошибка при получении сетевой информации: {stderr}")
+        for ip in interface.ipv4 + interface.ipv6:
+            print(f"{label}: {ip}")
+        if not interface.ipv4 and not interface.ipv6:
+            print(f"{label}: нет адреса ({interface.operstate})")
 
 def get_uptime():
     """Получает время работы системы"""
@@ -182,9 +145,8 @@ def get_uptime():
     print("=" * 50)
     
     try:
-        with open('/proc/uptime', 'r') as f:
-            uptime_seconds = float(f.read().split()[0])
-            
+        uptime_seconds = metrics.read_uptime()
+        
         days = int(uptime_seconds // 86400)
         hours = int((uptime_seconds % 86400) // 3600)
         minutes = int((uptime_seconds % 3600) // 60)
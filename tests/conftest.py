@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""Общие фикстуры тестов: изоляция настроек бота и поддельные сообщения Telegram"""
+
+import os
+import sys
+import types
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pi_monitor.bot import settings  # noqa: E402
+
+@pytest.fixture(autouse=True)
+def restore_settings():
+    """configure() меняет модуль настроек: возвращаем значения по умолчанию после теста"""
+    saved = {name: value for name, value in vars(settings).items() if name.isupper()}
+    yield
+    for name, value in saved.items():
+        setattr(settings, name, value)
+
+class FakeMessage:
+    """Сообщение, которое только записывает ответы бота"""
+
+    def __init__(self):
+        self.replies = []
+
+    async def reply_text(self, text, **kwargs):
+        self.replies.append((text, kwargs))
+        return self
+
+def fake_update(user_id=1):
+    message = FakeMessage()
+    return types.SimpleNamespace(message=message, effective_message=message,
+                                 effective_user=types.SimpleNamespace(id=user_id),
+                                 effective_chat=types.SimpleNamespace(id=user_id))
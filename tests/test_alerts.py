@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Оповещения: подавление дребезга, гистерезис, пауза между тревогами и получатели"""
+
+import asyncio
+import logging
+
+from pi_monitor.alerts import AlertEngine, AlertRule, format_alert_message
+from pi_monitor.bot import settings
+from pi_monitor.bot.plugins.status import Plugin
+
+def _engine(for_ticks=3, cooldown=900.0):
+    return AlertEngine([AlertRule('temperature', 'temperature', "Температура CPU", 70, 65, "°C",
+                                  for_ticks=for_ticks, cooldown=cooldown)])
+
+def _feed(engine, values, start=0.0, step=10.0):
+    """Прогоняет замеры; возвращает [(номер замера, сработала ли тревога)]"""
+    fired = []
+    for index, value in enumerate(values):
+        for event in engine.evaluate({'temperature': value}, start + index * step):
+            fired.append((index, event.firing))
+    return fired
+
+def test_fires_after_for_ticks_in_a_row():
+    engine = _engine()
+    # Два замера выше порога, затем провал: счетчик сбрасывается
+    assert _feed(engine, [71, 72, 60, 71, 72, 73]) == [(5, True)]
+    assert [rule.name for rule in engine.active_rules()] == ['temperature']
+
+def test_hysteresis_keeps_alert_between_thresholds():
+    engine = _engine(for_ticks=1)
+    # 68 ниже порога 70, но выше порога снятия 65: тревога держится
+    assert _feed(engine, [75, 68, 66, 69, 64]) == [(0, True), (4, False)]
+    assert engine.active_rules() == []
+
+def test_resolve_needs_for_ticks_too():
+    engine = _engine(for_ticks=2)
+    assert _feed(engine, [75, 75, 60, 75, 60, 60]) == [(1, True), (5, False)]
+
+def test_cooldown_suppresses_repeat_and_its_resolve():
+    engine = _engine(for_ticks=1, cooldown=900)
+    # Повторная тревога через 20 с после первой не отправляется, и о ее снятии тоже молчим
+    assert _feed(engine, [75, 60, 75, 60]) == [(0, True), (1, False)]
+    assert engine.active_rules() == []
+    # После паузы тревога снова сообщается
+    assert _feed(engine, [75, 60], start=1000) == [(0, True), (1, False)]
+
+def test_missing_and_nan_values_are_skipped():
+    engine = _engine(for_ticks=2)
+    assert engine.evaluate({'temperature': 75}, 0) == []
+    assert engine.evaluate({}, 10) == []
+    assert engine.evaluate({'temperature': float('nan')}, 20) == []
+    assert [event.firing for event in engine.evaluate({'temperature': 75}, 30)] == [True]
+
+def test_messages():
+    engine = _engine(for_ticks=1)
+    fired, = engine.evaluate({'temperature': 71.25}, 0)
+    resolved, = engine.evaluate({'temperature': 60}, 10)
+    assert "Тревога: Температура CPU" in format_alert_message(fired) and "71.2°C" in format_alert_message(fired)
+    assert "Норма: Температура CPU" in format_alert_message(resolved)
+    assert "ниже 65.0°C" in format_alert_message(resolved)
+
+def _start_status_plugin():
+    async def scenario():
+        plugin = Plugin(bot=None)
+        await plugin.start(application=None)
+        await plugin.stop(application=None)
+        return plugin
+    return asyncio.run(scenario())
+
+def test_no_recipients_disables_alerts(caplog):
+    settings.configure(ALERT_CHATS=[], ALLOWED_USERS=[], METRICS_DB_PATH=None,
+                       FAST_SAMPLE_INTERVAL=0, METRICS_EXPORTER_PORT=0, AGENT_PORT=0, FLEET_AGENTS=[])
+    with caplog.at_level(logging.WARNING):
+        plugin = _start_status_plugin()
+    assert plugin.alert_engine is None
+    assert "no recipients" in caplog.text
+
+def test_alert_chats_enable_alerts():
+    settings.configure(ALERT_CHATS=[42], ALLOWED_USERS=[], METRICS_DB_PATH=None,
+                       FAST_SAMPLE_INTERVAL=0, METRICS_EXPORTER_PORT=0, AGENT_PORT=0, FLEET_AGENTS=[])
+    assert _start_status_plugin().alert_engine is not None
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""/start и /help собираются для наборов плагинов обоих скриптов запуска"""
+
+import ast
+import asyncio
+import os
+
+import pytest
+
+from conftest import ROOT, fake_update
+from pi_monitor.bot import settings
+from pi_monitor.bot.core import MonitorBot
+
+LAUNCHERS = [
+    os.path.join(ROOT, 'pi_status_monitoring_bot', 'telegram_monitor_bot.py'),
+    os.path.join(ROOT, 'pi_status_and_photo_bot', 'telegram_monitor_photo_bot.py'),
+]
+
+def launcher_plugins(path):
+    """PLUGINS из скрипта запуска (без импорта: config.py с токеном есть только на Pi)"""
+    with open(path, encoding='utf-8') as launcher_file:
+        tree = ast.parse(launcher_file.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(target, 'id', None) == 'PLUGINS'
+                                                for target in node.targets):
+            return ast.literal_eval(node.value)
+    raise AssertionError(f"PLUGINS не найден в {path}")
+
+@pytest.mark.parametrize('launcher', LAUNCHERS, ids=os.path.basename)
+@pytest.mark.parametrize('devices', [None, ['/dev/video0', '/dev/video2']], ids=['one', 'several'])
+@pytest.mark.parametrize('preview', [True, False], ids=['preview', 'full'])
+def test_help_and_start_render(launcher, devices, preview):
+    settings.configure(CAMERA_DEVICES=devices, PHOTO_PREVIEW=preview)
+    plugins = launcher_plugins(launcher)
+    bot = MonitorBot(plugins)
+
+    update = fake_update()
+    asyncio.run(bot.help_command(update, None))
+    asyncio.run(bot.start(update, None))
+
+    help_text, start_text = (text for text, _ in update.message.replies)
+    for plugin in bot.plugins:
+        for line in plugin.help_lines:
+            assert line in help_text
+            assert line in start_text
+    if 'camera' in plugins:
+        assert "Что делает /photo" in help_text
+        assert ("/photo all — все камеры" in help_text) == (devices is not None)
+        assert ("• Превью:" in help_text) == preview
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""Кэш снимков: один сбор на все одновременные запросы, отмена одного не прерывает остальных"""
+
+import asyncio
+
+import pytest
+
+from pi_monitor.cache import SnapshotCache
+
+def _counting_collect(delay=0.05):
+    calls = []
+
+    async def collect():
+        calls.append(None)
+        await asyncio.sleep(delay)
+        return {'n': len(calls)}
+    return collect, calls
+
+def test_concurrent_gets_share_one_collect():
+    collect, calls = _counting_collect()
+    cache = SnapshotCache(collect, ttl=60)
+
+    async def scenario():
+        first = await asyncio.gather(*(cache.get() for _ in range(10)))
+        cached = await cache.get()
+        return first, cached
+
+    first, cached = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(snapshot is first[0] for snapshot in first) and cached is first[0]
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'coalesced': 9}
+
+def test_stale_snapshot_is_recollected():
+    collect, calls = _counting_collect(delay=0)
+    cache = SnapshotCache(collect, ttl=60)
+
+    async def scenario():
+        await cache.get()
+        return await cache.get(max_age=0)
+
+    assert asyncio.run(scenario()) == {'n': 2}
+    assert cache.stats()['misses'] == 2
+
+def test_cancelled_waiter_does_not_cancel_collect():
+    collect, calls = _counting_collect()
+    cache = SnapshotCache(collect, ttl=60)
+
+    async def scenario():
+        impatient = asyncio.ensure_future(cache.get())
+        patient = asyncio.ensure_future(cache.get())
+        await asyncio.sleep(0.01)
+        impatient.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await impatient
+        return await patient
+
+    assert asyncio.run(scenario()) == {'n': 1}
+    assert len(calls) == 1
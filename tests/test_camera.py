@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""Поток захвата, очередь съемок, поиск камер и завершение зависших программ захвата без настоящей камеры"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import types
+
+import pytest
+
+from pi_monitor.camera import (CameraBackend, CameraError, CaptureQueue, CaptureWorker,
+                               FfmpegStreamBackend, FileBackend, MjpegStreamParser,
+                               discover_devices, run_capture_command)
+
+JPEG = b'\xff\xd8\xff\xe0' + b'\x00' * 64 + b'\xff\xd9'
+
+class StalledBackend(CameraBackend):
+    """Камера, которая открывается, но не присылает ни одного кадра"""
+
+    name = 'stalled'
+
+    def __init__(self):
+        self._closed = threading.Event()
+
+    def open(self):
+        self._closed.clear()
+
+    def read_frame(self):
+        self._closed.wait()
+        raise CameraError("закрыто")
+
+    def close(self):
+        self._closed.set()
+
+def test_worker_streams_frames_from_files(tmp_path):
+    for n in range(3):
+        (tmp_path / f'{n}.jpg').write_bytes(JPEG + bytes([n]))
+    worker = CaptureWorker(FileBackend(str(tmp_path), fps=50), warmup_frames=1)
+    worker.start()
+    try:
+        frames = set()
+        deadline = time.monotonic() + 5
+        while len(frames) < 3 and time.monotonic() < deadline:
+            frames.add(worker.get_frame(timeout=2))
+            # Чаще смены кадров (20 мс): при кратном ей шаге часть файлов не попадает в выборку
+            time.sleep(0.005)
+    finally:
+        worker.stop()
+    assert frames == {JPEG + bytes([n]) for n in range(3)}
+
+def test_missing_files_are_reported(tmp_path):
+    worker = CaptureWorker(FileBackend(str(tmp_path / 'empty')), restart_delay=60)
+    worker.start()
+    try:
+        with pytest.raises(CameraError, match='Нет JPEG-файлов'):
+            worker.get_frame(timeout=2)
+    finally:
+        worker.stop()
+
+def test_stalled_camera_times_out():
+    worker = CaptureWorker(StalledBackend(), warmup_frames=0)
+    worker.start()
+    try:
+        started = time.monotonic()
+        with pytest.raises(CameraError, match='не прислала кадр'):
+            worker.get_frame(timeout=0.3)
+        assert time.monotonic() - started < 2
+    finally:
+        worker.stop(timeout=2)
+    assert not worker.running
+    with pytest.raises(CameraError):
+        worker.get_frame(timeout=5)
+
+def test_noisy_stderr_does_not_stall_stream(tmp_path):
+    # Больше буфера канала предупреждений в stderr до первого кадра
+    script = tmp_path / 'noisy'
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import sys, time\n"
+        "sys.stderr.write('warning: corrupt frame\\n' * 20000)\n"
+        "sys.stderr.flush()\n"
+        f"frame = {JPEG!r}\n"
+        "while True:\n"
+        "    sys.stdout.buffer.write(frame)\n"
+        "    sys.stdout.buffer.flush()\n"
+        "    time.sleep(0.05)\n"
+    )
+    script.chmod(0o755)
+    worker = CaptureWorker(FfmpegStreamBackend(command=str(script)), warmup_frames=0)
+    worker.start()
+    try:
+        assert worker.get_frame(timeout=5) == JPEG
+    finally:
+        worker.stop()
+
+def test_capture_command_is_killed_on_timeout(tmp_path):
+    pid_file = tmp_path / 'pid'
+    command = [sys.executable, '-c',
+               f"import os, time; open({str(pid_file)!r}, 'w').write(str(os.getpid())); time.sleep(30)"]
+
+    async def scenario():
+        started = time.monotonic()
+        with pytest.raises(CameraError, match='превысила время'):
+            await run_capture_command(command, timeout=1.0)
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 5
+    # Процесс убит, и зомби не осталось: его pid больше не существует
+    with pytest.raises(ProcessLookupError):
+        os.kill(int(pid_file.read_text()), 0)
+
+def test_capture_command_returns_stdout():
+    assert asyncio.run(run_capture_command([sys.executable, '-c', "print('jpeg')"], timeout=5)) == b'jpeg\n'
+
+def test_queue_limits_concurrent_captures():
+    queue = CaptureQueue(max_concurrent=1)
+    active = []
+
+    async def capture(n):
+        active.append(n)
+        assert len(active) == 1
+        await asyncio.sleep(0.01)
+        active.remove(n)
+        return n
+
+    async def scenario():
+        return await asyncio.gather(*(queue.run(capture, n) for n in range(5)))
+
+    assert asyncio.run(scenario()) == list(range(5))
+    stats = queue.stats()
+    assert stats['completed'] == 5 and stats['failed'] == 0
+    # Первая съемка занимает слот сразу, остальные четыре ждут
+    assert stats['max_waiting'] == 4 and stats['waiting'] == 0 and stats['active'] == 0
+
+def test_close_during_read_frame():
+    backend = FfmpegStreamBackend()
+
+    class Stream:
+        """Канал, который закрывают посреди чтения, как stop() из другого потока"""
+
+        def __init__(self):
+            self.chunks = [b'\xff\xd8partial', b'']
+
+        def read(self, size):
+            backend._process = None
+            return self.chunks.pop(0)
+
+    backend._process = types.SimpleNamespace(stdout=Stream())
+    backend._parser = MjpegStreamParser()
+    with pytest.raises(CameraError, match='завершился'):
+        backend.read_frame()
+    with pytest.raises(CameraError, match='закрыт'):
+        backend.read_frame()
+
+def _fake_video_node(tmp_path, name, driver, index=0):
+    (tmp_path / 'dev' / name).touch()
+    info = tmp_path / 'sys' / name
+    (info / 'device').mkdir(parents=True)
+    (info / 'index').write_text(f"{index}\n")
+    driver_dir = tmp_path / 'drivers' / driver
+    driver_dir.mkdir(parents=True, exist_ok=True)
+    (info / 'device' / 'driver').symlink_to(driver_dir)
+
+def test_discover_devices_keeps_capture_nodes(tmp_path):
+    (tmp_path / 'dev').mkdir()
+    _fake_video_node(tmp_path, 'video0', 'bcm2835-v4l2')
+    _fake_video_node(tmp_path, 'video2', 'uvcvideo')
+    _fake_video_node(tmp_path, 'video3', 'uvcvideo', index=1)  # Узел метаданных той же камеры
+    _fake_video_node(tmp_path, 'video10', 'bcm2835-codec')
+    _fake_video_node(tmp_path, 'video11', 'uvcvideo')
+    _fake_video_node(tmp_path, 'video12', 'unicam')
+    devices = discover_devices(str(tmp_path / 'dev' / 'video*'), str(tmp_path / 'sys'))
+    # Порядок по номеру устройства, а не по строке: video11 после video2
+    assert [os.path.basename(path) for path in devices] == ['video0', 'video2', 'video11']
+
+def test_discover_devices_without_sysfs(tmp_path):
+    for name in ('video1', 'video0'):
+        (tmp_path / name).touch()
+    devices = discover_devices(str(tmp_path / 'video*'), str(tmp_path / 'missing'))
+    assert [os.path.basename(path) for path in devices] == ['video0', 'video1']
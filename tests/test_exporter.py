@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""Текст /metrics в формате Prometheus и HTTP-сервер экспортера на свободном порту"""
+
+import asyncio
+import re
+import time
+import types
+
+import pytest
+
+from pi_monitor import exporter
+from pi_monitor.cache import SnapshotCache
+from pi_monitor.exporter import MetricsServer, render_metrics
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+
+@pytest.fixture(autouse=True)
+def static_facts(monkeypatch):
+    facts = types.SimpleNamespace(memory_total=4 * 1024 ** 3, cpu_count=4)
+    monkeypatch.setattr(exporter, 'get_static_facts', lambda: facts)
+
+def _status():
+    return {
+        'timestamp': 1700000000.5,
+        'values': {'temperature': 48.3, 'load_1': 0.5, 'memory_used': 1024.0},
+        'cpu_cores': [types.SimpleNamespace(name='cpu0', busy=12.5),
+                      types.SimpleNamespace(name='odd "core"\\\n', busy=0.0)],
+    }
+
+def parse(text):
+    """Образцы {имя: [(метки, значение)]} и объявленные HELP/TYPE; строки вне формата — ошибка"""
+    samples, declared = {}, {}
+    for line in text.splitlines():
+        if line.startswith('# HELP ') or line.startswith('# TYPE '):
+            kind, name, rest = line[2:].split(' ', 2)
+            declared.setdefault(name, {})[kind] = rest
+            continue
+        match = SAMPLE.match(line)
+        assert match, f"строка вне формата: {line!r}"
+        name, labels, value = match.groups()
+        samples.setdefault(name, []).append((labels, float(value)))
+    return samples, declared
+
+def test_render_metrics_declares_every_sample():
+    samples, declared = parse(render_metrics(_status()))
+    assert samples['pi_cpu_temperature_celsius'] == [(None, 48.3)]
+    assert samples['pi_memory_total_bytes'] == [(None, 4 * 1024 ** 3)]
+    assert samples['pi_snapshot_timestamp_seconds'] == [(None, 1700000000.5)]
+    for name in samples:
+        assert declared[name]['TYPE'] == 'gauge' and declared[name]['HELP']
+
+def test_missing_metrics_are_left_out():
+    samples, declared = parse(render_metrics({'values': {'load_1': 0.1}}))
+    assert 'pi_load1' in samples
+    for name in ('pi_cpu_temperature_celsius', 'pi_disk_used_percent', 'pi_cpu_core_busy_percent',
+                 'pi_snapshot_timestamp_seconds'):
+        assert name not in samples and name not in declared
+
+def test_label_values_are_escaped():
+    text = render_metrics(_status())
+    assert 'pi_cpu_core_busy_percent{cpu="cpu0"} 12.5' in text
+    # Кавычка, обратная косая черта и перевод строки не ломают строку образца
+    assert 'pi_cpu_core_busy_percent{cpu="odd \\"core\\"\\\\\\n"} 0.0' in text
+
+async def _request(port, line):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"{line}\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return head.decode(), body.decode()
+
+def test_server_on_free_port():
+    collects = []
+
+    async def collect():
+        collects.append(None)
+        return _status()
+
+    async def scenario():
+        server = MetricsServer(SnapshotCache(collect, ttl=60), port=0)
+        await server.start()
+        try:
+            first = await _request(server.port, 'GET /metrics HTTP/1.1')
+            second = await _request(server.port, 'GET /metrics?x=1 HTTP/1.1')
+            missing = await _request(server.port, 'GET / HTTP/1.1')
+            post = await _request(server.port, 'POST /metrics HTTP/1.1')
+            head = await _request(server.port, 'HEAD /metrics HTTP/1.1')
+        finally:
+            await server.stop()
+        return server, first, second, missing, post, head
+
+    server, first, second, missing, post, head = asyncio.run(scenario())
+    assert server.port != 0
+    assert first[0].startswith('HTTP/1.1 200') and exporter.CONTENT_TYPE in first[0]
+    samples, _ = parse(second[1])
+    assert samples['pi_load1'] == [(None, 0.5)]
+    assert samples['pi_exporter_scrapes_total'] == [(None, 2.0)]
+    assert 0 <= samples['pi_snapshot_age_seconds'][0][1] < 60
+    assert missing[0].startswith('HTTP/1.1 404') and post[0].startswith('HTTP/1.1 405')
+    assert head[0].startswith('HTTP/1.1 200') and head[1] == ''
+    # Один сбор и одна сборка текста на все опросы
+    assert len(collects) == 1 and server.renders == 1
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""Разбор procfs через постоянно открытые файлы: обрезанные строки, размер буфера, сбой одного источника"""
+
+import pytest
+
+from pi_monitor import metrics
+from pi_monitor.fastread import FastReader, ProcFile, _cpu_lines_complete, read_values_legacy
+
+MEMINFO = ("MemTotal:        3884700 kB\nMemFree:         2145312 kB\nMemAvailable:    3120540 kB\n"
+           "Buffers:           84512 kB\nCached:           912344 kB\nSwapTotal:        102396 kB\n")
+
+FILES = {
+    metrics.THERMAL_PATH: "48312\n",
+    metrics.LOADAVG_PATH: "0.52 0.58 0.59 1/234 5678\n",
+    metrics.MEMINFO_PATH: MEMINFO,
+    metrics.UPTIME_PATH: "123456.78 456789.12\n",
+    metrics.STAT_PATH: ("cpu  400 0 100 4000 10 0 5 0 0 0\ncpu0 200 0 50 2000 5 0 2 0 0 0\n"
+                        "cpu1 200 0 50 2000 5 0 3 0 0 0\nintr 12345 1 2 3\nctxt 999\n"),
+    metrics.CPUINFO_PATH: "processor\t: 0\n\nprocessor\t: 1\n",
+}
+
+def _stat_line(name):
+    # Большие счетчики после долгой работы: строка заметно длиннее 128 байт
+    return f"{name} " + " ".join(str(10 ** 15 + i) for i in range(10)) + "\n"
+
+@pytest.fixture
+def fake_root(tmp_path):
+    for path, content in FILES.items():
+        full = tmp_path / path.lstrip('/')
+        full.parent.mkdir(parents=True, exist_ok=True)
+        full.write_text(content)
+    metrics.set_root(str(tmp_path))
+    yield tmp_path
+    metrics.set_root('/')
+
+def test_stat_buffer_grows_instead_of_cutting_cpu_lines(tmp_path):
+    path = tmp_path / 'stat'
+    names = ['cpu'] + [f'cpu{n}' for n in range(8)]
+    path.write_text(''.join(_stat_line(name) for name in names) + "intr 1 2 3\nctxt 5\n")
+
+    stat = ProcFile(str(path), size=200)
+    try:
+        data = bytes(stat.read_until(_cpu_lines_complete))
+    finally:
+        stat.close()
+
+    lines = [line.split() for line in data.split(b'\n') if line.startswith(b'cpu')]
+    assert [line[0].decode() for line in lines] == names
+    assert all(len(line) == 11 for line in lines)
+
+def test_read_does_not_copy_buffer(tmp_path):
+    path = tmp_path / 'stat'
+    path.write_text(_stat_line('cpu') + "intr 1\n")
+    stat = ProcFile(str(path), size=4096)
+    try:
+        data = stat.read_until(_cpu_lines_complete)
+        assert isinstance(data, memoryview) and data.obj is stat._buffer
+        assert bytes(data[:4]) == b'cpu '
+        assert len(stat._buffer) == 4096
+    finally:
+        stat.close()
+
+def test_buffer_sized_from_file(tmp_path):
+    path = tmp_path / 'meminfo'
+    path.write_text(MEMINFO)
+    meminfo = ProcFile(str(path), size=None)
+    try:
+        assert len(meminfo._buffer) >= len(MEMINFO)
+        assert bytes(meminfo.read()) == MEMINFO.encode()
+    finally:
+        meminfo.close()
+
+def test_fast_values_match_legacy(fake_root):
+    reader = FastReader(disk_path=None)
+    tracker = metrics.CpuUsageTracker()
+    try:
+        reader.read_values()
+        fast = reader.read_values()
+    finally:
+        reader.close()
+    legacy = read_values_legacy(tracker, disk_path='/')
+    for key in ('temperature', 'load_1', 'load_15', 'memory_used', 'memory_percent', 'uptime'):
+        assert fast[key] == pytest.approx(legacy[key])
+
+def test_meminfo_without_memavailable_in_first_lines(fake_root):
+    # Порядок строк зависит от ядра: MemAvailable дальше первых 128 байт
+    lines = MEMINFO.splitlines(keepends=True)
+    available = lines.pop(2)
+    (fake_root / 'proc' / 'meminfo').write_text(''.join(lines) + available)
+    reader = FastReader(disk_path=None)
+    try:
+        values = reader.read_values()
+    finally:
+        reader.close()
+    assert values['memory_used'] == (3884700 - 3120540) * 1024
+
+def test_broken_source_keeps_the_rest(fake_root):
+    (fake_root / 'proc' / 'loadavg').write_text("garbage\n")
+    reader = FastReader(disk_path=None)
+    try:
+        values = reader.read_values()
+    finally:
+        reader.close()
+    assert 'load_1' not in values
+    assert values['temperature'] == 48.312 and 'memory_percent' in values and 'uptime' in values
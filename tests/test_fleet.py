@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""Опрос нескольких агентов: постоянные соединения, недоступный и зависший хост"""
+
+import asyncio
+import socket
+import time
+
+from pi_monitor.cache import SnapshotCache
+from pi_monitor.fleet import AgentServer, Fleet
+
+def _free_port():
+    # Порт, на котором никто не слушает: соединение будет отклонено
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def _agent(name, cpu):
+    async def collect():
+        return {'timestamp': time.time(), 'values': {'cpu_percent': cpu}}
+    return AgentServer(SnapshotCache(collect), '127.0.0.1', 0, name)
+
+def test_poll_two_agents_and_dead_host():
+    async def scenario():
+        agents = [_agent('pi-a', 10.0), _agent('pi-b', 20.0)]
+        for agent in agents:
+            await agent.start()
+        fleet = Fleet([('a', '127.0.0.1', agents[0].port), ('b', '127.0.0.1', agents[1].port),
+                       ('dead', '127.0.0.1', _free_port())], timeout=2.0)
+        try:
+            first = await fleet.poll()
+            second = await fleet.poll()
+        finally:
+            fleet.close()
+            for agent in agents:
+                await agent.stop()
+        return agents, fleet, first, second
+
+    agents, fleet, first, second = asyncio.run(scenario())
+    hosts = {host.name: host for host in second}
+    assert [host.name for host in first] == ['a', 'b', 'dead']
+    assert hosts['a'].ok and hosts['a'].payload['name'] == 'pi-a'
+    assert hosts['b'].payload['values'] == {'cpu_percent': 20.0}
+    assert not hosts['dead'].ok and 'нет соединения' in hosts['dead'].error
+    assert hosts['dead'].failures == 2
+    # Второй опрос идет по тем же соединениям
+    assert [client.connects for client in fleet.clients[:2]] == [1, 1]
+    assert [(agent.connections, agent.requests) for agent in agents] == [(1, 2), (1, 2)]
+
+def test_hung_host_does_not_delay_others():
+    async def scenario():
+        agent = _agent('pi-a', 10.0)
+        await agent.start()
+        # Принимает соединение, но никогда не отвечает
+        silent = await asyncio.start_server(lambda reader, writer: None, '127.0.0.1', 0)
+        fleet = Fleet([('a', '127.0.0.1', agent.port),
+                       ('silent', '127.0.0.1', silent.sockets[0].getsockname()[1])], timeout=0.5)
+        try:
+            started = time.monotonic()
+            hosts = await fleet.poll()
+            elapsed = time.monotonic() - started
+        finally:
+            fleet.close()
+            silent.close()
+            await agent.stop()
+        return hosts, elapsed
+
+    (healthy, silent), elapsed = asyncio.run(scenario())
+    assert healthy.ok
+    assert silent.error == 'нет ответа за 0.5 с'
+    assert elapsed < 2
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Прореживание рядов для /graph и кэш готовых графиков"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from pi_monitor import graph
+from pi_monitor.graph import GraphRenderer, downsample
+from pi_monitor.history import MetricHistory
+
+def test_downsample_caps_points_and_keeps_extremes():
+    times = np.arange(10000, dtype=np.float64)
+    values = np.full(10000, 50.0)
+    values[1234] = 99.0  # Короткий пик не должен пропасть при усреднении
+    values[7777] = 1.0
+    centers, mean, low, high = downsample(times, values, 0, 10000, 200)
+    assert len(centers) == len(mean) == len(low) == len(high) == 200
+    assert high.max() == 99.0 and low.min() == 1.0
+    assert mean.max() < 52  # В среднем корзины (50 замеров) пик почти не виден
+    assert np.all(np.diff(centers) > 0)
+
+def test_downsample_skips_empty_buckets():
+    centers, mean, low, high = downsample([5, 6, 95], [1.0, 3.0, 7.0], 0, 100, 10)
+    assert list(centers) == [5.0, 95.0]
+    assert list(mean) == [2.0, 7.0] and list(low) == [1.0, 7.0] and list(high) == [3.0, 7.0]
+
+def test_downsample_uses_rollup_extremes():
+    # Ряд из базы: среднее корзины и ее собственные минимум и максимум
+    centers, mean, low, high = downsample([10, 20], [5.0, 6.0], 0, 100, 1, lows=[1.0, 4.0], highs=[9.0, 8.0])
+    assert list(mean) == [5.5] and list(low) == [1.0] and list(high) == [9.0]
+
+@pytest.fixture
+def renders(monkeypatch):
+    calls = []
+
+    def fake_render_png(title, centers, mean, low, high):
+        calls.append((title, len(centers)))
+        return f"png {len(calls)}".encode()
+    monkeypatch.setattr(graph, 'render_png', fake_render_png)
+    return calls
+
+def _history(count=50):
+    history = MetricHistory(1000)
+    now = time.time()
+    for i in range(count, 0, -1):
+        history.record(now - i, {'temperature': 40.0 + i % 3})
+    return history
+
+def test_repeated_graph_is_served_from_cache(renders):
+    history = _history()
+    renderer = GraphRenderer(history, points=20)
+
+    async def scenario():
+        first = await renderer.get('temperature', 3600)
+        second = await renderer.get('temperature', 3600)
+        other_window = await renderer.get('temperature', 600)
+        return first, second, other_window
+
+    first, second, other_window = asyncio.run(scenario())
+    assert first == second != other_window
+    assert (renderer.renders, renderer.hits) == (2, 1)
+    assert all(points <= 20 for _, points in renders)
+
+def test_new_sample_invalidates_cache(renders):
+    history = _history()
+    renderer = GraphRenderer(history, points=20)
+
+    async def scenario():
+        first = await renderer.get('temperature', 3600)
+        history.record(time.time(), {'temperature': 60.0})
+        return first, await renderer.get('temperature', 3600)
+
+    first, second = asyncio.run(scenario())
+    assert first != second and renderer.renders == 2 and renderer.hits == 0
+
+def test_cache_size_is_bounded(renders):
+    renderer = GraphRenderer(_history(), points=20, cache_size=2)
+
+    async def scenario():
+        for window in (600, 1200, 1800, 600):
+            await renderer.get('temperature', window)
+
+    asyncio.run(scenario())
+    # 600 вытеснен двумя следующими окнами и отрисован заново
+    assert renderer.renders == 4 and len(renderer._cache) == 2
+
+def test_unknown_metric_and_empty_window(renders):
+    renderer = GraphRenderer(MetricHistory(10), points=20)
+    with pytest.raises(graph.GraphError, match='Неизвестная метрика'):
+        asyncio.run(renderer.get('fan', 600))
+    with pytest.raises(graph.GraphError, match='Нет данных'):
+        asyncio.run(renderer.get('temperature', 600))
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""Загрузка CPU по разностям счетчиков /proc/stat: общая строка, ядра и сброс счетчиков"""
+
+import pytest
+
+from pi_monitor import metrics
+from pi_monitor.metrics import CpuUsageTracker, cpu_usage_between
+
+# user, nice, system, idle, iowait, irq, softirq, steal
+BEFORE = {'cpu': (1000, 0, 500, 8000, 100, 0, 0, 0),
+          'cpu0': (600, 0, 300, 3900, 100, 0, 0, 0),
+          'cpu1': (400, 0, 200, 4100, 0, 0, 0, 0)}
+AFTER = {'cpu': (1150, 50, 550, 8200, 100, 10, 10, 30),
+         'cpu0': (1140, 20, 310, 3910, 100, 10, 10, 0),
+         'cpu1': (410, 30, 240, 4290, 0, 0, 0, 30)}
+
+def _stat(times):
+    lines = [f"{name} {' '.join(map(str, values))} 0 0\n" for name, values in times.items()]
+    return ''.join(lines) + "intr 1 2 3\nctxt 4\n"
+
+@pytest.fixture
+def fake_stat(tmp_path):
+    (tmp_path / 'proc').mkdir()
+    metrics.set_root(str(tmp_path))
+    yield tmp_path / 'proc' / 'stat'
+    metrics.set_root('/')
+
+def test_usage_from_counter_deltas():
+    usage = {row.name: row for row in cpu_usage_between(BEFORE, AFTER)}
+    total = usage['cpu']
+    # Прирост 500 тиков: user+nice 200, system 50, idle 200, irq+softirq 20, steal 30
+    assert (total.user, total.system, total.idle, total.irq, total.steal) == (40.0, 10.0, 40.0, 4.0, 6.0)
+    assert total.busy == 60.0
+
+def test_per_core_rows():
+    usage = cpu_usage_between(BEFORE, AFTER)
+    assert [row.name for row in usage] == ['cpu', 'cpu0', 'cpu1']
+    cpu0, cpu1 = usage[1], usage[2]
+    # Ядро 0 почти полностью занято, ядро 1 в основном простаивает
+    assert cpu0.busy == pytest.approx(98.33, abs=0.01)
+    assert cpu1.idle == pytest.approx(63.33, abs=0.01) and cpu1.steal == 10.0
+    assert all(abs(row.user + row.system + row.iowait + row.irq + row.steal + row.idle - 100) < 1e-9
+               for row in usage)
+
+def test_counters_going_backwards():
+    # iowait уменьшился, а ядро 1 отключали: его счетчики начались заново
+    after = dict(AFTER, cpu=(1150, 50, 550, 8200, 90, 10, 10, 30), cpu1=(5, 0, 2, 40, 0, 0, 0, 0))
+    usage = {row.name: row for row in cpu_usage_between(BEFORE, after)}
+    assert usage['cpu'].iowait == 0.0
+    assert all(value >= 0 for row in usage.values()
+               for value in (row.user, row.system, row.iowait, row.irq, row.steal, row.idle))
+    # У сброшенного ядра нет прироста — строка пропускается, остальные на месте
+    assert set(usage) == {'cpu', 'cpu0'}
+
+def test_new_core_is_skipped():
+    usage = cpu_usage_between({'cpu': BEFORE['cpu']}, AFTER)
+    assert [row.name for row in usage] == ['cpu']
+
+def test_tracker(fake_stat):
+    fake_stat.write_text(_stat(BEFORE))
+    tracker = CpuUsageTracker()
+    since_boot = tracker.update()
+    # Первый вызов — среднее с загрузки системы
+    assert since_boot[0].idle == pytest.approx(8000 / 96)
+    fake_stat.write_text(_stat(AFTER))
+    interval = tracker.update()
+    assert interval[0].busy == 60.0
+    # Счетчики не сдвинулись: отдается прошлый интервал
+    assert tracker.update() is interval
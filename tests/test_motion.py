@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Детектор движения на синтетической записи: срабатывание, смена освещения и пауза между событиями"""
+
+import numpy as np
+
+from pi_monitor.motion import MotionDetector, MotionWatcher, synthesize_frames
+
+MOVING = range(60, 80)
+
+def test_detector_fires_only_while_square_moves():
+    frames = synthesize_frames(moving=MOVING)
+    detector = MotionDetector(frames.shape[1:])
+    fired = [index for index, frame in enumerate(frames) if detector.update(frame).motion]
+    assert fired
+    # min_frames=2: первое изменение только подтверждается
+    assert fired[0] == MOVING.start + 1
+    # Квадрат ушел — фон восстанавливается за пару кадров
+    assert all(MOVING.start < index <= MOVING.stop + 2 for index in fired)
+
+def test_lighting_change_is_not_motion():
+    frames = synthesize_frames(count=40, moving=range(0))
+    frames[20:] = np.clip(frames[20:].astype(np.int16) + 80, 0, 255).astype(np.uint8)
+    detector = MotionDetector(frames.shape[1:])
+    results = [detector.update(frame) for frame in frames]
+    assert not any(result.motion for result in results)
+    assert results[20].relit
+
+def test_mask_hides_motion():
+    frames = synthesize_frames(moving=MOVING)
+    mask = np.zeros(frames.shape[1:], dtype=bool)
+    mask[:10] = True  # Полоса сверху, квадрат движется ниже
+    detector = MotionDetector(frames.shape[1:], mask=mask)
+    assert not any(detector.update(frame).motion for frame in frames)
+
+def test_watcher_cooldown():
+    frames = synthesize_frames(moving=MOVING)
+    watcher = MotionWatcher(None, MotionDetector(frames.shape[1:]), on_motion=None, cooldown=60)
+    # Кадры идут раз в секунду: за 20 кадров движения пауза не истекает
+    events = [watcher.process(frame, now=1000.0 + index) for index, frame in enumerate(frames)]
+    assert sum(event is not None for event in events) == 1
+    assert watcher.events == 1
+
+    # Через cooldown то же движение снова сообщается
+    watcher.detector.reset()
+    later = [watcher.process(frame, b'jpeg', now=2000.0 + index) for index, frame in enumerate(frames)]
+    fired = [event for event in later if event is not None]
+    assert len(fired) == 1 and fired[0].jpeg == b'jpeg' and watcher.events == 2
+    x0, y0, x1, y1 = fired[0].bbox
+    assert 0 <= x0 < x1 <= 1 and 0 <= y0 < y1 <= 1
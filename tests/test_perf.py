@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Гистограммы /perf: ошибки, которые обработчик ловит сам, тоже попадают в счетчик"""
+
+import asyncio
+
+import pytest
+
+from pi_monitor import perf
+from pi_monitor.bot.plugins.camera import Camera
+from pi_monitor.camera import CameraError
+from pi_monitor.perf import LatencyHistogram, PerfRegistry
+
+def test_percentiles_within_buckets():
+    histogram = LatencyHistogram()
+    for ms in [0.5] * 50 + [20] * 45 + [900] * 5:
+        histogram.observe(ms)
+    assert histogram.percentile(0.5) <= 1
+    assert 10 < histogram.percentile(0.95) <= 25
+    assert histogram.percentile(1.0) == 900 and histogram.count == 100
+
+def test_exception_and_mark_error_count_as_errors():
+    registry = PerfRegistry()
+    with registry.measure('ok'):
+        pass
+    with pytest.raises(RuntimeError):
+        with registry.measure('raised'):
+            raise RuntimeError
+    with registry.measure('handled'):
+        with registry.measure('inner'):
+            pass
+        # Ошибка отмечается в замере, внутри которого обработана, а не во вложенном
+        perf.mark_error()
+    assert {name: h.errors for name, h in registry.histograms.items()} == {
+        'ok': 0, 'raised': 1, 'inner': 0, 'handled': 1}
+
+def test_mark_error_outside_measure_is_ignored():
+    perf.mark_error()
+
+class FailingWorker:
+    def get_frame(self):
+        raise CameraError("нет кадра")
+
+def test_take_photo_error_return_is_recorded():
+    histogram = perf.registry.histogram('take_photo')
+    errors = histogram.errors
+    camera = Camera('/dev/video0', '/dev/video0')
+    camera.capture_worker = FailingWorker()
+    data, error = asyncio.run(camera.take_photo())
+    assert data is None and 'нет кадра' in error
+    assert histogram.errors == errors + 1
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""/photo all: камеры снимаются параллельно, опоздавшая и сломанная пропускаются в подписи"""
+
+import asyncio
+import time
+
+from conftest import FakeMessage, fake_update
+from pi_monitor.bot import settings
+from pi_monitor.bot.plugins.camera import Plugin
+from pi_monitor.cache import SnapshotCache
+from pi_monitor.camera import CameraError
+from pi_monitor.perf import PerfRegistry
+from pi_monitor.photos import Photo
+
+DEVICES = ['/dev/video0', '/dev/video2', '/dev/video4', '/dev/video6']
+
+class AlbumMessage(FakeMessage):
+    """Сообщение, которое записывает альбомы, правки и удаление статуса"""
+
+    def __init__(self):
+        super().__init__()
+        self.albums = []
+        self.edits = []
+        self.deleted = False
+
+    async def reply_media_group(self, media):
+        self.albums.append(media)
+        return []
+
+    async def edit_text(self, text, **kwargs):
+        self.edits.append(text)
+
+    async def delete(self):
+        self.deleted = True
+
+def _collect(delay=0.0, error=None):
+    async def collect():
+        await asyncio.sleep(delay)
+        if error:
+            raise CameraError(error)
+        return Photo(b'jpeg', time.time())
+    return collect
+
+def _plugin(*collects):
+    settings.configure(CAMERA_DEVICES=DEVICES[:len(collects)], CAMERA_ALBUM_TIMEOUT=0.3,
+                       PHOTO_SAVE_DIR=None)
+    plugin = Plugin(None)
+    for camera, collect in zip(plugin.cameras, collects):
+        camera.photo_cache = SnapshotCache(collect, ttl=60)
+    return plugin
+
+def _photo_all(plugin, registry):
+    update = fake_update()
+    update.message = AlbumMessage()
+
+    async def scenario():
+        started = time.monotonic()
+        # Как замер обработчика /photo в ядре бота
+        with registry.measure('photo'):
+            await plugin.photo_all(update)
+        return time.monotonic() - started
+
+    return update.message, asyncio.run(scenario())
+
+def test_late_and_broken_cameras_are_skipped():
+    registry = PerfRegistry()
+    plugin = _plugin(_collect(0.05), _collect(30), _collect(error="устройство занято"), _collect(0.1))
+    message, elapsed = _photo_all(plugin, registry)
+
+    # Ждем не дольше таймаута, а не все 30 секунд зависшей камеры
+    assert elapsed < 2
+    assert message.deleted and not message.edits
+    (album,) = message.albums
+    assert len(album) == 2
+    caption = album[0].caption
+    assert "2 из 4" in caption
+    assert "/dev/video2: нет кадра за 0.3 с" in caption
+    assert "/dev/video4: устройство занято" in caption
+    assert album[1].caption.endswith("/dev/video6")
+    # Пропущенные камеры — ошибка обработчика в /perf
+    assert registry.histogram('photo').errors == 1
+
+def test_no_camera_answered():
+    plugin = _plugin(_collect(30), _collect(error="нет устройства"))
+    message, elapsed = _photo_all(plugin, PerfRegistry())
+    assert elapsed < 2 and not message.albums
+    assert message.edits[0].startswith("❌ Ни одна камера не прислала кадр")
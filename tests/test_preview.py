@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Превью под размер: подбор качества и стороны, оценка размера по скорости канала"""
+
+import io
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from pi_monitor import preview
+from pi_monitor.preview import MIN_QUALITY, MIN_SIDE, UploadMeter, fit_preview
+
+def _jpeg(width=1280, height=960):
+    # Шум сжимается плохо: размер заметно зависит и от качества, и от стороны
+    pixels = np.random.default_rng(1).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, 'JPEG', quality=95)
+    return buffer.getvalue()
+
+def _count_resizes(monkeypatch):
+    sides = []
+    resize = preview._resize
+
+    def counting(image, side):
+        sides.append(side)
+        return resize(image, side)
+    monkeypatch.setattr(preview, '_resize', counting)
+    return sides
+
+def test_fits_target_at_full_side(monkeypatch):
+    sides = _count_resizes(monkeypatch)
+    data, side, quality = fit_preview(_jpeg(), 60000)
+    assert len(data) <= 60000 and side == 640 and quality > MIN_QUALITY
+    assert Image.open(io.BytesIO(data)).size == (640, 480)
+    # Двоичный поиск по качеству не масштабирует кадр заново
+    assert sides == [640]
+
+def test_side_shrinks_when_quality_is_not_enough(monkeypatch):
+    sides = _count_resizes(monkeypatch)
+    data, side, quality = fit_preview(_jpeg(), 8000)
+    assert len(data) <= 8000 and MIN_SIDE <= side < 640
+    assert max(Image.open(io.BytesIO(data)).size) == side
+    assert sides == sorted(set(sides), reverse=True) and sides[0] == 640
+
+def test_unreachable_target_returns_smallest():
+    data, side, quality = fit_preview(_jpeg(), 100)
+    assert (side, quality) == (MIN_SIDE, MIN_QUALITY)
+    assert len(data) > 100
+
+def test_target_bytes_default_before_measurement():
+    meter = UploadMeter()
+    assert meter.target_bytes(2, default=30000, minimum=8000, maximum=200000) == 30000
+
+@pytest.mark.parametrize('throughput, expected', [(1000, 8000), (20000, 40000), (10 ** 6, 200000)])
+def test_target_bytes_clamped(throughput, expected):
+    meter = UploadMeter()
+    meter.observe(throughput * 3, 3)
+    assert meter.target_bytes(2, default=30000, minimum=8000, maximum=200000) == expected
+
+def test_meter_smooths_and_ignores_zero_time():
+    meter = UploadMeter(alpha=0.5)
+    meter.observe(1000, 1)
+    meter.observe(3000, 1)
+    meter.observe(5000, 0)
+    assert meter.throughput == 2000 and meter.samples == 2
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""Пакетная запись MetricStore: гонка append и flush, агрегаты и выбор детализации запроса"""
+
+import threading
+import time
+
+import pytest
+
+from pi_monitor.store import MetricStore
+
+def test_append_during_flush_loses_nothing(tmp_path):
+    store = MetricStore(str(tmp_path / 'metrics.db'), fields=['cpu_percent'], batch_size=10 ** 9)
+    total = 20000
+    done = threading.Event()
+
+    def flusher():
+        while not done.is_set():
+            store.flush()
+
+    thread = threading.Thread(target=flusher)
+    thread.start()
+    # Свежие отметки времени: очистка по сроку хранения их не трогает
+    base = time.time()
+    try:
+        for n in range(total):
+            store.append(base + n * 0.001, {'cpu_percent': 1.0})
+    finally:
+        done.set()
+        thread.join()
+    store.flush()
+
+    count = store._db.execute('SELECT COUNT(*) FROM samples').fetchone()[0]
+    store.close()
+    assert count == total
+
+def test_aggregate_buckets(tmp_path):
+    store = MetricStore(str(tmp_path / 'metrics.db'), fields=['cpu_percent', 'temperature'])
+    batch = [(120.0, (10.0, None)), (150.0, (30.0, 50.0)), (179.9, (20.0, float('nan'))), (180.0, (5.0, 40.0))]
+    rows = sorted(store._aggregate(batch, 60))
+    store.close()
+    # Пустые и NaN значения не учитываются; корзины выровнены по размеру
+    assert rows == [('cpu_percent', 120, 10.0, 30.0, 60.0, 3), ('cpu_percent', 180, 5.0, 5.0, 5.0, 1),
+                    ('temperature', 120, 50.0, 50.0, 50.0, 1), ('temperature', 180, 40.0, 40.0, 40.0, 1)]
+
+def test_reflushed_timestamp_is_counted_once(tmp_path):
+    store = MetricStore(str(tmp_path / 'metrics.db'), fields=['cpu_percent'], batch_size=10 ** 9)
+    ts = time.time() - 30
+    store.append(ts, {'cpu_percent': 10.0})
+    store.flush()
+    store.append(ts, {'cpu_percent': 90.0})
+    store.append(ts + 1, {'cpu_percent': 20.0})
+    store.flush()
+    samples = store._db.execute('SELECT ts, cpu_percent FROM samples ORDER BY ts').fetchall()
+    rollup = store._db.execute('SELECT min, max, sum, count FROM rollup_1h').fetchall()
+    store.close()
+    assert samples == [(ts, 10.0), (ts + 1, 20.0)]
+    assert rollup == [(10.0, 20.0, 30.0, 2)]
+
+@pytest.mark.parametrize('span, step', [(3600, None), (6 * 3600, None), (86400, 60),
+                                        (14 * 86400, 60), (30 * 86400, 3600)])
+def test_query_picks_table_by_span(tmp_path, span, step):
+    store = MetricStore(str(tmp_path / 'metrics.db'), fields=['cpu_percent'], batch_size=10 ** 9)
+    end = time.time()
+    # Два замера в одной минуте: сырые строки отдельно, агрегаты — одна корзина со средним
+    minute = int((end - 600) // 60) * 60
+    store.append(minute + 10, {'cpu_percent': 10.0})
+    store.append(minute + 20, {'cpu_percent': 30.0})
+    store.flush()
+    rows = store.query('cpu_percent', end - span, end)
+    store.close()
+    if step is None:
+        assert rows == [(minute + 10, 10.0, 10.0, 10.0), (minute + 20, 30.0, 30.0, 30.0)]
+    else:
+        assert rows == [(minute // step * step, 20.0, 10.0, 30.0)]
+
+def test_query_rejects_unknown_metric(tmp_path):
+    store = MetricStore(str(tmp_path / 'metrics.db'), fields=['cpu_percent'])
+    with pytest.raises(ValueError):
+        store.query('cpu_percent; DROP TABLE samples', 0)
+    store.close()
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""Бюджет кадров таймлапса, очистка и предел времени кодирования"""
+
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+from pi_monitor.timelapse import FrameStore, Timelapse, TimelapseError
+
+def test_budget_evicts_oldest(tmp_path):
+    store = FrameStore(str(tmp_path), max_bytes=250)
+    paths = [store.add(b'x' * 100, 1700000000 + n) for n in range(4)]
+    assert len(store) == 2
+    assert [os.path.exists(path) for path in paths] == [False, False, True, True]
+
+def test_clear_respects_hold(tmp_path):
+    store = FrameStore(str(tmp_path), max_bytes=10 ** 6)
+    path = store.add(b'x' * 100, 1700000000)
+    store.hold()
+    assert store.clear() is False
+    assert os.path.exists(path)
+    store.release()
+    assert store.clear() is True
+    assert not os.path.exists(path) and len(store) == 0 and store.total_bytes == 0
+
+def test_timelapse_clear_refuses_while_encoding(tmp_path):
+    async def scenario():
+        timelapse = Timelapse(None, str(tmp_path), 10 ** 6)
+        timelapse.store.add(b'x' * 100, 1700000000)
+        timelapse._encoding = asyncio.get_running_loop().create_future()
+        with pytest.raises(TimelapseError):
+            await timelapse.clear()
+        assert len(timelapse.store) == 1
+        timelapse._encoding = None
+        with open(timelapse.clip_path, 'wb') as clip:
+            clip.write(b'mp4')
+        await timelapse.clear()
+        assert len(timelapse.store) == 0 and not os.path.exists(timelapse.clip_path)
+
+    asyncio.run(scenario())
+
+def test_encode_timeout_kills_encoder_and_releases_frames(tmp_path):
+    # «ffmpeg», который никогда не заканчивает кодирование
+    ffmpeg = tmp_path / 'slow-ffmpeg'
+    ffmpeg.write_text(f"#!{sys.executable}\nimport time\ntime.sleep(60)\n")
+    ffmpeg.chmod(0o755)
+
+    async def scenario():
+        timelapse = Timelapse(None, str(tmp_path / 'timelapse'), 10 ** 6, ffmpeg=str(ffmpeg),
+                              encode_timeout=0.5)
+        timelapse.store.add(b'x' * 100, 1700000000)
+        started = time.monotonic()
+        with pytest.raises(TimelapseError, match='превысило время'):
+            await timelapse.get_clip()
+        return timelapse, time.monotonic() - started
+
+    timelapse, elapsed = asyncio.run(scenario())
+    assert elapsed < 5
+    # Кадры снова можно удалять по бюджету, ролик не появился
+    assert timelapse.store.clear() is True
+    assert not os.path.exists(timelapse.clip_path)
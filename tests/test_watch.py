@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""Тикер /watch с подставными часами: лимиты на чат и на бота, неизменный текст, RetryAfter, истечение"""
+
+import asyncio
+
+from pi_monitor.watch import TokenBucket, WatchTicker
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+class RetryAfter(Exception):
+    def __init__(self, seconds):
+        super().__init__(f"Flood control exceeded. Retry in {seconds} seconds")
+        self.retry_after = seconds
+
+class WatchMessage:
+    """Сообщение панели: записывает правки, может ответить ошибкой"""
+
+    def __init__(self):
+        self.texts = []
+        self.error = None
+
+    async def edit_text(self, text, **kwargs):
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        self.texts.append(text)
+
+def _ticker(clock, status, **kwargs):
+    async def collect():
+        return dict(status)
+    # Интервал в час: фоновый цикл не успевает сработать, такты вызываются вручную
+    return WatchTicker(collect, lambda s: f"cpu {s['cpu']}\n", footer=lambda s: f"at {clock()}",
+                       interval=3600, clock=clock, **kwargs)
+
+def _run(scenario):
+    async def wrapped():
+        ticker, *rest = await scenario()
+        await ticker.stop()
+        return rest
+    return asyncio.run(wrapped())
+
+def test_token_bucket_refills_by_clock_and_pauses():
+    clock = Clock()
+    bucket = TokenBucket(rate=1, capacity=2, clock=clock)
+    assert bucket.try_acquire() and bucket.try_acquire() and not bucket.try_acquire()
+    clock.now += 1.5
+    assert bucket.try_acquire() and not bucket.try_acquire()
+    clock.now += 10
+    bucket.pause(5)
+    clock.now += 4.9
+    assert not bucket.try_acquire()
+    # Запас обнуляется паузой и снова не превышает capacity
+    clock.now += 1.1
+    assert bucket.try_acquire() and bucket.try_acquire() and not bucket.try_acquire()
+
+def test_per_chat_rate_limit():
+    clock, status = Clock(), {'cpu': 1}
+
+    async def scenario():
+        ticker = _ticker(clock, status)
+        message = WatchMessage()
+        ticker.subscribe(1, message, body="cpu 0\n")
+        # Первое сообщение уже заняло лимит чата (1 правка в 3 секунды)
+        await ticker.tick()
+        clock.now += 3
+        await ticker.tick()
+        status['cpu'] = 2
+        clock.now += 1
+        await ticker.tick()
+        clock.now += 2
+        await ticker.tick()
+        return ticker, message.texts, ticker.stats()
+
+    texts, stats = _run(scenario)
+    assert texts == ["cpu 1\nat 1003.0", "cpu 2\nat 1006.0"]
+    assert stats['edits'] == 2 and stats['limited'] == 2
+
+def test_global_rate_limit_serves_oldest_first():
+    clock, status = Clock(), {'cpu': 1}
+
+    async def scenario():
+        ticker = _ticker(clock, status, chat_rate=10, chat_burst=10, global_rate=1, global_burst=2)
+        messages = [WatchMessage() for _ in range(3)]
+        for chat_id, message in enumerate(messages):
+            ticker.subscribe(chat_id, message)
+        await ticker.tick()
+        edited_first = [bool(message.texts) for message in messages]
+        clock.now += 1
+        await ticker.tick()
+        return ticker, edited_first, [len(message.texts) for message in messages], ticker.stats()
+
+    edited_first, counts, stats = _run(scenario)
+    assert edited_first.count(True) == 2
+    # Обделенный чат получает правку первым, когда общий лимит восстановится
+    assert counts == [1, 1, 1]
+    assert stats['limited'] == 1 and stats['unchanged'] == 2
+
+def test_unchanged_text_is_not_sent():
+    clock, status = Clock(), {'cpu': 1}
+
+    async def scenario():
+        ticker = _ticker(clock, status)
+        message = WatchMessage()
+        ticker.subscribe(1, message)
+        await ticker.tick()
+        for _ in range(3):
+            # Меняется только строка времени — правка не нужна
+            clock.now += 10
+            await ticker.tick()
+        return ticker, message.texts, ticker.stats()
+
+    texts, stats = _run(scenario)
+    assert len(texts) == 1
+    assert stats['unchanged'] == 3 and stats['edits'] == 1 and stats['limited'] == 0
+
+def test_retry_after_pauses_chat():
+    clock, status = Clock(), {'cpu': 1}
+
+    async def scenario():
+        ticker = _ticker(clock, status, chat_rate=10, chat_burst=10)
+        message = WatchMessage()
+        ticker.subscribe(1, message)
+        message.error = RetryAfter(30)
+        await ticker.tick()
+        clock.now += 29
+        await ticker.tick()
+        paused = list(message.texts)
+        clock.now += 2
+        await ticker.tick()
+        return ticker, paused, message.texts, ticker.stats()
+
+    paused, texts, stats = _run(scenario)
+    assert paused == []
+    assert texts == ["cpu 1\nat 1031.0"]
+    assert stats['limited'] == 2 and stats['errors'] == 0
+
+def test_subscription_expires_after_duration():
+    clock, status = Clock(), {'cpu': 1}
+
+    async def scenario():
+        ticker = _ticker(clock, status, duration=60)
+        message = WatchMessage()
+        ticker.subscribe(1, message)
+        await ticker.tick()
+        clock.now += 59
+        await ticker.tick()
+        subscribed = 1 in ticker.watchers
+        clock.now += 1
+        await ticker.tick()
+        return ticker, subscribed, ticker.watchers, message.texts
+
+    subscribed, watchers, texts = _run(scenario)
+    assert subscribed and watchers == {}
+    assert texts[-1] == "cpu 1\n👁 <i>Наблюдение завершено. Снова: /watch</i>"